@@ -1,4 +1,5 @@
 import typing as T
+from queue import Empty
 
 import numpy as np
 import PySimpleGUI as sg
@@ -22,32 +23,40 @@ class GUIProcess(RobotProcess):
         self._title: str = title
 
     def run(self) -> None:
-        canvas_orig = sg.Canvas(size=(533, 400))
-        canvas_processed = sg.Canvas(size=(533, 400))
+        canvases: T.Dict[str, sg.Canvas] = {
+            "image_orig": sg.Canvas(size=(533, 400)),
+            "image_processed": sg.Canvas(size=(533, 400)),
+        }
 
         layout = [
             [sg.Text("Original", size=(76, 1)), sg.Text("Processed")],
-            [canvas_orig, canvas_processed],
+            [canvases["image_orig"], canvases["image_processed"]],
         ]
         window = sg.Window(self._title, layout, location=(10, 10))
 
         while True:
-            event, values = window.read(timeout=10)
+            event, values = window.read(timeout=0)
             if event in (sg.WIN_CLOSED, "Exit"):
                 break
 
-            self.try_redraw_image("image_orig", canvas_orig)
-            self.try_redraw_image("image_processed", canvas_processed)
+            # Wait for a frame from any queue instead of polling them,
+            # the timeout keeps the window responsive
+            try:
+                queue_name, raw_image = self.consume_any(canvases.keys(), timeout=0.01)
+            except Empty:
+                continue
+
+            self.redraw_image(queue_name, raw_image, canvases[queue_name])
 
         window.close()
         self.shared.exit_flag.value = True
 
-    def try_redraw_image(self, queue_name: str, canvas_elem: sg.Canvas) -> None:
-        if self.is_empty(queue_name):
-            return
-
-        raw_image: T.Union[tuple, np.ndarray] = self.consume(queue_name)
-
+    def redraw_image(
+        self,
+        queue_name: str,
+        raw_image: T.Union[tuple, np.ndarray],
+        canvas_elem: sg.Canvas,
+    ) -> None:
         # If we got depth data included - discard it
         if type(raw_image) is tuple:
             raw_image = raw_image[0]
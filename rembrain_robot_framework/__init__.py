@@ -1,2 +1,3 @@
 from .dispatcher import RobotDispatcher
 from .process import RobotProcess
+from .async_process import AsyncRobotProcess
@@ -0,0 +1,257 @@
+import asyncio
+import time
+import typing as T
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty
+from uuid import UUID
+
+from rembrain_robot_framework.models.request import Request
+from rembrain_robot_framework.process import RobotProcess
+from rembrain_robot_framework.queues import MessageBatch
+from rembrain_robot_framework.services.response_router import (
+    ResponseFuture,
+    ResponseRouter,
+)
+
+
+class AsyncRobotProcess(RobotProcess):
+    """
+    Base class for processes that run asyncio, e.g. for network I/O.
+    The run() method is a coroutine and queue operations have awaitable versions with the 'a' prefix,
+    so they don't block the event loop:
+
+    async def run(self) -> None:
+        while True:
+            message = await self.aconsume()
+            await self.apublish(await self.handle(message))
+
+    The synchronous methods of RobotProcess (publish(), consume(), ...) keep working as in any process,
+    but they block the event loop while they wait.
+
+    Waiting for a message doesn't poll the queues: the event loop watches the pipes of the queues.
+    Queues without a pipe (e.g. in-memory queues of a group) are checked every POLL_INTERVAL.
+    Messages are put into the queues by a worker thread of the process, one by one, so publishing keeps their order
+    and never blocks the event loop, even if a queue is full or a big message waits for its consumer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # it's created at the first publishing
+        self._put_executor: T.Optional[ThreadPoolExecutor] = None
+
+    async def run(self) -> None:
+        raise NotImplementedError()
+
+    async def aconsume(
+        self,
+        queue_name: T.Optional[str] = None,
+        clear_all_messages: bool = False,
+        timeout: T.Optional[float] = None,
+    ) -> T.Any:
+        """Awaitable version of RobotProcess.consume()."""
+        queue_name = self._get_consume_queue_name(queue_name)
+        deadline: T.Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+
+        while True:
+            try:
+                return super().consume(queue_name, clear_all_messages, timeout=0.0)
+            except Empty:
+                await self._wait_readable([self._consume_queues[queue_name]], deadline)
+
+    async def aconsume_any(
+        self,
+        queue_names: T.Optional[T.Iterable[str]] = None,
+        timeout: T.Optional[float] = None,
+    ) -> T.Tuple[str, T.Any]:
+        """Awaitable version of RobotProcess.consume_any()."""
+        if queue_names is not None:
+            queue_names = list(queue_names)
+
+        deadline: T.Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+        while True:
+            try:
+                return super().consume_any(queue_names, timeout=0.0)
+            except Empty:
+                names: T.Iterable[str] = (
+                    self._consume_queues.keys() if queue_names is None else queue_names
+                )
+                await self._wait_readable(
+                    [self._consume_queues[q] for q in names], deadline
+                )
+
+    async def aconsume_batch(
+        self,
+        queue_name: T.Optional[str] = None,
+        max_items: int = 100,
+        timeout: T.Optional[float] = None,
+    ) -> T.List[T.Any]:
+        """Awaitable version of RobotProcess.consume_batch()."""
+        queue_name = self._get_consume_queue_name(queue_name)
+        deadline: T.Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+
+        while True:
+            messages: T.List[T.Any] = super().consume_batch(
+                queue_name, max_items, timeout=0.0
+            )
+            if messages:
+                return messages
+
+            try:
+                await self._wait_readable([self._consume_queues[queue_name]], deadline)
+            except Empty:
+                return []
+
+    async def apublish(
+        self,
+        message: T.Any,
+        queue_name: T.Optional[str] = None,
+        clear_on_overflow: bool = False,
+    ) -> None:
+        """Awaitable version of RobotProcess.publish()."""
+        queue_name = self._get_publish_queue_name(queue_name)
+        await self._put_async(message, queue_name, clear_on_overflow)
+
+    async def apublish_many(
+        self,
+        messages: T.Iterable[T.Any],
+        queue_name: T.Optional[str] = None,
+        clear_on_overflow: bool = False,
+    ) -> None:
+        """Awaitable version of RobotProcess.publish_many()."""
+        queue_name = self._get_publish_queue_name(queue_name)
+
+        batch = MessageBatch(messages)
+        if len(batch) > 0:
+            await self._put_async(batch, queue_name, clear_on_overflow)
+
+    async def asend_request(
+        self,
+        message: T.Any,
+        queue_name: T.Optional[str] = None,
+        service_name: str = "",
+        clear_on_overflow: bool = False,
+        timeout: T.Optional[float] = None,
+    ) -> ResponseFuture:
+        """Awaitable version of RobotProcess.send_request()."""
+        request = Request(
+            client_process=self.name,
+            service_name=service_name,
+            data=message,
+            trace=self._trace,
+        )
+        response: ResponseFuture = self._get_response_router().register(
+            request.uid, timeout
+        )
+        await self.apublish(request, queue_name, clear_on_overflow)
+        return response
+
+    async def aget_request(
+        self, queue_name: T.Optional[str] = None, clear_all_messages: bool = False
+    ) -> Request:
+        return await self.aconsume(queue_name, clear_all_messages)
+
+    async def await_response(
+        self, personal_message_uid: UUID, timeout: T.Optional[float] = None
+    ) -> T.Any:
+        """
+        Awaitable version of RobotProcess.wait_response().
+
+        :raise: TimeoutError: if the response didn't come during the timeout or the request has expired
+        """
+        router: ResponseRouter = self._get_response_router()
+        pending = router.get_future(personal_message_uid)
+        future = asyncio.wrap_future(pending)
+
+        try:
+            result: T.Any = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No response for request {personal_message_uid}.")
+
+        router.discard(personal_message_uid)
+        self._adopt_response_trace(pending.trace)
+        return result
+
+    async def arespond_to(self, request: Request) -> None:
+        """Awaitable version of RobotProcess.respond_to()."""
+        request = self._trace_response(request)
+        await self._run_put(self._system_queues[request.client_process].put, request)
+
+    def free_resources(self) -> None:
+        super().free_resources()
+
+        if self._put_executor is not None:
+            self._put_executor.shutdown(wait=False)
+            self._put_executor = None
+
+    async def _put_async(
+        self, message: T.Any, queue_name: str, clear_on_overflow: bool
+    ) -> None:
+        if self._profiling is not None and self._profiling.pending:
+            self._profiling.run_pending()
+
+        # the trace and the sequence number are the current ones, not the ones at the time of putting
+        message = self._wrap_message(message, queue_name)
+        await self._run_put(self._put_wrapped, message, queue_name, clear_on_overflow)
+
+    async def _run_put(self, function: T.Callable, *args) -> None:
+        """Runs a put into queues in the worker thread, even a put into a queue with a place may wait."""
+        if self._put_executor is None:
+            self._put_executor = ThreadPoolExecutor(
+                1, thread_name_prefix=f"{self.name}-put"
+            )
+
+        await asyncio.get_running_loop().run_in_executor(
+            self._put_executor, function, *args
+        )
+
+    async def _wait_readable(
+        self, queues: T.List[T.Any], deadline: T.Optional[float]
+    ) -> None:
+        """
+        Waits until any of the queues may have data to read.
+        The event loop watches the pipes of the queues, queues without a pipe are checked every POLL_INTERVAL.
+
+        :raise: queue.Empty: if the deadline has come
+        """
+        timeout: T.Optional[float] = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise Empty
+
+        readers: T.List[T.Any] = [getattr(q, "_reader", None) for q in queues]
+        if any(r is None for r in readers):
+            timeout = (
+                self.POLL_INTERVAL
+                if timeout is None
+                else min(timeout, self.POLL_INTERVAL)
+            )
+
+        loop = asyncio.get_running_loop()
+        readable: asyncio.Future = loop.create_future()
+
+        def on_readable() -> None:
+            if not readable.done():
+                readable.set_result(None)
+
+        descriptors: T.List[int] = [r.fileno() for r in readers if r is not None]
+        for fd in descriptors:
+            loop.add_reader(fd, on_readable)
+
+        start: float = time.time()
+        started: float = time.perf_counter()
+        try:
+            await asyncio.wait([readable], timeout=timeout)
+        finally:
+            for fd in descriptors:
+                loop.remove_reader(fd)
+
+            duration: float = time.perf_counter() - started
+            if self._spans is not None and duration >= self.MIN_BLOCKED_SPAN:
+                self._spans.record("blocked waiting", start, duration)
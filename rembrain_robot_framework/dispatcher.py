@@ -1,15 +1,39 @@
+import json
 import logging
 import multiprocessing
+import os
 import platform
+import tempfile
 import time
 import typing as T
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from logging.handlers import QueueHandler, QueueListener
+from queue import Empty, Full
 from threading import Thread
 
 from rembrain_robot_framework import utils
 from rembrain_robot_framework.logger.utils import setup_logging
+from rembrain_robot_framework.models.control_message import ControlMessage
+from rembrain_robot_framework.queues import (
+    DiskSpill,
+    LatestValueQueue,
+    OverflowPolicy,
+    PipeQueue,
+    PolicyQueue,
+    Sequencer,
+    SharedMemoryQueue,
+    ThreadQueue,
+)
+from rembrain_robot_framework.services.autoscaler import Autoscaler
+from rembrain_robot_framework.services.profiling_controller import ProfilingController
+from rembrain_robot_framework.services.queue_telemetry import QueueTelemetry
+from rembrain_robot_framework.services.resource_sampler import ResourceSampler
+from rembrain_robot_framework.services.span_recorder import SpanRecorder
 from rembrain_robot_framework.services.watcher import Watcher
 from multiprocessing import Queue, Process
+from multiprocessing.managers import SyncManager
 
 
 class RobotDispatcher:
@@ -21,6 +45,22 @@ class RobotDispatcher:
     """
 
     DEFAULT_QUEUE_SIZE = 50
+    DEFAULT_QUEUE_TYPE = "queue"
+    DEFAULT_QUEUE_POLICY = "fifo"
+    DEFAULT_SPILL_BYTES = 100 * 1024 * 1024
+    # overflow policies that drop messages of a full queue by design
+    DROPPING_POLICIES = (OverflowPolicy.DROP_NEW, OverflowPolicy.DROP_OLDEST)
+    DEFAULT_START_METHOD = "spawn"
+    DEFAULT_READY_TIMEOUT = 60.0
+    READY_POLL_INTERVAL = 0.5
+    TELEMETRY_QUEUE_SIZE = 1000
+    # rates of a queue are zero if its consumer hasn't reported for this number of intervals
+    TELEMETRY_STALE_INTERVALS = 3
+    SPANS_QUEUE_SIZE = 1000
+    # spans of all processes that the dispatcher keeps for export
+    DEFAULT_SPANS_BUFFER = 100000
+    # time for a stopping process to free its resources
+    STOP_TIMEOUT = 10.0
 
     def __init__(
         self,
@@ -51,13 +91,6 @@ class RobotDispatcher:
         elif config and config.get("description"):
             self.project_description = config["description"]
 
-        # It is important that we create our own separate context.
-        # fork() can easily wreck stability,
-        # since we don't know whether the dispatcher will be created after some threads already started.
-        # So to protect the user from deadlocking their processes, all processes are spawned in a separate context
-        self.mp_context = multiprocessing.get_context("spawn")
-        self.manager = self.mp_context.Manager()
-
         self.processes = {} if processes is None else processes
         for name, p in self.processes.items():
             if "consume_queues" not in p:
@@ -76,6 +109,83 @@ class RobotDispatcher:
                 "shared_objects": {},
             }
 
+        # It is important that we create our own separate context.
+        # fork() can easily wreck stability,
+        # since we don't know whether the dispatcher will be created after some threads already started.
+        # So to protect the user from deadlocking their processes, all processes are spawned in a separate context
+        # (or forked from a clean forkserver process, see the 'startup' section of the config)
+        self.mp_context = self._create_mp_context(self.config.get("startup", {}))
+        # it's created at the first use, the Manager server is a separate process
+        self._manager: T.Optional[SyncManager] = None
+
+        # process name => seconds from the launch till it's ready
+        self._startup_timings: T.Dict[str, float] = {}
+        self._ready_queue: T.Optional[Queue] = None
+        if self._get_startup_option("wait_ready", False):
+            self._ready_queue = self.mp_context.Queue()
+
+        # statistics of the queues that processes report if telemetry is turned on: process name => last report
+        self._telemetry_reports: T.Dict[str, dict] = {}
+        self._telemetry_queue: T.Optional[Queue] = None
+        self._telemetry_interval: float = QueueTelemetry.DEFAULT_INTERVAL
+        telemetry: T.Any = self.config.get("telemetry")
+        if telemetry:
+            if isinstance(telemetry, dict):
+                self._telemetry_interval = float(
+                    telemetry.get("interval", self._telemetry_interval)
+                )
+
+            self._telemetry_queue = self.mp_context.Queue(
+                maxsize=self.TELEMETRY_QUEUE_SIZE
+            )
+
+        # spans of all processes if spans are turned on: (process, pid, name, start, duration, thread id, args)
+        self._spans: T.Deque[tuple] = deque()
+        self._spans_queue: T.Optional[Queue] = None
+        self._spans_capacity: int = SpanRecorder.DEFAULT_CAPACITY
+        self._spans_interval: float = SpanRecorder.DEFAULT_INTERVAL
+        spans: T.Any = self.config.get("spans")
+        if spans:
+            buffer: int = self.DEFAULT_SPANS_BUFFER
+            if isinstance(spans, dict):
+                self._spans_capacity = int(spans.get("capacity", self._spans_capacity))
+                self._spans_interval = float(
+                    spans.get("interval", self._spans_interval)
+                )
+                buffer = int(spans.get("buffer", buffer))
+
+            self._spans = deque(maxlen=buffer)
+            self._spans_queue = self.mp_context.Queue(maxsize=self.SPANS_QUEUE_SIZE)
+
+        # process name => number of restarts of the process after exceptions, processes count them
+        self._restart_counters: T.Dict[str, T.Any] = {}
+        # it's created at the first sampling of resources of the processes
+        self._resource_sampler: T.Optional[ResourceSampler] = None
+        # with 'resources' in config the resources are logged every interval
+        self._resources_interval: T.Optional[float] = None
+        self._resources_logged_at: float = 0.0
+        resources: T.Any = self.config.get("resources")
+        if resources:
+            self._resources_interval = ResourceSampler.DEFAULT_INTERVAL
+            if isinstance(resources, dict):
+                self._resources_interval = float(
+                    resources.get("interval", self._resources_interval)
+                )
+
+        # with 'profiling' in config processes take control commands (profilers, memory snapshots, log level)
+        # and write their results to this directory
+        self._profiling_dir: T.Optional[str] = None
+        profiling: T.Any = self.config.get("profiling")
+        if profiling:
+            self._profiling_dir = ProfilingController.DEFAULT_OUTPUT_DIR
+            if isinstance(profiling, dict):
+                self._profiling_dir = str(
+                    profiling.get("output_dir", self._profiling_dir)
+                )
+
+        # numbers of dropped messages that are already reported: (process name, queue name) => number
+        self._reported_drops: T.Dict[T.Tuple[str, str], int] = {}
+
         self.log_queue: T.Optional[Queue] = None
         self._log_listener: T.Optional[QueueListener] = None
         self.log: T.Optional[logging.Logger] = None
@@ -83,11 +193,26 @@ class RobotDispatcher:
 
         self.log.info("RobotHost is configuring processes.")
 
+        if self._resources_interval is not None and not ResourceSampler.is_supported():
+            self.log.warning(
+                "Resources of processes can't be sampled on this system, /proc is required."
+            )
+            self._resources_interval = None
+
         if "processes" not in self.config or not isinstance(
             self.config["processes"], dict
         ):
             raise Exception("'Config' params are incorrect. Please, check config file.")
 
+        # processes with an import path of their class in config don't need to be passed
+        for proc_name, proc_params in self.config["processes"].items():
+            if (
+                proc_name not in self.processes
+                and proc_params
+                and isinstance(proc_params.get("process_class"), str)
+            ):
+                self.processes[proc_name] = {"consume_queues": {}, "publish_queues": {}}
+
         # compare processes and config
         if len(self.processes) != len(self.config["processes"]):
             raise Exception(
@@ -109,6 +234,16 @@ class RobotDispatcher:
                     f"Process '{proc_name}' has the same queue for consume and publish."
                 )
 
+        self._validate_process_classes()
+
+        # processes that run as threads of one OS process: process name => group name
+        self._process_groups: T.Dict[str, str] = {
+            proc_name: str(proc_params["group"])
+            for proc_name, proc_params in self.config["processes"].items()
+            if proc_params and proc_params.get("group") is not None
+        }
+        self._fuse_chains()
+
         # create queues
         consume_queues = {}  # consume from queues
         publish_queues = {}  # publish to queues
@@ -139,7 +274,7 @@ class RobotDispatcher:
 
             # copy other arguments from yaml to a file
             for key in process_params:
-                if key not in ("publish", "consume"):
+                if key not in ("publish", "consume", "group", "fusible"):
                     self.processes[process_name][key] = process_params[key]
 
         for queue_name, bind_processes in consume_queues.items():
@@ -150,14 +285,18 @@ class RobotDispatcher:
                     )
                 )
 
-                queue = self.mp_context.Queue(maxsize=queue_size)
-                self.processes[process]["consume_queues"][queue_name] = queue
-
                 if queue_name not in publish_queues:
                     raise Exception(
                         f"A process {processes} consumes from a queue {queue_name}, but no publish to it."
                     )
 
+                if self._is_group_edge(queue_name, process, publish_queues[queue_name]):
+                    queue = ThreadQueue(queue_size)
+                else:
+                    queue = self._create_queue(queue_name, queue_size)
+
+                self.processes[process]["consume_queues"][queue_name] = queue
+
                 for process_ in publish_queues[queue_name]:
                     if queue_name in self.processes[process_]["publish_queues"]:
                         self.processes[process_]["publish_queues"][queue_name].append(
@@ -166,21 +305,110 @@ class RobotDispatcher:
                     else:
                         self.processes[process_]["publish_queues"][queue_name] = [queue]
 
+        # autoscaled process name => its autoscaler
+        self._autoscalers: T.Dict[str, Autoscaler] = {}
+        # replicas that are stopped by autoscaling: replica name => its params
+        self._idle_replicas: T.Dict[str, dict] = {}
+        self._expand_replicas()
+
         # shared objects
         if "shared_objects" in self.config and self.config["shared_objects"]:
             self.shared_objects = {
-                name: utils.generate(obj, self.manager, self.mp_context)
+                name: self._generate_shared_object(obj)
                 for name, obj in self.config["shared_objects"].items()
             }
 
         # system processes queues(dict): process_name (key) => personal process queue (value)
         self.system_queues = {
             p: self.mp_context.Queue(maxsize=self.DEFAULT_QUEUE_SIZE)
-            for p in self.processes
+            for p in [*self.processes, *self._idle_replicas]
         }
 
         self._set_watcher()
 
+    def _expand_replicas(self) -> None:
+        """
+        Replaces every process with 'replicas: N' by N processes named '<name>#<i>' that share its consume queues,
+        so they compete for messages instead of getting a copy of each.
+        With 'preserve_order: true' consumers of the replicas get their messages in the order of the input messages.
+        A process with 'max_replicas' gets max_replicas replicas, but only 'min_replicas' of them are started,
+        the others are started by autoscale().
+        """
+        for process_name, params in list(self.processes.items()):
+            replicas = int(params.pop("replicas", 1))
+            preserve_order = bool(params.pop("preserve_order", False))
+            if replicas < 1:
+                raise utils.ConfigurationError(
+                    f"Process {process_name} must have at least 1 replica."
+                )
+
+            autoscaler: T.Optional[Autoscaler] = None
+            if "max_replicas" in params:
+                if len(params["consume_queues"]) == 0:
+                    raise utils.ConfigurationError(
+                        f"Process {process_name} with 'max_replicas' must consume some queue."
+                    )
+
+                try:
+                    autoscaler = Autoscaler(
+                        int(params.pop("min_replicas", 1)),
+                        int(params.pop("max_replicas")),
+                        float(params.pop("target_occupancy", 0.5)),
+                    )
+                except ValueError as e:
+                    raise utils.ConfigurationError(f"Process {process_name}: {e}")
+
+                replicas = autoscaler.max_replicas
+            elif "min_replicas" in params or "target_occupancy" in params:
+                raise utils.ConfigurationError(
+                    f"Process {process_name} must have 'max_replicas' for autoscaling."
+                )
+
+            if replicas == 1:
+                continue
+
+            if process_name in self._process_groups:
+                raise utils.ConfigurationError(
+                    f"Process {process_name} in a group can't have replicas."
+                )
+
+            if preserve_order:
+                if len(params["consume_queues"]) != 1:
+                    raise utils.ConfigurationError(
+                        f"Process {process_name} with 'preserve_order' must consume exactly one queue."
+                    )
+
+                # consumers wait for a message or an end marker of every input message, so they must not be lost
+                for queue_name, queues in params["publish_queues"].items():
+                    if any(
+                        isinstance(q, LatestValueQueue)
+                        or (
+                            isinstance(q, PolicyQueue)
+                            and q.policy in self.DROPPING_POLICIES
+                        )
+                        for q in queues
+                    ):
+                        raise utils.ConfigurationError(
+                            f"Process {process_name} with 'preserve_order' can't publish to queue {queue_name}, "
+                            f"which drops messages by its policy."
+                        )
+
+                params["sequencer"] = Sequencer(process_name, self.mp_context)
+
+            del self.processes[process_name]
+            for i in range(replicas):
+                self.processes[f"{process_name}#{i}"] = {
+                    **params,
+                    "consume_queues": dict(params["consume_queues"]),
+                    "publish_queues": dict(params["publish_queues"]),
+                }
+
+            if autoscaler is not None:
+                self._autoscalers[process_name] = autoscaler
+                for i in range(autoscaler.min_replicas, replicas):
+                    replica = f"{process_name}#{i}"
+                    self._idle_replicas[replica] = self.processes.pop(replica)
+
     def _set_watcher(self):
         # for heartbeat
         self.watcher_queue = None
@@ -190,11 +418,63 @@ class RobotDispatcher:
             self.watcher = Watcher(self.watcher_queue)
             Thread(target=self.watcher.notify, daemon=True).start()
 
+    @property
+    def manager(self) -> SyncManager:
+        if self._manager is None:
+            self._manager = self.mp_context.Manager()
+
+        return self._manager
+
     def start_processes(self) -> None:
+        """
+        Starts all processes. With 'parallel: true' in the 'startup' section of the config they are launched
+        at once from several threads, with 'wait_ready: true' it returns only when all of them are created.
+        """
+        launches: T.List[T.Tuple[T.List[str], T.Callable[[], None]]] = []
         for process_name in self.processes.keys():
-            self._run_process(process_name)
-            proc = self.process_pool[process_name]
-            self.log.info(f"Process {process_name} on PID {proc.pid} was started")
+            # it's already running or it's started with its group
+            if process_name in self.process_pool or any(
+                process_name in names for names, _ in launches
+            ):
+                continue
+
+            if process_name in self._process_groups:
+                group: str = self._process_groups[process_name]
+                launches.append(
+                    (self._get_group_members(group), partial(self._run_group, group))
+                )
+            else:
+                launches.append(
+                    ([process_name], partial(self._run_process, process_name))
+                )
+
+        started_at: float = time.time()
+        if self._get_startup_option("parallel", False):
+            with ThreadPoolExecutor(
+                len(launches) or 1, thread_name_prefix="ProcessLauncher"
+            ) as executor:
+                for future in [executor.submit(launch) for _, launch in launches]:
+                    future.result()
+        else:
+            for _, launch in launches:
+                launch()
+
+        for process_names, _ in launches:
+            for process_name in process_names:
+                proc = self.process_pool[process_name]
+                self.log.info(f"Process {process_name} on PID {proc.pid} was started")
+
+        if self._ready_queue is not None:
+            self._wait_ready(
+                [p for process_names, _ in launches for p in process_names], started_at
+            )
+
+    def get_startup_timings(self) -> T.Dict[str, float]:
+        """
+        Returns seconds from the launch of the processes till they are created (process name => seconds).
+        It's filled by start_processes() with 'wait_ready: true' in the 'startup' section of the config.
+        """
+        return dict(self._startup_timings)
 
     def add_process(
         self,
@@ -230,9 +510,7 @@ class RobotDispatcher:
         if object_name in self.shared_objects.keys():
             raise Exception(f"Shared object {object_name} already exists.")
 
-        self.shared_objects[object_name] = utils.generate(
-            object_type, self.manager, self.mp_context
-        )
+        self.shared_objects[object_name] = self._generate_shared_object(object_type)
 
     # todo make shared objects deprecated
     def del_shared_object(self, object_name: str) -> None:
@@ -242,19 +520,55 @@ class RobotDispatcher:
 
         del self.shared_objects[object_name]
 
-    def stop_process(self, process_name: str) -> None:
+    def stop_process(self, process_name: str, wait: bool = True) -> None:
+        """
+        Stops the process. If the process is in a group, the whole group is stopped.
+        The process is killed if it doesn't exit during STOP_TIMEOUT.
+
+        :param process_name: Name of the process.
+        :param bool wait: Wait until the process exits, otherwise it's waited for in a thread.
+        """
         if process_name not in self.process_pool.keys():
             self.log.error(f"Process {process_name} is not running.")
             return
 
+        group: T.Optional[str] = self._process_groups.get(process_name)
+        if group is not None:
+            self.log.warning(
+                f"Process {process_name} runs in group {group}, the group is stopped."
+            )
+            for member in self._get_group_members(group):
+                if member != process_name:
+                    del self.process_pool[member]
+                    del self.processes[member]
+
         process: Process = self.process_pool[process_name]
         if process.is_alive():
             process.terminate()
-            process.join()
+
+            if wait:
+                self._join_stopped_process(process_name, process)
+            else:
+                Thread(
+                    target=self._join_stopped_process,
+                    args=(process_name, process),
+                    name=f"stop:{process_name}",
+                    daemon=True,
+                ).start()
 
         del self.process_pool[process_name]
         del self.processes[process_name]
 
+    def _join_stopped_process(self, process_name: str, process: Process) -> None:
+        process.join(self.STOP_TIMEOUT)
+
+        if process.is_alive():
+            self.log.warning(
+                f"Process {process_name} didn't stop in time, it is killed."
+            )
+            process.kill()
+            process.join()
+
     def check_queues_overflow(self) -> bool:
         """
         Check queues on overflowing - at least if one queue is overflow - return True.
@@ -270,19 +584,29 @@ class RobotDispatcher:
 
         for p_name, process in self.processes.items():
             for q_name, queue in process["consume_queues"].items():
+                # queues that keep only the newest message can't overflow
+                if self.get_queue_policy(q_name) == "latest":
+                    continue
+
                 q_size: int = queue.qsize()
                 if hasattr(queue, "_maxsize"):
                     q_maxsize = queue._maxsize
                 else:
                     q_maxsize = self.get_queue_max_size(q_name)
 
-                if q_maxsize - q_size <= int(q_maxsize * 0.1):
+                if q_maxsize - q_size <= int(
+                    q_maxsize * 0.1
+                ) or self._is_bytes_overflow(queue):
                     self.log.warning(
-                        f"Consume queue {q_name} of process {p_name} has reached {q_size} messages."
+                        f"Consume queue {q_name} of process {p_name} has reached {q_size} messages"
+                        f"{self._format_queue_bytes(queue)}."
                     )
                     is_overflow = True
 
             for q_name, queues in process["publish_queues"].items():
+                if self.get_queue_policy(q_name) == "latest":
+                    continue
+
                 for q in queues:
                     q_size: int = q.qsize()
                     if hasattr(q, "_maxsize"):
@@ -290,17 +614,527 @@ class RobotDispatcher:
                     else:
                         q_maxsize = self.get_queue_max_size(q_name)
 
-                    if q_maxsize - q_size <= int(q_maxsize * 0.1):
+                    if q_maxsize - q_size <= int(
+                        q_maxsize * 0.1
+                    ) or self._is_bytes_overflow(q):
                         self.log.warning(
-                            f"Publish queue {q_name} of process {p_name} has reached {q_size} messages."
+                            f"Publish queue {q_name} of process {p_name} has reached {q_size} messages"
+                            f"{self._format_queue_bytes(q)}."
                         )
                         is_overflow = True
 
+        self._report_dropped_messages()
+
         if is_overflow:
             time.sleep(5)
 
         return is_overflow
 
+    def autoscale(self) -> None:
+        """
+        Starts or stops replicas of the processes with 'max_replicas' by the occupancy of their consume queues.
+        The highest occupancy of the queues is taken. It's called by run() every check of the queues.
+        """
+        if platform.system() == "Darwin":
+            return
+
+        for process_name, autoscaler in self._autoscalers.items():
+            # the first replica always runs
+            consume_queues: T.Dict[str, T.Any] = self.processes[f"{process_name}#0"][
+                "consume_queues"
+            ]
+            occupancy: float = max(
+                (
+                    self._get_queue_occupancy(q_name, queue)
+                    for q_name, queue in consume_queues.items()
+                    if self.get_queue_policy(q_name) != "latest"
+                ),
+                default=0.0,
+            )
+
+            change: int = autoscaler.update(occupancy)
+            replicas: T.List[str] = [
+                f"{process_name}#{i}" for i in range(autoscaler.max_replicas)
+            ]
+
+            if change > 0:
+                replica: str = next(r for r in replicas if r in self._idle_replicas)
+                self.processes[replica] = self._idle_replicas.pop(replica)
+                self._run_process(replica)
+                self.log.info(
+                    f"Replica {replica} was started, occupancy of its queues is {occupancy:.0%}."
+                )
+
+            elif change < 0:
+                replica: str = next(
+                    r for r in reversed(replicas) if r in self.processes
+                )
+                params: dict = self.processes[replica]
+                # run() doesn't wait while the replica frees its resources
+                self.stop_process(replica, wait=False)
+                self._idle_replicas[replica] = params
+                self.log.info(
+                    f"Replica {replica} was stopped, occupancy of its queues is {occupancy:.0%}."
+                )
+
+    def _get_queue_occupancy(self, queue_name: str, queue: T.Any) -> float:
+        return queue.qsize() / self._get_queue_max_size(queue_name, queue)
+
+    def _get_queue_max_size(self, queue_name: str, queue: T.Any) -> int:
+        if hasattr(queue, "_maxsize"):
+            return queue._maxsize
+
+        return self.get_queue_max_size(queue_name)
+
+    @staticmethod
+    def _is_bytes_overflow(queue: T.Any) -> bool:
+        if not isinstance(queue, PolicyQueue) or queue.max_bytes is None:
+            return False
+
+        return queue.max_bytes - queue.nbytes <= int(queue.max_bytes * 0.1)
+
+    @staticmethod
+    def _format_queue_bytes(queue: T.Any) -> str:
+        if not isinstance(queue, PolicyQueue) or queue.max_bytes is None:
+            return ""
+
+        return f" ({queue.nbytes} of {queue.max_bytes} bytes)"
+
+    def _create_queue(self, queue_name: str, queue_size: int) -> T.Any:
+        """
+        Creates a queue of the type set for queue_name in the 'queues_types' section of config.
+        Possible types:
+            - queue: multiprocessing queue (default)
+            - pipe: pipe for one publishing and one consuming process, for small messages that need low latency
+            - shared_memory:<slot size in bytes>: queue that passes numpy arrays through shared memory slots
+        The 'queue_policies' section sets how a queue keeps messages:
+            - fifo: all messages are kept in order (default)
+            - latest: only the newest message is kept, a new message overwrites it
+        The 'overflow_policies' section sets what to do when a queue is full, see _apply_overflow_policy().
+        The 'queues_max_bytes' section limits the total size of the serialized messages in a queue.
+        """
+        queue_type = str(
+            self.config.get("queues_types", {}).get(queue_name, self.DEFAULT_QUEUE_TYPE)
+        )
+
+        queue_policy = self.get_queue_policy(queue_name)
+        overflow_policy = self.config.get("overflow_policies", {}).get(queue_name)
+        max_bytes = self.get_queue_max_bytes(queue_name)
+        if queue_policy == "latest":
+            if queue_type != self.DEFAULT_QUEUE_TYPE:
+                raise utils.ConfigurationError(
+                    f"Queue {queue_name} with 'latest' policy can't have type '{queue_type}'."
+                )
+
+            if overflow_policy is not None:
+                raise utils.ConfigurationError(
+                    f"Queue {queue_name} with 'latest' policy can't have an overflow policy."
+                )
+
+            if max_bytes is not None:
+                raise utils.ConfigurationError(
+                    f"Queue {queue_name} with 'latest' policy can't have max bytes."
+                )
+
+            return LatestValueQueue(self.mp_context)
+
+        if queue_policy != self.DEFAULT_QUEUE_POLICY:
+            raise utils.ConfigurationError(
+                f"Queue {queue_name} has unknown policy '{queue_policy}'."
+            )
+
+        if queue_type == "queue":
+            queue = self.mp_context.Queue(maxsize=queue_size)
+        elif queue_type == "pipe":
+            queue = PipeQueue(queue_size, self.mp_context)
+        elif queue_type.startswith("shared_memory:"):
+            # memory of such queue is already limited by its slots
+            if max_bytes is not None:
+                raise utils.ConfigurationError(
+                    f"Queue {queue_name} of type '{queue_type}' can't have max bytes."
+                )
+
+            slot_size = int(queue_type.split(":")[1])
+            queue = SharedMemoryQueue(slot_size, queue_size, self.mp_context)
+        else:
+            raise utils.ConfigurationError(
+                f"Queue {queue_name} has unknown type '{queue_type}'."
+            )
+
+        if overflow_policy is None and max_bytes is None:
+            return queue
+
+        return self._apply_overflow_policy(
+            queue_name, queue, overflow_policy, max_bytes
+        )
+
+    def _apply_overflow_policy(
+        self,
+        queue_name: str,
+        queue: T.Any,
+        overflow_policy: T.Union[str, dict, None],
+        max_bytes: T.Optional[int],
+    ) -> PolicyQueue:
+        """
+        Wraps the queue to handle its overflow as it's set in the 'overflow_policies' section of config.
+        The queue is full if it has max_bytes of serialized messages or its max number of messages.
+        The default policy is 'block'.
+        The policy is either a name or a dict with keys:
+            - policy: block, drop_new, drop_oldest or spill
+            - timeout: max time in seconds to wait for a place with the 'block' policy
+            - directory: directory for the 'spill' policy, a temporary one is created by default
+            - max_bytes: max size of the 'spill' buffer
+        """
+        if overflow_policy is None:
+            overflow_policy = {"policy": OverflowPolicy.BLOCK}
+        elif isinstance(overflow_policy, str):
+            overflow_policy = {"policy": overflow_policy}
+
+        try:
+            policy = OverflowPolicy(overflow_policy.get("policy"))
+        except ValueError:
+            raise utils.ConfigurationError(
+                f"Queue {queue_name} has unknown overflow policy '{overflow_policy.get('policy')}'."
+            )
+
+        spill: T.Optional[DiskSpill] = None
+        if policy == OverflowPolicy.SPILL:
+            directory: T.Optional[str] = overflow_policy.get("directory")
+            if directory is None:
+                directory = tempfile.mkdtemp(prefix=f"{queue_name}_")
+            else:
+                os.makedirs(directory, exist_ok=True)
+
+            spill_bytes = int(
+                overflow_policy.get("max_bytes", self.DEFAULT_SPILL_BYTES)
+            )
+            spill = DiskSpill(directory, spill_bytes, self.mp_context)
+
+        return PolicyQueue(
+            queue,
+            policy,
+            self.mp_context,
+            overflow_policy.get("timeout"),
+            spill,
+            max_bytes,
+        )
+
+    def get_dropped_messages(self) -> T.Dict[str, T.Dict[str, int]]:
+        """
+        Returns numbers of messages dropped by the overflow policies of the consume queues:
+        {process name: {queue name: number}}
+        """
+        result: T.Dict[str, T.Dict[str, int]] = {}
+        for p_name, process in self.processes.items():
+            for q_name, queue in process["consume_queues"].items():
+                if isinstance(queue, PolicyQueue):
+                    result.setdefault(p_name, {})[q_name] = queue.dropped
+
+        return result
+
+    def get_queues_bytes(self) -> T.Dict[str, T.Dict[str, int]]:
+        """
+        Returns sizes of the serialized messages in flight in the consume queues that have max bytes:
+        {process name: {queue name: bytes}}
+        """
+        result: T.Dict[str, T.Dict[str, int]] = {}
+        for p_name, process in self.processes.items():
+            for q_name, queue in process["consume_queues"].items():
+                if isinstance(queue, PolicyQueue) and queue.max_bytes is not None:
+                    result.setdefault(p_name, {})[q_name] = queue.nbytes
+
+        return result
+
+    def queue_stats(self) -> T.Dict[str, T.Dict[str, dict]]:
+        """
+        Returns statistics of the consume queues: {process name: {queue name: stats}}
+        Stats:
+            - size: number of messages in the queue now, None if the system doesn't support it (Darwin)
+            - max_size: max number of messages in the queue
+            - dropped: messages dropped by the overflow policy or evicted by publishing with clear_on_overflow
+        With 'telemetry' turned on in config also:
+            - messages, bytes: number and size of the consumed messages in total
+            - messages_per_second, bytes_per_second: throughput during the last telemetry interval
+            - delay_p50, delay_p99: time (in seconds) the messages spent in the queue during the last interval
+        Sizes of messages are known only for queues that pickle them, in-memory and shared memory queues have 0 bytes.
+        """
+        self._collect_telemetry()
+        dropped: T.Dict[str, T.Dict[str, int]] = self.get_dropped_messages()
+        evicted: T.Dict[int, int] = self._get_evicted_messages()
+        stale_time: float = (
+            time.time() - self.TELEMETRY_STALE_INTERVALS * self._telemetry_interval
+        )
+
+        result: T.Dict[str, T.Dict[str, dict]] = {}
+        for p_name, process in self.processes.items():
+            report: dict = self._telemetry_reports.get(p_name, {})
+
+            for q_name, queue in process["consume_queues"].items():
+                stats: dict = {
+                    "size": self._get_queue_size(queue),
+                    "max_size": self._get_queue_max_size(q_name, queue),
+                    "dropped": dropped.get(p_name, {}).get(q_name, 0)
+                    + evicted.get(id(queue), 0),
+                }
+
+                consumed: T.Optional[dict] = report.get("consumed", {}).get(q_name)
+                if consumed is not None:
+                    stats.update(consumed)
+
+                    # the consumer has stopped getting messages
+                    if report["reported_at"] < stale_time:
+                        stats.update(
+                            messages_per_second=0.0,
+                            bytes_per_second=0.0,
+                            delay_p50=None,
+                            delay_p99=None,
+                        )
+
+                result.setdefault(p_name, {})[q_name] = stats
+
+        return result
+
+    def _collect_telemetry(self) -> None:
+        if self._telemetry_queue is None:
+            return
+
+        try:
+            while True:
+                report: dict = self._telemetry_queue.get_nowait()
+                self._telemetry_reports[report["process"]] = report
+        except Empty:
+            pass
+
+    def _get_evicted_messages(self) -> T.Dict[int, int]:
+        """Returns numbers of messages that publishers evicted with clear_on_overflow: id of the queue => number."""
+        result: T.Dict[int, int] = {}
+        for p_name, report in self._telemetry_reports.items():
+            if p_name not in self.processes:
+                continue
+
+            for q_name, counts in report["evicted"].items():
+                queues: T.List[T.Any] = self.processes[p_name]["publish_queues"].get(
+                    q_name, []
+                )
+                for index, evicted in counts.items():
+                    if index < len(queues):
+                        result[id(queues[index])] = (
+                            result.get(id(queues[index]), 0) + evicted
+                        )
+
+        return result
+
+    def export_chrome_trace(self, path: str, window: T.Optional[float] = None) -> int:
+        """
+        Writes spans of the processes as a Chrome trace (JSON), which can be opened in Perfetto or chrome://tracing.
+        Every process is a row of the timeline, threads of the process are its tracks.
+        It requires 'spans' turned on in config.
+
+        :param str path: Path of the file to write.
+        :param window: Export only spans that ended during the last 'window' seconds. If it's None - all kept spans.
+        :type window: Optional[float]
+        :return: Number of exported spans.
+        """
+        self._collect_spans()
+        since: float = -1.0 if window is None else time.time() - window
+
+        # processes of a group share the OS process, so rows of the timeline are numbered by process names
+        pids: T.Dict[str, int] = {}
+        events: T.List[dict] = []
+        for p_name, os_pid, name, start, duration, thread_id, args in self._spans:
+            if start + duration < since:
+                continue
+
+            if p_name not in pids:
+                pids[p_name] = len(pids) + 1
+                events.append(
+                    {
+                        "name": "process_name",
+                        "ph": "M",
+                        "pid": pids[p_name],
+                        "args": {"name": f"{p_name} ({os_pid})"},
+                    }
+                )
+
+            event: dict = {
+                "name": name,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": pids[p_name],
+                "tid": thread_id,
+            }
+            if args:
+                event["args"] = args
+
+            events.append(event)
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+        return sum(1 for e in events if e["ph"] == "X")
+
+    def _collect_spans(self) -> None:
+        if self._spans_queue is None:
+            return
+
+        try:
+            while True:
+                report: dict = self._spans_queue.get_nowait()
+                self._spans.extend(
+                    (report["process"], report["pid"], *span)
+                    for span in report["spans"]
+                )
+        except Empty:
+            pass
+
+    def resource_stats(self) -> T.Dict[str, dict]:
+        """
+        Returns resource usage of the running processes from /proc (Linux only): {process name: stats}
+        Stats:
+            - pid
+            - cpu_percent: CPU usage since the previous call (None at the first call), > 100 for several threads
+            - rss_bytes: resident memory
+            - threads: number of threads
+            - voluntary_ctxt_switches, involuntary_ctxt_switches: context switches of all threads in total,
+              growing involuntary ones mean that the node is oversubscribed
+            - migrations: moves of threads between CPUs
+            - restarts: restarts of the process after exceptions
+        Processes of a group share one OS process, so they have the same stats.
+        With 'resources' in config the stats are also logged every interval.
+        """
+        if not ResourceSampler.is_supported():
+            return {}
+
+        if self._resource_sampler is None:
+            self._resource_sampler = ResourceSampler()
+
+        pids: T.Dict[str, int] = {
+            name: process.pid
+            for name, process in self.process_pool.items()
+            if process.pid is not None
+        }
+
+        stats: T.Dict[str, dict] = self._resource_sampler.sample(pids)
+        for name, process_stats in stats.items():
+            counter: T.Any = self._restart_counters.get(name)
+            process_stats["restarts"] = 0 if counter is None else counter.value
+
+        return stats
+
+    def _log_resources(self) -> None:
+        if (
+            self._resources_interval is None
+            or time.monotonic() - self._resources_logged_at < self._resources_interval
+        ):
+            return
+
+        self._resources_logged_at = time.monotonic()
+        stats: T.Dict[str, dict] = self.resource_stats()
+        # it's one record, so log handlers get all processes at once in the 'resources' field
+        self.log.info(
+            f"Resources of processes: {json.dumps(stats)}", extra={"resources": stats}
+        )
+
+    def start_profiler(
+        self,
+        process_name: str,
+        profiler: str = "stack",
+        duration: T.Optional[float] = None,
+    ) -> None:
+        """
+        Starts a profiler in the running process, its result is written to the 'profiling' directory when it stops.
+        It requires 'profiling' turned on in config.
+
+        :param str process_name: Name of the process.
+        :param str profiler: 'stack' - sampling profiler of all threads (collapsed stacks for flamegraphs),
+        'cprofile' - cProfile of the thread that runs run(), it starts at the next consume or publish of the process.
+        :param duration: Seconds after which the profiler stops. If it's None - it works until stop_profiler().
+        :type duration: Optional[float]
+        """
+        self._check_profiler(profiler)
+        self._send_control(
+            process_name,
+            ControlMessage(
+                command=ControlMessage.START_PROFILER,
+                profiler=profiler,
+                duration=duration,
+            ),
+        )
+
+    def stop_profiler(self, process_name: str, profiler: str = "stack") -> None:
+        """Stops the profiler in the running process and writes its result."""
+        self._check_profiler(profiler)
+        self._send_control(
+            process_name,
+            ControlMessage(command=ControlMessage.STOP_PROFILER, profiler=profiler),
+        )
+
+    def take_memory_snapshot(
+        self, process_name: str, duration: T.Optional[float] = None
+    ) -> None:
+        """
+        Writes a tracemalloc snapshot of the running process to the 'profiling' directory.
+        If tracemalloc isn't started in the process, it traces allocations during the duration (10 s by default).
+
+        :param str process_name: Name of the process.
+        :param duration: Seconds to trace allocations before the snapshot.
+        :type duration: Optional[float]
+        """
+        self._send_control(
+            process_name,
+            ControlMessage(command=ControlMessage.MEMORY_SNAPSHOT, duration=duration),
+        )
+
+    def set_log_level(self, process_name: str, level: str) -> None:
+        """Sets the level of the root logger of the running process (of all processes of its group)."""
+        self._send_control(
+            process_name,
+            ControlMessage(command=ControlMessage.SET_LOG_LEVEL, level=level),
+        )
+
+    @staticmethod
+    def _check_profiler(profiler: str) -> None:
+        if profiler not in ControlMessage.PROFILERS:
+            raise ValueError(
+                f"Unknown profiler: {profiler}. Profilers: {', '.join(ControlMessage.PROFILERS)}."
+            )
+
+    def _send_control(self, process_name: str, message: ControlMessage) -> None:
+        if self._profiling_dir is None:
+            raise utils.ConfigurationError(
+                "Control commands require 'profiling' in config."
+            )
+
+        if process_name not in self.process_pool:
+            self.log.error(f"Process {process_name} is not running.")
+            return
+
+        try:
+            self.system_queues[process_name].put_nowait(message)
+        except Full:
+            self.log.warning(
+                f"System queue of process {process_name} is full, {message.command} is dropped."
+            )
+
+    @staticmethod
+    def _get_queue_size(queue: T.Any) -> T.Optional[int]:
+        try:
+            return queue.qsize()
+        except NotImplementedError:
+            return None
+
+    def _report_dropped_messages(self) -> None:
+        for p_name, queues in self.get_dropped_messages().items():
+            for q_name, dropped in queues.items():
+                new_drops: int = dropped - self._reported_drops.get((p_name, q_name), 0)
+                if new_drops > 0:
+                    self.log.warning(
+                        f"{new_drops} messages were dropped from consume queue {q_name} of process {p_name}, "
+                        f"{dropped} in total."
+                    )
+                    self._reported_drops[(p_name, q_name)] = dropped
+
     def _collect_queue_sizes(self) -> T.Dict[str, int]:
         """
         Generates a dictionary of {queue_name: max_size}
@@ -333,6 +1167,17 @@ class RobotDispatcher:
     def get_queue_max_size(self, queue_name: str) -> int:
         return self._max_queue_sizes.get(queue_name, self.DEFAULT_QUEUE_SIZE)
 
+    def get_queue_max_bytes(self, queue_name: str) -> T.Optional[int]:
+        max_bytes = self.config.get("queues_max_bytes", {}).get(queue_name)
+        return None if max_bytes is None else int(max_bytes)
+
+    def get_queue_policy(self, queue_name: str) -> str:
+        return str(
+            self.config.get("queue_policies", {}).get(
+                queue_name, self.DEFAULT_QUEUE_POLICY
+            )
+        )
+
     def run(self, shared_stop_run: T.Any = None) -> None:
         if platform.system() == "Darwin":
             self.log.warning("Checking of queue sizes on this system is not supported.")
@@ -342,26 +1187,302 @@ class RobotDispatcher:
                 break
 
             self.check_queues_overflow()
+            self.autoscale()
+            self._drain_ready_queue()
+            self._collect_telemetry()
+            self._collect_spans()
+            self._log_resources()
             time.sleep(2)
 
+    def _wait_ready(self, process_names: T.List[str], started_at: float) -> None:
+        """
+        Waits until the processes are created and ready to get messages.
+
+        :raise: TimeoutError: if some processes are not ready during 'ready_timeout' of the config
+        """
+        timeout = float(
+            self._get_startup_option("ready_timeout", self.DEFAULT_READY_TIMEOUT)
+        )
+        deadline: float = time.monotonic() + timeout
+        waiting: T.Set[str] = set(process_names)
+
+        while waiting:
+            try:
+                process_name, ready_at, init_time = self._ready_queue.get(
+                    timeout=self.READY_POLL_INTERVAL
+                )
+            except Empty:
+                dead: T.List[str] = [
+                    p for p in waiting if not self.process_pool[p].is_alive()
+                ]
+                if dead:
+                    raise RuntimeError(
+                        f"Processes {sorted(dead)} exited before they were ready."
+                    )
+
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        f"Processes {sorted(waiting)} are not ready after {timeout} s."
+                    )
+
+                continue
+
+            if process_name in waiting:
+                waiting.remove(process_name)
+                self._startup_timings[process_name] = ready_at - started_at
+                self.log.info(
+                    f"Process {process_name} is ready after {ready_at - started_at:.2f} s "
+                    f"(__init__ took {init_time:.2f} s)."
+                )
+
+        self.log.info(
+            f"All processes are ready after {time.time() - started_at:.2f} s."
+        )
+
+    def _drain_ready_queue(self) -> None:
+        """Processes signal 'ready' after every restart too, the signals are read so the queue doesn't grow."""
+        if self._ready_queue is None:
+            return
+
+        try:
+            while True:
+                self._ready_queue.get_nowait()
+        except Empty:
+            pass
+
     def _run_process(self, proc_name: str, **kwargs) -> None:
         process = self.mp_context.Process(
             target=utils.start_process,
             daemon=True,
+            kwargs=self._get_process_kwargs(proc_name, **kwargs),
+        )
+        process.start()
+        self.process_pool[proc_name] = process
+
+    def _run_group(self, group: str) -> None:
+        members: T.List[str] = self._get_group_members(group)
+
+        # all members are pickled at once, so their in-memory queues stay shared
+        process = self.mp_context.Process(
+            target=utils.start_group,
+            daemon=True,
             kwargs={
-                "name": proc_name,
-                "in_cluster": self.in_cluster,
-                "shared_objects": self.shared_objects,
-                "project_description": self.project_description,
+                "members": {m: self._get_process_kwargs(m) for m in members},
                 "logging_queue": self.log_queue,
-                "system_queues": self.system_queues,
-                "watcher_queue": self.watcher_queue,
-                **self.processes[proc_name],
-                **kwargs,
             },
         )
         process.start()
-        self.process_pool[proc_name] = process
+
+        for member in members:
+            self.process_pool[member] = process
+
+    def _get_process_kwargs(self, proc_name: str, **kwargs) -> dict:
+        return {
+            "name": proc_name,
+            "in_cluster": self.in_cluster,
+            "shared_objects": self.shared_objects,
+            "project_description": self.project_description,
+            "logging_queue": self.log_queue,
+            "system_queues": self.system_queues,
+            "watcher_queue": self.watcher_queue,
+            "ready_queue": self._ready_queue,
+            "telemetry_queue": self._telemetry_queue,
+            "telemetry_interval": self._telemetry_interval,
+            "spans_queue": self._spans_queue,
+            "spans_capacity": self._spans_capacity,
+            "spans_interval": self._spans_interval,
+            "restart_counter": self._get_restart_counter(proc_name),
+            "profiling_dir": self._profiling_dir,
+            **self.processes[proc_name],
+            **kwargs,
+        }
+
+    def _get_restart_counter(self, proc_name: str) -> T.Any:
+        if proc_name not in self._restart_counters:
+            self._restart_counters[proc_name] = self.mp_context.Value("i", 0)
+
+        return self._restart_counters[proc_name]
+
+    def _validate_process_classes(self) -> None:
+        """
+        Classes can be set by import paths like 'package.module:ClassName', they are imported only by the processes.
+        The paths are checked at the start, so a bad path doesn't fail later in a child process.
+        """
+        for proc_name in self.processes:
+            config_params: dict = self.config["processes"][proc_name] or {}
+            process_class: T.Any = config_params.get(
+                "process_class", self.processes[proc_name].get("process_class")
+            )
+
+            if isinstance(process_class, str):
+                utils.validate_import_path(process_class)
+
+    def _get_startup_option(self, option: str, default: T.Any) -> T.Any:
+        return (self.config.get("startup") or {}).get(option, default)
+
+    @staticmethod
+    def _create_mp_context(startup: dict) -> multiprocessing.context.BaseContext:
+        start_method: str = (startup or {}).get(
+            "start_method", RobotDispatcher.DEFAULT_START_METHOD
+        )
+        preload: T.List[str] = (startup or {}).get("preload", [])
+
+        if start_method not in ("spawn", "forkserver"):
+            raise utils.ConfigurationError(
+                f"Start method '{start_method}' is not supported, use 'spawn' or 'forkserver'."
+            )
+
+        if start_method not in multiprocessing.get_all_start_methods():
+            raise utils.ConfigurationError(
+                f"Start method '{start_method}' is not available on this platform."
+            )
+
+        if preload and start_method != "forkserver":
+            raise utils.ConfigurationError(
+                "Modules can be preloaded only with the 'forkserver' start method."
+            )
+
+        mp_context = multiprocessing.get_context(start_method)
+        if preload:
+            # the forkserver imports them once, every process is forked with them already imported
+            mp_context.set_forkserver_preload(list(preload))
+
+        return mp_context
+
+    def _generate_shared_object(self, object_type: str) -> T.Any:
+        # the Manager is started only if some shared object needs it
+        manager: T.Optional[SyncManager] = (
+            self.manager if object_type in utils.MANAGER_OBJECT_TYPES else None
+        )
+        return utils.generate(object_type, manager, self.mp_context)
+
+    def _fuse_chains(self) -> None:
+        """
+        Runs chains of processes as one group, so messages between them are passed by reference.
+        Chains are set by the 'fuse' section of the config. Also processes marked 'fusible: true' are fused
+        if one of them is the only publisher and the other is the only consumer of a queue.
+        """
+        fuse: T.List[T.Any] = self.config.get("fuse") or []
+        # a single chain can be set without the outer list
+        if fuse and all(isinstance(p, str) for p in fuse):
+            fuse = [fuse]
+
+        chains: T.List[T.List[str]] = [list(chain) for chain in fuse]
+        for chain in chains:
+            self._validate_fused_chain(chain)
+
+        chains.extend(self._find_fusible_chains({p for chain in chains for p in chain}))
+
+        for chain in chains:
+            group: str = f"fused:{'+'.join(chain)}"
+            for process_name in chain:
+                self._process_groups[process_name] = group
+
+            self.log.info(f"Processes {chain} are fused into one process.")
+
+    def _validate_fused_chain(self, chain: T.List[str]) -> None:
+        if len(chain) < 2:
+            raise utils.ConfigurationError(
+                f"Chain {chain} to fuse must have at least two processes."
+            )
+
+        for process_name in chain:
+            if process_name not in self.config["processes"]:
+                raise utils.ConfigurationError(
+                    f"Process {process_name} to fuse is not found in config."
+                )
+
+            if process_name in self._process_groups:
+                raise utils.ConfigurationError(
+                    f"Process {process_name} is in a group, it can't be fused."
+                )
+
+        for publisher, consumer in zip(chain, chain[1:]):
+            queues: T.Set[str] = set(self._get_config_queues(publisher, "publish"))
+            if not queues & set(self._get_config_queues(consumer, "consume")):
+                raise utils.ConfigurationError(
+                    f"Processes {publisher} and {consumer} can't be fused: {consumer} doesn't consume from {publisher}."
+                )
+
+    def _find_fusible_chains(self, excluded: T.Set[str]) -> T.List[T.List[str]]:
+        """Finds connected processes with 'fusible: true' that are linked by queues with one publisher and one consumer."""
+        fusible: T.List[str] = [
+            p
+            for p, params in self.config["processes"].items()
+            if params
+            and params.get("fusible")
+            and p not in excluded
+            and p not in self._process_groups
+            and not any(k in params for k in ("replicas", "max_replicas"))
+        ]
+
+        # fusible process => the chain it's in
+        chains: T.Dict[str, T.List[str]] = {p: [p] for p in fusible}
+        for publisher in fusible:
+            for queue_name in self._get_config_queues(publisher, "publish"):
+                publishers: T.List[str] = self._get_queue_processes(
+                    queue_name, "publish"
+                )
+                consumers: T.List[str] = self._get_queue_processes(
+                    queue_name, "consume"
+                )
+
+                if (
+                    len(publishers) != 1
+                    or len(consumers) != 1
+                    or consumers[0] not in chains
+                ):
+                    continue
+
+                consumer: str = consumers[0]
+                if chains[consumer] is not chains[publisher]:
+                    merged: T.List[str] = chains[publisher] + chains[consumer]
+                    for p in merged:
+                        chains[p] = merged
+
+        unique_chains: T.Dict[int, T.List[str]] = {
+            id(chain): chain for chain in chains.values()
+        }
+        return [chain for chain in unique_chains.values() if len(chain) > 1]
+
+    def _get_config_queues(self, process_name: str, direction: str) -> T.List[str]:
+        queues: T.Any = (self.config["processes"][process_name] or {}).get(
+            direction
+        ) or []
+        return [queues] if isinstance(queues, str) else list(queues)
+
+    def _get_queue_processes(self, queue_name: str, direction: str) -> T.List[str]:
+        return [
+            p
+            for p in self.config["processes"]
+            if queue_name in self._get_config_queues(p, direction)
+        ]
+
+    def _get_group_members(self, group: str) -> T.List[str]:
+        return [p for p in self.processes if self._process_groups.get(p) == group]
+
+    def _is_group_edge(
+        self, queue_name: str, consumer: str, publishers: T.List[str]
+    ) -> bool:
+        """
+        Checks the queue connects processes of one group only and has no special settings,
+        so an in-memory queue can be used for it.
+        """
+        group: T.Optional[str] = self._process_groups.get(consumer)
+        if group is None or any(
+            self._process_groups.get(p) != group for p in publishers
+        ):
+            return False
+
+        return not any(
+            queue_name in self.config.get(section, {})
+            for section in (
+                "queues_types",
+                "queue_policies",
+                "overflow_policies",
+                "queues_max_bytes",
+            )
+        )
 
     # todo replace all logging logic in partial class
     def run_logging(self, project_description: dict,format_string:str, in_cluster: bool) -> None:
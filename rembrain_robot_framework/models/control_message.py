@@ -0,0 +1,34 @@
+import typing as T
+
+from pydantic import BaseModel
+
+
+class ControlMessage(BaseModel):
+    """
+    Command that RobotDispatcher sends to a running process through its system queue.
+    Args:
+        **[Required]** command: One of the COMMANDS.
+        profiler: 'stack' (sampling profiler of all threads) or 'cprofile' (profiler of the thread that runs run()).
+        duration: Seconds after which the profiler or the memory tracing is stopped and its result is written.
+        level: Log level for 'set_log_level'.
+    """
+
+    START_PROFILER: T.ClassVar[str] = "start_profiler"
+    STOP_PROFILER: T.ClassVar[str] = "stop_profiler"
+    MEMORY_SNAPSHOT: T.ClassVar[str] = "memory_snapshot"
+    SET_LOG_LEVEL: T.ClassVar[str] = "set_log_level"
+    COMMANDS: T.ClassVar[T.Tuple[str, ...]] = (
+        START_PROFILER,
+        STOP_PROFILER,
+        MEMORY_SNAPSHOT,
+        SET_LOG_LEVEL,
+    )
+
+    STACK: T.ClassVar[str] = "stack"
+    CPROFILE: T.ClassVar[str] = "cprofile"
+    PROFILERS: T.ClassVar[T.Tuple[str, ...]] = (STACK, CPROFILE)
+
+    command: str
+    profiler: str = STACK
+    duration: T.Optional[float] = None
+    level: T.Optional[str] = None
@@ -4,6 +4,8 @@ from uuid import UUID, uuid4
 import bson
 from pydantic import BaseModel, Field
 
+from rembrain_robot_framework.models.trace_context import TraceContext
+
 
 class Request(BaseModel):
     """
@@ -12,12 +14,14 @@ class Request(BaseModel):
         uid: Unique value for request.
         **[Required]** client_process: Name of process, which have sent request and which are waiting response.
         **[Required]** data: Any serialized data
+        trace: Trace context of the request, it's sent with the request and comes back with the response.
     """
 
     uid: UUID = Field(default_factory=uuid4)
     client_process: str = Field(min_length=1)
     service_name: str = ""
     data: T.Any
+    trace: T.Optional[TraceContext] = None
 
     def to_bson(self) -> bytes:
         return bson.BSON.encode(self.dict())
@@ -0,0 +1,54 @@
+import time
+import typing as T
+from uuid import uuid4
+
+from pydantic import BaseModel, Field
+
+
+class TraceHop(BaseModel):
+    """
+    Point that a traced message has passed.
+    Args:
+        **[Required]** name: Name of the process.
+        **[Required]** stage: What the process did, e.g. "publish", "consume", "pack".
+        time: Wall clock time of the hop (time.time()).
+    """
+
+    name: str
+    stage: str
+    time: float = Field(default_factory=time.time)
+
+
+class TraceContext(BaseModel):
+    """
+    Trace of a message through processes and machines.
+    Every hop adds its timestamp, so latencies between hops are known at the end of the path.
+    Note: timestamps of different machines are compared, so the clocks must be synchronized (e.g. NTP).
+    Args:
+        trace_id: Unique id of the trace.
+        hops: Points that the message has passed in order.
+    """
+
+    trace_id: str = Field(default_factory=lambda: uuid4().hex)
+    hops: T.List[TraceHop] = []
+
+    def with_hop(self, name: str, stage: str) -> "TraceContext":
+        """Returns a copy of the trace with a new hop, the trace itself is not changed."""
+        return TraceContext(
+            trace_id=self.trace_id, hops=[*self.hops, TraceHop(name=name, stage=stage)]
+        )
+
+    def latencies(self) -> T.List[T.Tuple[str, float]]:
+        """Returns (label, seconds) for every pair of neighbouring hops, the label is 'name.stage -> name.stage'."""
+        return [
+            (f"{a.name}.{a.stage} -> {b.name}.{b.stage}", b.time - a.time)
+            for a, b in zip(self.hops, self.hops[1:])
+        ]
+
+    @property
+    def total(self) -> float:
+        """Seconds from the first hop to the last one."""
+        if len(self.hops) < 2:
+            return 0.0
+
+        return self.hops[-1].time - self.hops[0].time
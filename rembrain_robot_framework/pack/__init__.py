@@ -2,4 +2,4 @@
 from .type import PackType
 
 from .packer import Packer
-from .unpacker import Unpacker
+from .unpacker import PackHeader, Unpacker
@@ -1,6 +1,8 @@
 import json
 import struct
+import time
 import typing as T
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import cv2
 import numpy
@@ -9,80 +11,159 @@ from rembrain_robot_framework.pack import PackType
 
 
 class Packer:
-    def __init__(self, pack_type: T.Union[PackType, str]):
+    """
+    Packs images and meta into one buffer:
+        JPG:     type (1 byte) | len(rgb) | len(meta) | rgb jpg | meta json
+        JPG_PNG: type (1 byte) | len(rgb) | len(depth) | len(meta) | rgb jpg | depth png | meta json
+    Lengths are 4-byte unsigned ints in the native byte order.
+
+    With parallel=True the depth png of JPG_PNG is encoded on a persistent thread of the packer
+    while the calling thread encodes the rgb jpg, cv2.imencode releases the GIL, so they run at once.
+    Durations of the stages of the last frame ('rgb', 'depth', 'pack') are kept in timings (in seconds),
+    on_stage(stage, start time, duration) is called by the thread that has done the stage.
+
+    :param pack_type: JPG_PNG or JPG.
+    :param parallel: Encode rgb and depth at once.
+    :param on_stage: Callback for durations of the stages.
+    """
+
+    # headers of the pack types: type and lengths of the sections
+    HEADERS: T.Dict[PackType, struct.Struct] = {
+        PackType.JPG: struct.Struct("=BII"),
+        PackType.JPG_PNG: struct.Struct("=BIII"),
+    }
+    # the reusable buffer of pack_into() grows with this reserve, so it isn't reallocated for every bigger frame
+    BUFFER_RESERVE = 1.25
+
+    def __init__(
+        self,
+        pack_type: T.Union[PackType, str],
+        parallel: bool = False,
+        on_stage: T.Optional[T.Callable[[str, float, float], None]] = None,
+    ):
         self.pack_type: PackType = (
             PackType[pack_type] if type(pack_type) is str else pack_type
         )
         self.frame_index: int = 0
         self.encode_param: list = [cv2.IMWRITE_JPEG_QUALITY, 75]
+        # output of pack_into(), it's reused by the next frames
+        self._buffer: bytearray = bytearray()
+
+        # one thread is enough: the other image is encoded by the calling thread
+        self._pool: T.Optional[ThreadPoolExecutor] = None
+        if parallel:
+            self._pool = ThreadPoolExecutor(1, thread_name_prefix="Packer")
+
+        self.timings: T.Dict[str, float] = {}
+        self._on_stage: T.Optional[T.Callable[[str, float, float], None]] = on_stage
+
+    def close(self) -> None:
+        """Stops the thread of parallel encoding."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
 
     def pack(
         self, rgb_image: T.Any, depth_16bit: T.Any, meta: T.Optional[dict] = None
     ) -> bytes:
+        """Returns the package as bytes, the encoded images are copied once."""
+        start: float = time.time()
+        started: float = time.perf_counter()
+
+        sections: T.List[T.Any] = self._encode(rgb_image, depth_16bit, meta)
+        result: bytes = b"".join((self._pack_header(sections), *sections))
+
+        self._stage_done("pack", start, time.perf_counter() - started)
+        return result
+
+    def pack_into(
+        self, rgb_image: T.Any, depth_16bit: T.Any, meta: T.Optional[dict] = None
+    ) -> memoryview:
+        """
+        Writes the package into the reusable buffer of the packer and returns a view of it.
+        The view can be sent without copying (e.g. by a websocket), but it's overwritten by the next pack_into(),
+        so it must be sent or copied before that. Use pack() for a package that is put into a queue.
+        """
+        start: float = time.time()
+        started: float = time.perf_counter()
+
+        sections: T.List[T.Any] = self._encode(rgb_image, depth_16bit, meta)
+        header: struct.Struct = self.HEADERS[self.pack_type]
+        size: int = header.size + sum(len(s) for s in sections)
+
+        if len(self._buffer) < size:
+            # a new buffer, because a bytearray with views can't be resized and views of previous frames may live
+            self._buffer = bytearray(int(size * self.BUFFER_RESERVE))
+
+        view = memoryview(self._buffer)
+        header.pack_into(view, 0, int(self.pack_type), *(len(s) for s in sections))
+
+        offset: int = header.size
+        for section in sections:
+            view[offset : offset + len(section)] = section
+            offset += len(section)
+
+        self._stage_done("pack", start, time.perf_counter() - started)
+        return view[:size]
+
+    def _encode(
+        self, rgb_image: T.Any, depth_16bit: T.Any, meta: T.Optional[dict]
+    ) -> T.List[T.Any]:
+        """Returns the sections of the package after the header: encoded images and meta."""
         if meta is None:
             meta = {}
 
         if self.pack_type == PackType.JPG:
-            result, enc_img = cv2.imencode(".jpg", rgb_image, self.encode_param)
-            buf1: numpy.ndarray = numpy.frombuffer(enc_img, dtype=numpy.uint8)
-            text: str = json.dumps(meta)
-            buf2: numpy.ndarray = numpy.frombuffer(
-                text.encode("utf-8"), dtype=numpy.uint8
+            rgb: numpy.ndarray = self._encode_stage(
+                "rgb", ".jpg", rgb_image, self.encode_param
             )
-
-            result: numpy.ndarray = numpy.zeros(
-                (buf1.shape[0] + buf2.shape[0] + 8 + 1), dtype=numpy.uint8
-            )
-            result[0] = int(self.pack_type)
-            result[0 + 1 : 4 + 1] = numpy.frombuffer(
-                struct.pack("I", buf1.shape[0]), dtype=numpy.uint8
-            )[:]
-            result[4 + 1 : 8 + 1] = numpy.frombuffer(
-                struct.pack("I", buf2.shape[0]), dtype=numpy.uint8
-            )[:]
-
-            result[8 + 1 : 8 + 1 + buf1.shape[0]] = buf1[:]
-            result[
-                8 + 1 + buf1.shape[0] : 8 + 1 + buf1.shape[0] + buf2.shape[0]
-            ] = buf2[:]
-            return result.tobytes()
+            return [rgb, json.dumps(meta).encode("utf-8")]
 
         if self.pack_type == PackType.JPG_PNG:
-            result, enc_img = cv2.imencode(".png", depth_16bit)
-            buf2: numpy.ndarray = numpy.frombuffer(enc_img, dtype=numpy.uint8)
-
-            result, enc_img = cv2.imencode(".jpg", rgb_image, self.encode_param)
-            buf1: numpy.ndarray = numpy.frombuffer(enc_img, dtype=numpy.uint8)
+            if self._pool is None:
+                depth: numpy.ndarray = self._encode_stage("depth", ".png", depth_16bit)
+                rgb = self._encode_stage("rgb", ".jpg", rgb_image, self.encode_param)
+            else:
+                # png is usually the slower one, so it's started first
+                depth_future: Future = self._pool.submit(
+                    self._encode_stage, "depth", ".png", depth_16bit
+                )
+                rgb = self._encode_stage("rgb", ".jpg", rgb_image, self.encode_param)
+                depth = depth_future.result()
 
             meta["frameindex"] = self.frame_index
-            text: str = json.dumps(meta)
             self.frame_index += 1
+            return [rgb, depth, json.dumps(meta).encode("utf-8")]
 
-            buf3: numpy.ndarray = numpy.frombuffer(
-                text.encode("utf-8"), dtype=numpy.uint8
-            )
-            result: numpy.ndarray = numpy.zeros(
-                (buf1.shape[0] + buf2.shape[0] + buf3.shape[0] + 12 + 1),
-                dtype=numpy.uint8,
-            )
+        raise Exception(f"Unknown type of packer: {self.pack_type}.")
 
-            result[0] = int(self.pack_type)
-            result[0 + 1 : 4 + 1] = numpy.frombuffer(
-                struct.pack("I", buf1.shape[0]), dtype=numpy.uint8
-            )[:]
-            result[4 + 1 : 8 + 1] = numpy.frombuffer(
-                struct.pack("I", buf2.shape[0]), dtype=numpy.uint8
-            )[:]
-            result[8 + 1 : 12 + 1] = numpy.frombuffer(
-                struct.pack("I", buf3.shape[0]), dtype=numpy.uint8
-            )[:]
-
-            result[12 + 1 : 12 + 1 + buf1.shape[0]] = buf1[:]
-            result[
-                12 + 1 + buf1.shape[0] : 12 + 1 + buf1.shape[0] + buf2.shape[0]
-            ] = buf2[:]
-            result[12 + 1 + buf1.shape[0] + buf2.shape[0] :] = buf3[:]
-
-            return result.tobytes()
+    def _encode_stage(
+        self, stage: str, extension: str, image: T.Any, params: T.Sequence[int] = ()
+    ) -> numpy.ndarray:
+        start: float = time.time()
+        started: float = time.perf_counter()
+        result: numpy.ndarray = self._imencode(extension, image, params)
 
-        raise Exception(f"Unknown type of packer: {self.pack_type}.")
+        self._stage_done(stage, start, time.perf_counter() - started)
+        return result
+
+    def _stage_done(self, stage: str, start: float, duration: float) -> None:
+        self.timings[stage] = duration
+        if self._on_stage is not None:
+            self._on_stage(stage, start, duration)
+
+    def _pack_header(self, sections: T.List[T.Any]) -> bytes:
+        return self.HEADERS[self.pack_type].pack(
+            int(self.pack_type), *(len(s) for s in sections)
+        )
+
+    @staticmethod
+    def _imencode(
+        extension: str, image: T.Any, params: T.Sequence[int] = ()
+    ) -> numpy.ndarray:
+        result, encoded = cv2.imencode(extension, image, params)
+        if not result:
+            raise Exception(f"Failed to encode image to {extension}.")
+
+        # imencode returns a column, a flat view of it has the length in bytes
+        return encoded.reshape(-1)
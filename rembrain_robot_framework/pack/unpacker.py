@@ -1,3 +1,4 @@
+import json
 import struct
 import typing as T
 
@@ -5,80 +6,108 @@ import cv2
 import numpy
 
 from rembrain_robot_framework.pack import PackType
+from rembrain_robot_framework.pack.packer import Packer
 
 
-class Unpacker:
-    def __init__(self):
-        self.pack_type: int = -1
-
-    def pre_unpack(self, buffer: T.Any) -> tuple:
-        if self.pack_type == -1:
-            self.pack_type = buffer[0]
-
-        if self.pack_type != buffer[0]:
-            raise Exception("Packer type was changed on fly.")
+class PackHeader(T.NamedTuple):
+    """Type and lengths of the sections of a package, depth_size is 0 for JPG."""
 
-        if self.pack_type == PackType.JPG:
-            l1: int = struct.unpack("I", buffer[0 + 1 : 4 + 1])[0]
-            l2: int = struct.unpack("I", buffer[4 + 1 : 8 + 1])[0]
+    pack_type: PackType
+    rgb_size: int
+    depth_size: int
+    meta_size: int
 
-            if len(buffer) == l1 + l2 + 8 + 1:
-                buf1 = buffer[8 + 1 : 8 + 1 + l1]
-                buf2 = buffer[8 + 1 + l1 : 8 + 1 + l1 + l2]
-                return buf1, None, buf2.decode("utf-8")
+    @property
+    def header_size(self) -> int:
+        return Packer.HEADERS[self.pack_type].size
 
-        if self.pack_type == PackType.JPG_PNG:
-            l1 = struct.unpack("I", buffer[0 + 1 : 4 + 1])[0]
-            l2 = struct.unpack("I", buffer[4 + 1 : 8 + 1])[0]
-            l3 = struct.unpack("I", buffer[8 + 1 : 12 + 1])[0]
+    @property
+    def size(self) -> int:
+        return self.header_size + self.rgb_size + self.depth_size + self.meta_size
 
-            if len(buffer) == l1 + l2 + l3 + 12 + 1:
-                buf1 = buffer[12 + 1 : 12 + 1 + l1]
-                buf2 = buffer[12 + 1 + l1 : 12 + 1 + l1 + l2]
-                buf3 = buffer[12 + 1 + l1 + l2 : 12 + 1 + l1 + l2 + l3]
 
-                buf1 = numpy.frombuffer(buf1, dtype=numpy.uint8)
-                buf2 = numpy.frombuffer(buf2, dtype=numpy.uint8)
+class Unpacker:
+    """
+    Unpacks packages of Packer. Sections are taken as memoryview slices of the buffer,
+    so the payload isn't copied before decoding of the images.
+    """
 
-                return buf1, buf2, buf3.decode("utf-8")
+    def __init__(self):
+        self.pack_type: int = -1
 
-        return None, None, None
+    def parse_header(self, buffer: T.Any) -> T.Optional[PackHeader]:
+        """
+        Returns the header of the package without touching the images.
+        It returns None if the package is incomplete or of an unknown type.
+        """
+        view = memoryview(buffer).cast("B")
+        if len(view) == 0:
+            return None
 
-    def unpack(self, buffer: T.Any) -> tuple:
         if self.pack_type == -1:
-            self.pack_type = buffer[0]
+            self.pack_type = view[0]
 
-        if self.pack_type != buffer[0]:
-            raise Exception("packer type was changed on fly.")
-
-        if self.pack_type == PackType.JPG:
-            l1 = struct.unpack("I", buffer[0 + 1 : 4 + 1])[0]
-            l2 = struct.unpack("I", buffer[4 + 1 : 8 + 1])[0]
+        if self.pack_type != view[0]:
+            raise Exception("Packer type was changed on fly.")
 
-            if len(buffer) == l1 + l2 + 8 + 1:
-                buf1 = buffer[8 + 1 : 8 + 1 + l1]
-                buf2 = buffer[8 + 1 + l1 : 8 + 1 + l1 + l2]
-                buf1 = numpy.frombuffer(buf1, dtype=numpy.uint8)
+        if self.pack_type not in Packer.HEADERS:
+            return None
 
-                rgb = cv2.imdecode(buf1, cv2.IMREAD_COLOR)
-                return rgb, None, buf2.decode("utf-8")
+        pack_type = PackType(self.pack_type)
+        header: struct.Struct = Packer.HEADERS[pack_type]
+        if len(view) < header.size:
+            return None
 
-        if self.pack_type == PackType.JPG_PNG:
-            l1 = struct.unpack("I", buffer[0 + 1 : 4 + 1])[0]
-            l2 = struct.unpack("I", buffer[4 + 1 : 8 + 1])[0]
-            l3 = struct.unpack("I", buffer[8 + 1 : 12 + 1])[0]
+        if pack_type == PackType.JPG:
+            _, rgb_size, meta_size = header.unpack_from(view)
+            result = PackHeader(pack_type, rgb_size, 0, meta_size)
+        else:
+            result = PackHeader(pack_type, *header.unpack_from(view)[1:])
 
-            if len(buffer) == l1 + l2 + l3 + 12 + 1:
-                buf1 = buffer[12 + 1 : 12 + 1 + l1]
-                buf2 = buffer[12 + 1 + l1 : 12 + 1 + l1 + l2]
-                buf3 = buffer[12 + 1 + l1 + l2 : 12 + 1 + l1 + l2 + l3]
+        return result if len(view) == result.size else None
 
-                buf1 = numpy.frombuffer(buf1, dtype=numpy.uint8)
-                rgb = cv2.imdecode(buf1, cv2.IMREAD_COLOR)
+    def read_meta(self, buffer: T.Any) -> T.Optional[dict]:
+        """Returns the decoded meta of the package (e.g. frameindex and camera data) without touching the images."""
+        header: T.Optional[PackHeader] = self.parse_header(buffer)
+        if header is None:
+            return None
 
-                buf2 = numpy.frombuffer(buf2, dtype=numpy.uint8)
-                depth16 = cv2.imdecode(buf2, flags=-1)
+        return json.loads(bytes(self._split(buffer, header)[2]))
 
-                return rgb, depth16, buf3.decode("utf-8")
+    def pre_unpack(self, buffer: T.Any) -> tuple:
+        """Returns the encoded images as arrays over the buffer (without copying) and meta as a string."""
+        header: T.Optional[PackHeader] = self.parse_header(buffer)
+        if header is None:
+            return None, None, None
+
+        rgb, depth, meta = self._split(buffer, header)
+        return (
+            numpy.frombuffer(rgb, dtype=numpy.uint8),
+            None if depth is None else numpy.frombuffer(depth, dtype=numpy.uint8),
+            str(meta, "utf-8"),
+        )
 
-        return None, None, None
+    def unpack(self, buffer: T.Any) -> tuple:
+        rgb, depth, meta = self.pre_unpack(buffer)
+        if rgb is None:
+            return None, None, None
+
+        return (
+            cv2.imdecode(rgb, cv2.IMREAD_COLOR),
+            None if depth is None else cv2.imdecode(depth, flags=-1),
+            meta,
+        )
+
+    @staticmethod
+    def _split(
+        buffer: T.Any, header: PackHeader
+    ) -> T.Tuple[memoryview, T.Optional[memoryview], memoryview]:
+        view = memoryview(buffer).cast("B")
+        rgb_end: int = header.header_size + header.rgb_size
+        depth_end: int = rgb_end + header.depth_size
+
+        return (
+            view[header.header_size : rgb_end],
+            view[rgb_end:depth_end] if header.pack_type == PackType.JPG_PNG else None,
+            view[depth_end : depth_end + header.meta_size],
+        )
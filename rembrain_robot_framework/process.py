@@ -1,19 +1,49 @@
+import copy
 import logging
+import time
 import typing as T
-from collections import namedtuple
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from multiprocessing import Queue
+from multiprocessing.connection import wait
 from os import environ
-from queue import Full
+from queue import Empty, Full
+from threading import BoundedSemaphore
 from uuid import UUID
 
 from rembrain_robot_framework.models.heartbeat_message import HeartbeatMessage
 from rembrain_robot_framework.models.request import Request
+from rembrain_robot_framework.models.trace_context import TraceContext
+from rembrain_robot_framework.queues import (
+    MessageBatch,
+    ReorderBuffer,
+    SequencedMessage,
+    SequenceEnd,
+    Sequencer,
+    SerializedMessage,
+    TimedMessage,
+    TracedMessage,
+)
 from rembrain_robot_framework.utils import ConfigurationError
+from rembrain_robot_framework.services.profiling_controller import ProfilingController
+from rembrain_robot_framework.services.queue_telemetry import QueueTelemetry
+from rembrain_robot_framework.services.response_router import (
+    ResponseFuture,
+    ResponseRouter,
+)
+from rembrain_robot_framework.services.span_recorder import SpanRecorder
 from rembrain_robot_framework.services.stack_monitor import StackMonitor
+from rembrain_robot_framework.services.trace_collector import TraceCollector
 
 
 class RobotProcess:
+    # interval of checking queues that can't be waited on in consume_any
+    POLL_INTERVAL = 0.01
+    # shorter waits on queues are not recorded as spans
+    MIN_BLOCKED_SPAN = 0.0001
+
     # TODO: add doctrings for this parameters
     def __init__(
         self,
@@ -35,8 +65,52 @@ class RobotProcess:
 
         self._shared: T.Any = namedtuple("_", shared_objects.keys())(**shared_objects)
 
+        # messages that are already taken from the consume queues (e.g. the rest of a batch)
+        self._pending_messages: T.DefaultDict[str, T.Deque[T.Any]] = defaultdict(deque)
+        # queue name => number of the newest pending messages that are views on the slot of the last get()
+        self._slot_messages: T.Dict[str, int] = {}
+
         self._system_queues: T.Dict[str, Queue] = system_queues
-        self._received_personal_messages = {}
+        # it receives responses to the requests of this process, it's created at the first request
+        self._response_router: T.Optional[ResponseRouter] = None
+        # it runs control commands of RobotDispatcher (profilers, memory snapshots), it's set if profiling is turned on
+        self._profiling: T.Optional[ProfilingController] = None
+        self._consume_any_turn: int = 0
+
+        # replicas that preserve the order of messages number the messages they consume
+        self._sequencer: T.Optional[Sequencer] = kwargs.get("sequencer")
+        # number of the message this replica handles now
+        self._sequence: T.Optional[int] = None
+        # publish queues that got a message of the current input message
+        self._sequence_queues: T.Set[str] = set()
+        # (queue name, replicated process) => buffer that restores the order of its messages
+        self._reorder_buffers: T.Dict[T.Tuple[str, str], ReorderBuffer] = {}
+
+        # statistics of the queues, it's set if telemetry is turned on in config
+        self._telemetry: T.Optional[QueueTelemetry] = None
+        if kwargs.get("telemetry_queue") is not None:
+            self._telemetry = QueueTelemetry(
+                self.name,
+                kwargs["telemetry_queue"],
+                kwargs.get("telemetry_interval", QueueTelemetry.DEFAULT_INTERVAL),
+            )
+            self._telemetry.start()
+
+        # durations of sections of the process, it's set if spans are turned on in config
+        self._spans: T.Optional[SpanRecorder] = None
+        if kwargs.get("spans_queue") is not None:
+            self._spans = SpanRecorder(
+                self.name,
+                kwargs["spans_queue"],
+                kwargs.get("spans_capacity", SpanRecorder.DEFAULT_CAPACITY),
+                kwargs.get("spans_interval", SpanRecorder.DEFAULT_INTERVAL),
+            )
+            self._spans.start()
+
+        # trace of the message the process handles now, it goes with the published messages
+        self._trace: T.Optional[TraceContext] = None
+        # latencies of the traces finished by this process, it's created at the first finished trace
+        self._trace_collector: T.Optional[TraceCollector] = None
 
         # in case of exception these queues are cleared
         self.queues_to_clear: T.List[str] = []
@@ -44,7 +118,12 @@ class RobotProcess:
 
         self._stack_monitor: T.Optional[StackMonitor] = None
         if "monitoring" in kwargs and kwargs["monitoring"]:
-            self._init_monitoring(self.name)
+            self._init_monitoring(self.name, kwargs["monitoring"])
+
+        if kwargs.get("profiling_dir") is not None:
+            self._profiling = ProfilingController(self.name, kwargs["profiling_dir"])
+            # commands come through the system queue, so it's read from the start
+            self._get_response_router().start()
 
         self.watcher_queue = watcher_queue
 
@@ -64,6 +143,68 @@ class RobotProcess:
         # TODO remove shared variables
         return self._shared
 
+    @property
+    def trace(self) -> T.Optional[TraceContext]:
+        """Trace of the last consumed message, it's None if the message is not traced."""
+        return self._trace
+
+    @trace.setter
+    def trace(self, trace: T.Optional[TraceContext]) -> None:
+        self._trace = trace
+
+    def span(self, name: str, **args) -> T.ContextManager[None]:
+        """
+        Records the duration of a section of code if spans are turned on in config, otherwise it does nothing.
+        Keyword arguments are shown with the span on the timeline.
+        See also services.span_recorder.spanned - decorator for methods.
+
+        Example:
+        with self.span("inference", frame=frame_id):
+            result = self.model(image)
+        """
+        if self._spans is None:
+            return nullcontext()
+
+        return self._spans.span(name, **args)
+
+    def start_trace(self) -> TraceContext:
+        """
+        Starts a new trace, e.g. for a frame of a camera. Messages published after it carry the trace
+        and every process on their way adds its hops, until some process calls finish_trace().
+
+        :return: The new trace.
+        """
+        self._trace = TraceContext().with_hop(self.name, "start")
+        return self._trace
+
+    def finish_trace(self) -> T.Optional[TraceContext]:
+        """
+        Adds the final hop to the current trace and records its latencies, see trace_report().
+
+        :return: The finished trace or None if there is no current trace.
+        """
+        if self._trace is None:
+            return None
+
+        trace: TraceContext = self._trace.with_hop(self.name, "finish")
+        self._trace = None
+
+        if self._trace_collector is None:
+            self._trace_collector = TraceCollector()
+
+        self._trace_collector.add(trace)
+        return trace
+
+    def trace_report(self) -> dict:
+        """
+        Returns percentiles of the latencies of the traces finished by this process:
+        {"total": {"count", "p50", "p99"}, "hops": {"name.stage -> name.stage": {"count", "p50", "p99"}}}.
+        """
+        if self._trace_collector is None:
+            return TraceCollector().report()
+
+        return self._trace_collector.report()
+
     def free_resources(self) -> None:
         """
         It frees all occupied resources.
@@ -71,6 +212,19 @@ class RobotProcess:
         if self._stack_monitor:
             self._stack_monitor.stop_monitoring()
 
+        if self._profiling is not None:
+            self._profiling.close()
+
+        if self._response_router is not None:
+            self._response_router.stop()
+
+        self._finish_sequence()
+        if self._telemetry is not None:
+            self._telemetry.report()
+
+        if self._spans is not None:
+            self._spans.report()
+
         self.close_objects()
         self.clear_queues()
 
@@ -93,6 +247,7 @@ class RobotProcess:
 
     def clear_queue(self, queue: str) -> None:
         if queue in self._consume_queues:
+            self._pending_messages[queue].clear()
             while not self._consume_queues[queue].empty():
                 self._consume_queues[queue].get(timeout=2.0)
 
@@ -110,6 +265,7 @@ class RobotProcess:
         """
         Sends message to all processes that are configured to listen to the queue_name.
         If there are several processes for listening then everyone will receive a copy of the message.
+        In this case the message is pickled only once for all of them.
 
         :param message: Any serialized data to transfer over interprocess queues.
 
@@ -125,50 +281,191 @@ class RobotProcess:
 
         :raise: ConfigurationError: if number of queues != 1 and queue name was not given
         """
-        if len(self._publish_queues.keys()) == 0:
-            self.log.error(f'Process "{self.name}" has no queues to write.')
-            raise ConfigurationError(
-                f"Publish called with 0 output queues for process {self.name}"
-            )
+        queue_name = self._get_publish_queue_name(queue_name)
+        self._put(message, queue_name, clear_on_overflow)
 
-        if queue_name is None:
-            if len(self._publish_queues.keys()) != 1:
-                self.log.error(
-                    f'Process "{self.name}" has more than one write queue. Specify a write queue name.'
-                )
-                raise ConfigurationError(
-                    f"Publish called with >1 output queues for process {self.name}"
-                )
-            queue_name = list(self._publish_queues.keys())[0]
+    def publish_many(
+        self,
+        messages: T.Iterable[T.Any],
+        queue_name: T.Optional[str] = None,
+        clear_on_overflow: bool = False,
+    ) -> None:
+        """
+        Sends several messages to all processes that are configured to listen to the queue_name.
+        All messages go through a queue as one item, so it is much cheaper than calling publish for each of them.
+        Consumers get them one by one with consume or at once with consume_batch.
+        Note: the whole batch takes one place in a queue of limited size.
 
-        for q in self._publish_queues[queue_name]:
-            if clear_on_overflow:
-                while q.full():
-                    q.get()
-            q.put(message)
+        :param messages: Messages to send, every message is any serialized data.
+
+        :param queue_name: Name of the queue to send messages to.
+        If there is only one output queue it's possible to omit this argument,
+        it will pick this single queue by default.
+        :type queue_name: Optional[str]
+
+        :param bool clear_on_overflow: If this parameter is set and a queue to write is full,
+        publish_many will empty the queue before publishing of new messages.
+
+        :return: None
+
+        :raise: ConfigurationError: if number of queues != 1 and queue name was not given
+        """
+        queue_name = self._get_publish_queue_name(queue_name)
+
+        batch = MessageBatch(messages)
+        if len(batch) > 0:
+            self._put(batch, queue_name, clear_on_overflow)
 
     def consume(
-        self, queue_name: T.Optional[str] = None, clear_all_messages: bool = False
+        self,
+        queue_name: T.Optional[str] = None,
+        clear_all_messages: bool = False,
+        timeout: T.Optional[float] = None,
     ) -> T.Any:
-        if len(self._consume_queues.keys()) == 0:
+        """
+        Gets the next message from the queue. The process is blocked until a message comes.
+
+        :param queue_name: Name of the queue to read. If there is only one input queue it's possible to omit this argument.
+        :type queue_name: Optional[str]
+
+        :param bool clear_all_messages: If this parameter is set, all messages in the queue are dropped
+        except the newest one, which is returned.
+
+        :param timeout: Max time in seconds to wait for a message. If it's None - wait until a message comes.
+        :type timeout: Optional[float]
+
+        :raise: ConfigurationError: if number of queues != 1 and queue name was not given
+        :raise: queue.Empty: if no message came during the timeout
+        """
+        queue_name = self._get_consume_queue_name(queue_name)
+        pending: T.Deque[T.Any] = self._pending_messages[queue_name]
+
+        if clear_all_messages and not self._consume_queues[queue_name].empty():
+            pending.clear()
+            self._receive(queue_name, timeout=timeout, clear_all_messages=True)
+
+        while not pending:
+            self._receive(queue_name, timeout=timeout)
+
+        if clear_all_messages:
+            message: T.Any = pending[-1]
+            pending.clear()
+            return self._unwrap_trace(message)
+
+        return self._unwrap_trace(pending.popleft())
+
+    def consume_any(
+        self,
+        queue_names: T.Optional[T.Iterable[str]] = None,
+        timeout: T.Optional[float] = None,
+    ) -> T.Tuple[str, T.Any]:
+        """
+        Waits until any of the queues has a message and returns it.
+        It waits on the pipes of the queues, so there is no need to poll them with is_empty() and sleep.
+
+        Example:
+        queue_name, message = self.consume_any(["image_orig", "image_processed"], timeout=1.0)
+
+        :param queue_names: Names of the queues to read. If it's None - all input queues of the process.
+        :type queue_names: Optional[Iterable[str]]
+
+        :param timeout: Max time in seconds to wait for a message. If it's None - wait until a message comes.
+        :type timeout: Optional[float]
+
+        :return: Tuple of the queue name and the message.
+
+        :raise: ConfigurationError: if the process doesn't consume from any of the queues
+        :raise: queue.Empty: if no message came during the timeout
+        """
+        if queue_names is None:
+            queue_names = list(self._consume_queues.keys())
+        else:
+            queue_names = list(queue_names)
+
+        if len(queue_names) == 0:
             raise ConfigurationError(
                 f"Consume called with 0 input queues for process {self.name}"
             )
 
-        if queue_name is None:
-            if len(self._consume_queues.keys()) != 1:
+        for queue_name in queue_names:
+            if not self.has_consume_queue(queue_name):
                 raise ConfigurationError(
-                    f"Consume called with >1 input queues for process {self.name}"
+                    f"Consume queue with name = '{queue_name}' does not exist."
                 )
 
-            queue_name = list(self._consume_queues.keys())[0]
+        # start from the next queue every time, so a busy queue doesn't starve the others
+        self._consume_any_turn = (self._consume_any_turn + 1) % len(queue_names)
+        queue_names = (
+            queue_names[self._consume_any_turn :]
+            + queue_names[: self._consume_any_turn]
+        )
 
-        message: str = self._consume_queues[queue_name].get()
-        if clear_all_messages:
-            while not self._consume_queues[queue_name].empty():
-                message = self._consume_queues[queue_name].get()
+        deadline: T.Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+        while True:
+            for queue_name in queue_names:
+                if self._pending_messages[queue_name]:
+                    return queue_name, self._unwrap_trace(
+                        self._pending_messages[queue_name].popleft()
+                    )
+
+            for queue_name in self._wait_for_messages(queue_names, deadline):
+                try:
+                    self._receive(queue_name, block=False)
+                except Empty:
+                    # e.g. another thread took the message
+                    continue
+
+                if self._pending_messages[queue_name]:
+                    return queue_name, self._unwrap_trace(
+                        self._pending_messages[queue_name].popleft()
+                    )
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise Empty
+
+    def consume_batch(
+        self,
+        queue_name: T.Optional[str] = None,
+        max_items: int = 100,
+        timeout: T.Optional[float] = None,
+    ) -> T.List[T.Any]:
+        """
+        Gets up to max_items messages from the queue in one call.
+        It waits only for the first message, then takes the messages that are already in the queue.
+        Arrays of a shared memory queue are views on its slots, so all messages of the batch
+        except the last one are copied before their slots are freed.
 
-        return message
+        :param queue_name: Name of the queue to read. If there is only one input queue it's possible to omit this argument.
+        :type queue_name: Optional[str]
+
+        :param int max_items: Max number of messages to return.
+
+        :param timeout: Max time in seconds to wait for the first message. If it's None - wait until a message comes.
+        :type timeout: Optional[float]
+
+        :return: List of messages, it's empty if no message came during the timeout.
+
+        :raise: ConfigurationError: if number of queues != 1 and queue name was not given
+        """
+        queue_name = self._get_consume_queue_name(queue_name)
+        pending: T.Deque[T.Any] = self._pending_messages[queue_name]
+
+        try:
+            while not pending:
+                self._receive(queue_name, timeout=timeout)
+
+            while len(pending) < max_items:
+                self._receive(queue_name, block=False)
+        except Empty:
+            pass
+
+        # the trace of the last message of the batch becomes the current one
+        return [
+            self._unwrap_trace(pending.popleft())
+            for _ in range(min(max_items, len(pending)))
+        ]
 
     def has_consume_queue(self, queue_name: str) -> bool:
         return queue_name in self._consume_queues
@@ -230,7 +527,268 @@ class RobotProcess:
 
             consume_queue_name = list(self._consume_queues.keys())[0]
 
-        return self._consume_queues[consume_queue_name].empty()
+        return (
+            not self._pending_messages[consume_queue_name]
+            and self._consume_queues[consume_queue_name].empty()
+        )
+
+    def _get_publish_queue_name(self, queue_name: T.Optional[str]) -> str:
+        if len(self._publish_queues.keys()) == 0:
+            self.log.error(f'Process "{self.name}" has no queues to write.')
+            raise ConfigurationError(
+                f"Publish called with 0 output queues for process {self.name}"
+            )
+
+        if queue_name is None:
+            if len(self._publish_queues.keys()) != 1:
+                self.log.error(
+                    f'Process "{self.name}" has more than one write queue. Specify a write queue name.'
+                )
+                raise ConfigurationError(
+                    f"Publish called with >1 output queues for process {self.name}"
+                )
+            queue_name = list(self._publish_queues.keys())[0]
+
+        return queue_name
+
+    def _get_consume_queue_name(self, queue_name: T.Optional[str]) -> str:
+        if len(self._consume_queues.keys()) == 0:
+            raise ConfigurationError(
+                f"Consume called with 0 input queues for process {self.name}"
+            )
+
+        if queue_name is None:
+            if len(self._consume_queues.keys()) != 1:
+                raise ConfigurationError(
+                    f"Consume called with >1 input queues for process {self.name}"
+                )
+
+            queue_name = list(self._consume_queues.keys())[0]
+
+        return queue_name
+
+    def _put(self, message: T.Any, queue_name: str, clear_on_overflow: bool) -> None:
+        if self._profiling is not None and self._profiling.pending:
+            self._profiling.run_pending()
+
+        self._put_wrapped(
+            self._wrap_message(message, queue_name), queue_name, clear_on_overflow
+        )
+
+    def _wrap_message(self, message: T.Any, queue_name: str) -> T.Any:
+        """Adds the trace, sequence number and telemetry of the process to the message for publishing."""
+        queues: T.List[Queue] = self._publish_queues[queue_name]
+        if self._trace is not None:
+            message = TracedMessage(self._trace.with_hop(self.name, "publish"), message)
+
+        if self._sequence is not None:
+            message = SequencedMessage(self._sequencer.source, self._sequence, message)
+            self._sequence_queues.add(queue_name)
+
+        in_memory: bool = all(getattr(q, "in_memory", False) for q in queues)
+        out_of_band: bool = all(
+            getattr(q, "supports_out_of_band", False) for q in queues
+        )
+        if len(queues) > 1 and not in_memory:
+            # pickle the message once for all consumers
+            message = SerializedMessage.dump(message, out_of_band)
+
+        if self._telemetry is not None:
+            # the size is known only if the message is already pickled, telemetry doesn't pickle it once more
+            nbytes: T.Optional[int] = (
+                message.nbytes if isinstance(message, SerializedMessage) else None
+            )
+            message = TimedMessage(time.time(), nbytes, message)
+
+        return message
+
+    def _put_wrapped(
+        self, message: T.Any, queue_name: str, clear_on_overflow: bool
+    ) -> None:
+        for i, q in enumerate(self._publish_queues[queue_name]):
+            if clear_on_overflow:
+                while q.full():
+                    # the consumer may take the messages first, then full() stops the loop
+                    try:
+                        q.get(timeout=self.POLL_INTERVAL)
+                    except Empty:
+                        continue
+
+                    if self._telemetry is not None:
+                        self._telemetry.on_evicted(queue_name, i)
+            if self._spans is None:
+                q.put(message)
+            else:
+                self._record_blocked("blocked publishing", queue_name, q.put, message)
+
+    def _wait_for_messages(
+        self, queue_names: T.List[str], deadline: T.Optional[float]
+    ) -> T.List[str]:
+        """
+        Blocks until some of the queues have data to read or the deadline comes.
+        Returns names of these queues.
+        Queues that don't expose a pipe reader (e.g. manager queues) are checked with empty() every POLL_INTERVAL.
+        """
+        readers: T.Dict[T.Any, str] = {}
+        polled: T.List[str] = []
+        for queue_name in queue_names:
+            reader = getattr(self._consume_queues[queue_name], "_reader", None)
+            if reader is None:
+                polled.append(queue_name)
+            else:
+                readers[reader] = queue_name
+
+        timeout: T.Optional[float] = None
+        if deadline is not None:
+            timeout = max(0.0, deadline - time.monotonic())
+
+        if polled:
+            timeout = (
+                self.POLL_INTERVAL
+                if timeout is None
+                else min(timeout, self.POLL_INTERVAL)
+            )
+
+        ready: T.List[str] = [q for q in polled if not self._consume_queues[q].empty()]
+        if ready:
+            timeout = 0.0
+
+        if self._spans is None or timeout == 0.0:
+            return ready + [readers[r] for r in wait(list(readers.keys()), timeout)]
+
+        return ready + [
+            readers[r]
+            for r in self._record_blocked(
+                "blocked waiting",
+                ",".join(queue_names),
+                wait,
+                list(readers.keys()),
+                timeout,
+            )
+        ]
+
+    def _receive(
+        self,
+        queue_name: str,
+        block: bool = True,
+        timeout: T.Optional[float] = None,
+        clear_all_messages: bool = False,
+    ) -> None:
+        """Gets the next item from the queue and adds its messages to the pending ones."""
+        queue: Queue = self._consume_queues[queue_name]
+        pending: T.Deque[T.Any] = self._pending_messages[queue_name]
+        self._copy_slot_messages(queue_name)
+        pending_before: int = len(pending)
+
+        if self._spans is None or not block:
+            item: T.Any = self._get_item(queue, block, timeout)
+        else:
+            item = self._record_blocked(
+                "blocked waiting", queue_name, self._get_item, queue, block, timeout
+            )
+        if clear_all_messages:
+            while not queue.empty():
+                item = self._get_item(queue)
+
+        if isinstance(item, SerializedMessage):
+            item = item.load()
+
+        if isinstance(item, TimedMessage):
+            if self._telemetry is not None:
+                self._telemetry.on_consumed(queue_name, item.sent_at, item.nbytes)
+
+            item = item.message
+            if isinstance(item, SerializedMessage):
+                item = item.load()
+
+        if isinstance(item, (SequencedMessage, SequenceEnd)):
+            key: T.Tuple[str, str] = (queue_name, item.source)
+            if key not in self._reorder_buffers:
+                self._reorder_buffers[key] = ReorderBuffer()
+
+            for message in self._reorder_buffers[key].add(item):
+                self._add_pending(queue_name, message)
+        else:
+            self._add_pending(queue_name, item)
+
+        if getattr(queue, "supports_out_of_band", False):
+            self._slot_messages[queue_name] = len(pending) - pending_before
+
+    def _copy_slot_messages(self, queue_name: str) -> None:
+        """
+        The next get() of a shared memory queue frees the slot of its last message,
+        so the messages of that slot which aren't consumed yet (e.g. by consume_batch) are copied.
+        """
+        pending: T.Deque[T.Any] = self._pending_messages[queue_name]
+        count: int = min(self._slot_messages.pop(queue_name, 0), len(pending))
+        for i in range(len(pending) - count, len(pending)):
+            pending[i] = copy.deepcopy(pending[i])
+
+    def _record_blocked(
+        self, name: str, queue_name: str, function: T.Callable, *args
+    ) -> T.Any:
+        """Calls a function that may block on queues and records a span if it has waited."""
+        start: float = time.time()
+        started: float = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            duration: float = time.perf_counter() - started
+            if duration >= self.MIN_BLOCKED_SPAN:
+                self._spans.record(name, start, duration, {"queue": queue_name})
+
+    def _add_pending(self, queue_name: str, item: T.Any) -> None:
+        if isinstance(item, TracedMessage) and isinstance(item.message, MessageBatch):
+            # every message of the batch has the trace
+            self._pending_messages[queue_name].extend(
+                TracedMessage(item.trace, m) for m in item.message
+            )
+        elif isinstance(item, MessageBatch):
+            self._pending_messages[queue_name].extend(item)
+        else:
+            self._pending_messages[queue_name].append(item)
+
+    def _unwrap_trace(self, item: T.Any) -> T.Any:
+        """Makes the trace of the consumed message current and returns the original message."""
+        # every consumed message passes here, so the thread of the process runs the commands for it here
+        if self._profiling is not None and self._profiling.pending:
+            self._profiling.run_pending()
+
+        if isinstance(item, TracedMessage):
+            self._trace = item.trace.with_hop(self.name, "consume")
+            return item.message
+
+        self._trace = None
+        return item
+
+    def _get_item(
+        self, queue: Queue, block: bool = True, timeout: T.Optional[float] = None
+    ) -> T.Any:
+        if self._sequencer is None:
+            return queue.get(block, timeout)
+
+        # a replica has finished the previous message when it takes the next one
+        self._finish_sequence()
+        self._sequence, item = self._sequencer.get(queue, block, timeout)
+        return item
+
+    def _finish_sequence(self) -> None:
+        """Tells consumers of the published messages that the current input message is handled."""
+        if self._sequence is None:
+            return
+
+        end = SequenceEnd(self._sequencer.source, self._sequence)
+        self._sequence = None
+
+        # a message of the input message ends it as well, so the marker goes only to the other queues
+        for queue_name, queues in self._publish_queues.items():
+            if queue_name in self._sequence_queues:
+                continue
+
+            for q in queues:
+                q.put(end)
+
+        self._sequence_queues.clear()
 
     def send_request(
         self,
@@ -238,12 +796,14 @@ class RobotProcess:
         queue_name: T.Optional[str] = None,
         service_name: str = "",
         clear_on_overflow: bool = False,
-    ) -> UUID:
+        timeout: T.Optional[float] = None,
+    ) -> ResponseFuture:
         """
         Wraps 'message' as a Request object (adding current process name and message id for the
         receiving code in order to be able to respond) and then sends
         to all processes that are configured to listen queue_name.
         If there are several processes for listening then everyone will receive a copy of the message.
+        Responses are received in a background thread, so many requests can be in flight at once.
 
         :param message: Any serializable data to transfer over interprocess queues.
 
@@ -258,23 +818,36 @@ class RobotProcess:
         :param bool clear_on_overflow: If this parameter is set and a queue to write is full,
         publish will empty the queue before publishing of new messages.
 
-        :return: message id.
-        :rtype: UUID of the request. You can use it in wait_response() to wait for the response from the remote service
+        :param timeout: Time in seconds after which the request expires if there is no response.
+        If it's None - ResponseRouter.DEFAULT_TTL.
+        :type timeout: Optional[float]
+
+        :return: handle of the request. It's the UUID of the request, its result(timeout) waits for the response.
+        It also can be passed to wait_response().
+        :rtype: ResponseFuture
 
         :raise: ConfigurationError: if number of queues != 1 and queue name was not given
         """
         message = Request(
-            client_process=self.name, service_name=service_name, data=message
+            client_process=self.name,
+            service_name=service_name,
+            data=message,
+            trace=self._trace,
+        )
+        response: ResponseFuture = self._get_response_router().register(
+            message.uid, timeout
         )
         self.publish(message, queue_name, clear_on_overflow)
-        return message.uid
+        return response
 
     def get_request(
         self, queue_name: T.Optional[str] = None, clear_all_messages: bool = False
     ) -> Request:
         return self.consume(queue_name, clear_all_messages)
 
-    def wait_response(self, personal_message_uid: UUID) -> T.Any:
+    def wait_response(
+        self, personal_message_uid: UUID, timeout: T.Optional[float] = None
+    ) -> T.Any:
         """
         Waits for the response Request object created after publishing a personal message.
         The process is blocked until the result of a message with the personal_message_uid arrives.
@@ -287,7 +860,7 @@ class RobotProcess:
         personal_message_uid_2 = self.send_request(message="get_position", queue_name="robot_commands")
 
         position = self.wait_response(personal_message_uid_2)
-        calibration = self.wait_response(personal_message_uid_1)
+        calibration = personal_message_uid_1.result(timeout=5.0)
 
         (Service process that handles messages P2):
         req: Request = self.get_request(queue_name="robot_commands")
@@ -301,24 +874,16 @@ class RobotProcess:
         self.respond_to(response)
 
         :param UUID personal_message_uid: UID of the message to wait for
+        :param timeout: Max time in seconds to wait. If it's None - wait until the request expires.
         :returns the computed data
+        :raise: TimeoutError: if the response didn't come during the timeout or the request has expired
         """
-        if personal_message_uid in self._received_personal_messages:
-            personal_message: Request = self._received_personal_messages[
-                personal_message_uid
-            ]
-            del self._received_personal_messages[personal_message_uid]
-            return personal_message.data
+        router: ResponseRouter = self._get_response_router()
+        future = router.get_future(personal_message_uid)
+        result: T.Any = router.wait(personal_message_uid, timeout)
 
-        while True:
-            if len(self._received_personal_messages) > 50:
-                raise Exception(f"Overflow of personal messages for '{self.name}'!")
-
-            personal_message: Request = self._system_queues[self.name].get()
-            if personal_message.uid == personal_message_uid:
-                return personal_message.data
-
-            self._received_personal_messages[personal_message.uid] = personal_message
+        self._adopt_response_trace(future.trace)
+        return result
 
     def respond_to(self, request: Request) -> None:
         """
@@ -330,7 +895,84 @@ class RobotProcess:
         :param Request request: request with response data
         :return None
         """
-        self._system_queues[request.client_process].put(request)
+        self._system_queues[request.client_process].put(self._trace_response(request))
+
+    def serve_requests(
+        self,
+        handler: T.Callable[[T.Any], T.Any],
+        queue_name: T.Optional[str] = None,
+        max_workers: int = 4,
+    ) -> None:
+        """
+        Handles requests from the queue on a thread pool and responds with the results of the handler.
+        If the handler raises an exception, it's sent as the response and result() of the request raises it.
+        It never returns.
+
+        Example:
+        def run(self) -> None:
+            self.serve_requests(lambda data: self.solve_ik(data), queue_name="ik_requests", max_workers=8)
+
+        :param handler: Function that takes data of a request and returns data of the response.
+        :param queue_name: Name of the queue with requests.
+        :type queue_name: Optional[str]
+        :param int max_workers: Number of requests that are handled at once.
+        """
+        # requests are taken from the queue only when there is a free worker
+        free_workers = BoundedSemaphore(max_workers)
+
+        def handle(request: Request) -> None:
+            try:
+                data: T.Any = handler(request.data)
+            except Exception as e:
+                self.log.error(
+                    f"Failed to handle request {request.uid}.", exc_info=True
+                )
+                data = e
+
+            try:
+                self.respond_to(
+                    Request(
+                        uid=request.uid,
+                        client_process=request.client_process,
+                        data=data,
+                        trace=request.trace,
+                    )
+                )
+            finally:
+                free_workers.release()
+
+        with ThreadPoolExecutor(max_workers, thread_name_prefix=self.name) as executor:
+            while True:
+                free_workers.acquire()
+                executor.submit(handle, self.get_request(queue_name))
+
+    def _adopt_response_trace(self, trace: T.Optional[TraceContext]) -> None:
+        """The trace that came back with the response becomes the current one."""
+        if trace is not None:
+            self._trace = trace.with_hop(self.name, "response")
+
+    def _trace_response(self, request: Request) -> Request:
+        """The response carries the trace of the request with the hop of the responding process."""
+        trace: T.Optional[TraceContext] = request.trace
+        # the current trace of the same request also has the hops of the queues it has passed
+        if self._trace is not None and (
+            trace is None or trace.trace_id == self._trace.trace_id
+        ):
+            trace = self._trace
+
+        if trace is None:
+            return request
+
+        return request.copy(update={"trace": trace.with_hop(self.name, "respond")})
+
+    def _get_response_router(self) -> ResponseRouter:
+        if self._response_router is None:
+            self._response_router = ResponseRouter(
+                self._system_queues[self.name],
+                None if self._profiling is None else self._profiling.handle,
+            )
+
+        return self._response_router
 
     def heartbeat(self, message: str):
         if not self.watcher_queue:
@@ -349,10 +991,13 @@ class RobotProcess:
         except Full:
             self.log.warning("Heartbeat queue is full.")
 
-    def _init_monitoring(self, name):
+    def _init_monitoring(self, name: str, options: T.Any = True) -> None:
         """
         Initializes stack monitoring
-        This feature will sample the stacks of all threads in the process for a period, then log them out
+        This feature samples the stacks of all threads in the process and writes them to a flamegraph file.
+        Options of StackMonitor (sampling_rate, export_interval, output_dir, max_stacks) may be given as a dict.
         """
-        self._stack_monitor = StackMonitor(name)
+        self._stack_monitor = StackMonitor(
+            name, **(options if isinstance(options, dict) else {})
+        )
         self._stack_monitor.start_monitoring()
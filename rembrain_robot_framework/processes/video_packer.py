@@ -1,8 +1,12 @@
+import copy
 import time
 import typing as T
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 
 from rembrain_robot_framework import RobotProcess
+from rembrain_robot_framework.models.trace_context import TraceContext
 from rembrain_robot_framework.pack import Packer
 
 
@@ -17,44 +21,125 @@ class VideoPacker(RobotProcess):
 
     Out:
         Binary tuple of `(rgb, depth, camera)`
+        If the consumed frame is traced, the trace context is added to camera data as `trace`
 
     Args:
         **[Required]** pack_type: Type of packer to use. Possible values are JPG_PNG and JPG.
         Used to construct a :class:`~rembrain_robot_framework.pack.Packer` instance
+
+        parallel_encoding: Encode rgb and depth of JPG_PNG at once on a thread of the packer. Default: False
+
+        pipeline: Pack the next frame on a thread while the previous package is published,
+        it works when frames come faster than they are packed. Default: False
+        Frames of a shared memory queue are copied then, because the next consume frees their slot.
+
+    Average durations of the encoding stages are logged with the sending rate,
+    with 'spans' in config every stage is recorded as a span ('encode rgb', 'encode depth', 'pack').
     """
 
+    # number of packages between logs of the rate
+    LOG_INTERVAL = 300
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.packets_sent = 0
         self.last_timed: float = time.time()
-        self.packer = Packer(kwargs.get("pack_type"))
+        self.packer = Packer(
+            kwargs.get("pack_type"),
+            parallel=bool(kwargs.get("parallel_encoding", False)),
+            on_stage=self._on_stage,
+        )
+        # stage => total duration since the last log
+        self._stage_times: T.DefaultDict[str, float] = defaultdict(float)
+
+        self._pipeline: T.Optional[ThreadPoolExecutor] = None
+        # frames that are views on shared memory slots are copied before packing on the pipeline thread
+        self._copy_frames: bool = False
+        if kwargs.get("pipeline", False):
+            self._pipeline = ThreadPoolExecutor(
+                1, thread_name_prefix=f"{self.name}-pipeline"
+            )
+            self._copy_frames = any(
+                getattr(q, "supports_out_of_band", False)
+                for q in self._consume_queues.values()
+            )
 
     def run(self):
         self.log.info(f"{self.__class__.__name__} started, name: {self.name}.")
 
+        # package that is packed on the pipeline thread and the trace of its frame
+        pending: T.Optional[T.Tuple[Future, T.Optional[TraceContext]]] = None
+
         while True:
-            camera = {}
-            if hasattr(self.shared, "camera"):
-                camera: T.Any = self.shared.camera.copy()
-
-            result = self.consume()
-            if len(result) == 2:
-                rgb, depth = result
-            elif len(result) == 3:
-                rgb, depth, camera = result
-            else:
-                raise Exception(
-                    f"video_packer consumes tuples with 2 or 3 elements. Got {len(result)} elements."
-                )
-
-            camera["time"] = datetime.now(timezone.utc).timestamp()
-            buffer: bytes = self.packer.pack(rgb, depth, camera)
-            self.publish(buffer)
-
-            self.packets_sent += 1
-            if self.packets_sent % 300 == 0:
-                self.log.info(
-                    f"Current video sending rate is {300 / (time.time() - self.last_timed)} fps."
-                )
-                self.last_timed = time.time()
+            rgb, depth, camera = self._consume_frame()
+
+            if self._pipeline is None:
+                self._publish_package(self.packer.pack(rgb, depth, camera), self.trace)
+                continue
+
+            if self._copy_frames:
+                rgb, depth = copy.deepcopy((rgb, depth))
+
+            future: Future = self._pipeline.submit(self.packer.pack, rgb, depth, camera)
+            if pending is not None:
+                self._publish_package(pending[0].result(), pending[1])
+
+            pending = (future, self.trace)
+            # without the next frame the package is published at once, so the pipeline doesn't add latency
+            if self.is_empty():
+                self._publish_package(future.result(), pending[1])
+                pending = None
+
+    def close_objects(self) -> None:
+        if self._pipeline is not None:
+            self._pipeline.shutdown(wait=False)
+
+        self.packer.close()
+
+    def _consume_frame(self) -> T.Tuple[T.Any, T.Any, dict]:
+        camera = {}
+        if hasattr(self.shared, "camera"):
+            camera: T.Any = self.shared.camera.copy()
+
+        result = self.consume()
+        if len(result) == 2:
+            rgb, depth = result
+        elif len(result) == 3:
+            rgb, depth, camera = result
+        else:
+            raise Exception(
+                f"video_packer consumes tuples with 2 or 3 elements. Got {len(result)} elements."
+            )
+
+        camera["time"] = datetime.now(timezone.utc).timestamp()
+        if self.trace is not None:
+            # the trace goes with the frame through the websocket
+            camera["trace"] = self.trace.with_hop(self.name, "pack").dict()
+
+        return rgb, depth, camera
+
+    def _publish_package(self, buffer: bytes, trace: T.Optional[TraceContext]) -> None:
+        # with the pipeline the current trace may belong to the next frame already
+        self.trace = trace
+        self.publish(buffer)
+
+        self.packets_sent += 1
+        if self.packets_sent % self.LOG_INTERVAL == 0:
+            stages: str = ", ".join(
+                f"{stage} {total / self.LOG_INTERVAL * 1000:.1f} ms"
+                for stage, total in self._stage_times.items()
+            )
+            self.log.info(
+                f"Current video sending rate is {self.LOG_INTERVAL / (time.time() - self.last_timed)} fps, "
+                f"encoding: {stages}."
+            )
+            self.last_timed = time.time()
+            self._stage_times.clear()
+
+    def _on_stage(self, stage: str, start: float, duration: float) -> None:
+        self._stage_times[stage] += duration
+        if self._spans is not None:
+            self._spans.record(
+                "pack" if stage == "pack" else f"encode {stage}", start, duration
+            )
@@ -3,6 +3,7 @@ import time
 from typing import Union
 
 from rembrain_robot_framework import RobotProcess
+from rembrain_robot_framework.models.trace_context import TraceContext
 from rembrain_robot_framework.pack import Unpacker
 
 
@@ -14,6 +15,7 @@ class VideoUnpacker(RobotProcess):
     Out:
         Tuple of `(rgb, depth, camera)`
         Also sets the `shared.camera` field, if it exists in the `self.shared` dictionary
+        If camera data has a trace context, it becomes the trace of the published frame
 
     """
 
@@ -31,9 +33,20 @@ class VideoUnpacker(RobotProcess):
 
                     if isinstance(response_data, bytes):
                         rgb, depth16, camera = self.unpacker.unpack(response_data)
-
-                        if hasattr(self.shared, "camera"):
-                            self.shared.camera["camera"] = json.loads(camera)
+                        # camera data is parsed only if it's needed, it's None for an incomplete package
+                        if camera is not None and (
+                            hasattr(self.shared, "camera") or '"trace"' in camera
+                        ):
+                            camera_data: dict = json.loads(camera)
+
+                            if hasattr(self.shared, "camera"):
+                                self.shared.camera["camera"] = camera_data
+
+                            # the trace of the frame continues from the packing process
+                            if "trace" in camera_data:
+                                self.trace = TraceContext(
+                                    **camera_data["trace"]
+                                ).with_hop(self.name, "unpack")
 
                         self.publish((rgb, depth16, camera), clear_on_overflow=True)
                     else:
@@ -5,10 +5,11 @@ import typing as T
 import websockets
 from pika.exchange_type import ExchangeType
 
-from rembrain_robot_framework import RobotProcess
+from rembrain_robot_framework import AsyncRobotProcess
 from rembrain_robot_framework.enums.rpc_user_type import RpcUserType
 from rembrain_robot_framework.models.request import Request
 from rembrain_robot_framework.models.bind_request import BindRequest
+from rembrain_robot_framework.models.trace_context import TraceContext
 from rembrain_robot_framework.utils import get_arg_with_env_fallback
 from rembrain_robot_framework.ws import WsCommandType, WsRequest
 from rembrain_robot_framework.ws.log_adapter import WsLogAdapter
@@ -16,7 +17,7 @@ from rembrain_robot_framework.ws.log_adapter import WsLogAdapter
 
 
 # todo divide into 2 classes ?
-class WsRobotProcess(RobotProcess):
+class WsRobotProcess(AsyncRobotProcess):
     """
     Process that communicates with a remote websocket server.
     Pulling/pushing data between the program and the weboscket exchange.
@@ -79,17 +80,17 @@ class WsRobotProcess(RobotProcess):
         self.ping_interval = float(kwargs.get("ping_interval", 1.0))
         self.connection_timeout = float(kwargs.get("connection_timeout", 1.5))
 
-    def run(self) -> None:
+    async def run(self) -> None:
         self.log.info(f"{self.__class__.__name__} started, name: {self.name}")
-            
+
         if self.command_type == WsCommandType.PULL:
-            asyncio.run(self._connect_ws(self._pull_callback))
+            await self._connect_ws(self._pull_callback)
 
         elif self.command_type == WsCommandType.PUSH_LOOP:
-            asyncio.run(self._connect_ws(self._push_loop_callback))
+            await self._connect_ws(self._push_loop_callback)
 
         elif self.command_type == WsCommandType.BIDIRECTIONAL:
-            asyncio.run(self._connect_ws(self.bidirectional_callback))
+            await self._connect_ws(self.bidirectional_callback)
 
     async def bidirectional_callback(self, ws):
         await asyncio.gather(
@@ -107,11 +108,12 @@ class WsRobotProcess(RobotProcess):
             # If it's a string, then it's a control(ping) packet
             if type(data) is bytes:
                 parsed: T.Any = self._parser(data)
+                self._add_trace_hop(parsed, "pull")
 
                 if self.rpc_user_type == RpcUserType.CLIENT:
-                    self.respond_to(parsed)
+                    await self.arespond_to(parsed)
                 else:
-                    self.publish(parsed)
+                    await self.apublish(parsed)
 
             # Strings are received only for control packets - right now it's only pings
             elif type(data) is str and data != WsCommandType.PING:
@@ -174,24 +176,22 @@ class WsRobotProcess(RobotProcess):
     async def _send_to_ws(self, ws):
         """Gets data to send from the consume_queue (MUST be binary) and sends it to websocket"""
         while True:
-            if self.is_empty():
-                await asyncio.sleep(0.01)
-                continue
-
             if self.rpc_user_type == RpcUserType.CLIENT:
-                personal_message: Request = self.get_request()
+                personal_message: Request = await self.aget_request()
                 # todo what to do if service never exists ? for example server name is incorrect
                 if not personal_message.service_name:
                     raise RuntimeError("Service name for personal message is absent.")
 
+                self._add_trace_hop(personal_message, "push")
                 data: bytes = personal_message.to_bson()
 
             elif self.rpc_user_type == RpcUserType.SERVICE:
-                personal_bind_message: BindRequest = self.consume()
+                personal_bind_message: BindRequest = await self.aconsume()
+                self._add_trace_hop(personal_bind_message, "push")
                 data: bytes = personal_bind_message.to_bson()
 
             else:
-                data: bytes = self.consume()
+                data: bytes = await self.aconsume()
 
             if not isinstance(data, bytes):
                 self.log.error(f"Trying to send non-binary data to push: {data}")
@@ -199,6 +199,29 @@ class WsRobotProcess(RobotProcess):
 
             await ws.send(data)
 
+    def _add_trace_hop(self, message: T.Any, stage: str) -> None:
+        """
+        Requests carry their trace context through the websocket, so the trace continues on the other side.
+        The trace of a pulled request becomes the current one.
+        """
+        request: T.Any = (
+            message.request if isinstance(message, BindRequest) else message
+        )
+        if not isinstance(request, Request):
+            return
+
+        if stage == "pull":
+            trace: T.Optional[TraceContext] = request.trace
+        else:
+            # the current trace also has the hops of the queues the request has passed
+            trace = self.trace if self.trace is not None else request.trace
+
+        if trace is not None:
+            request.trace = trace.with_hop(self.name, stage)
+
+        if stage == "pull":
+            self.trace = request.trace
+
     def _get_control_packet(self) -> str:
         extra_params = {}
 
@@ -0,0 +1,13 @@
+# ATTENTION! It must be first!
+from .message_batch import MessageBatch
+from .serialized_message import SerializedMessage
+from .sequence import ReorderBuffer, SequencedMessage, SequenceEnd, Sequencer
+from .timed_message import TimedMessage
+from .traced_message import TracedMessage
+
+from .shared_memory_queue import SharedMemoryQueue
+from .latest_value_queue import LatestValueQueue
+from .thread_queue import ThreadQueue
+from .pipe_queue import PipeQueue
+from .disk_spill import DiskSpill
+from .policy_queue import OverflowPolicy, PolicyQueue
@@ -0,0 +1,66 @@
+import os
+import typing as T
+from multiprocessing.context import BaseContext
+
+
+class DiskSpill:
+    """
+    Bounded FIFO buffer of serialized messages on disk, shared between processes.
+    Every message is stored in a separate file of the directory.
+
+    :param directory: Directory for the files, it must exist.
+    :param max_bytes: Max total size of the stored messages.
+    :param ctx: Multiprocessing context used to create the shared counters.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ctx: BaseContext):
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+
+        self._lock = ctx.Lock()
+        # numbers of the first stored message and of the next message to store
+        self._head = ctx.Value("Q", 0, lock=False)
+        self._tail = ctx.Value("Q", 0, lock=False)
+        self._bytes = ctx.Value("Q", 0, lock=False)
+
+    def __len__(self) -> int:
+        return self._tail.value - self._head.value
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes.value
+
+    def push(self, data: T.Any) -> bool:
+        """Stores the message. Returns False if there is no place for it."""
+        size: int = len(data)
+
+        with self._lock:
+            if self._bytes.value + size > self.max_bytes:
+                return False
+
+            with open(self._path(self._tail.value), "wb") as f:
+                f.write(data)
+
+            self._tail.value += 1
+            self._bytes.value += size
+
+        return True
+
+    def pop(self) -> T.Optional[bytes]:
+        """Takes the oldest message. Returns None if the buffer is empty."""
+        with self._lock:
+            if self._head.value == self._tail.value:
+                return None
+
+            path: str = self._path(self._head.value)
+            with open(path, "rb") as f:
+                data: bytes = f.read()
+
+            os.remove(path)
+            self._head.value += 1
+            self._bytes.value -= len(data)
+
+        return data
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{number:012d}.msg")
@@ -0,0 +1,154 @@
+import multiprocessing
+import struct
+import time
+import typing as T
+import weakref
+from multiprocessing.context import BaseContext
+from multiprocessing.reduction import ForkingPickler
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty
+
+# sequence number, message size, message is taken, wake-up is sent, name of the data memory block
+_HEADER = struct.Struct("QQ??64s")
+
+
+class LatestValueQueue:
+    """
+    Inter-process queue that holds only the newest message, so consumers always get the freshest one.
+
+    The message is kept in a shared memory block, put() overwrites it in O(1) and never blocks.
+    The block grows if a bigger message comes. A pipe is used only to wake up waiting consumers.
+    A consumer gets each message at most once.
+
+    :param ctx: Multiprocessing context used to create the queue primitives.
+    :param capacity: Initial size of the memory block for the message in bytes.
+    """
+
+    _maxsize = 1
+    INITIAL_CAPACITY = 1 << 20
+
+    def __init__(
+        self, ctx: T.Optional[BaseContext] = None, capacity: int = INITIAL_CAPACITY
+    ):
+        if ctx is None:
+            ctx = multiprocessing.get_context()
+
+        self._header = SharedMemory(create=True, size=_HEADER.size)
+        self._data = SharedMemory(create=True, size=capacity)
+        self._write_header(0, 0, True, False, self._data.name)
+        # only the creator of the queue removes its memory
+        weakref.finalize(self, _unlink_memory, self._header)
+
+        self._lock = ctx.Lock()
+        self._reader, self._writer = ctx.Pipe(duplex=False)
+
+    def put(
+        self, obj: T.Any, block: bool = True, timeout: T.Optional[float] = None
+    ) -> None:
+        data = ForkingPickler.dumps(obj)
+        size: int = len(data)
+
+        with self._lock:
+            sequence, _, _, notified, name = self._read_header()
+            self._attach_data(name)
+
+            if size > self._data.size:
+                self._grow_data(size)
+
+            self._data.buf[:size] = data
+            self._write_header(sequence + 1, size, False, True, self._data.name)
+
+            # only one wake-up is waiting in the pipe, so it never fills up
+            if not notified:
+                self._writer.send_bytes(b"")
+
+    def get(self, block: bool = True, timeout: T.Optional[float] = None) -> T.Any:
+        if not block:
+            timeout = 0.0
+
+        deadline: T.Optional[float] = (
+            None if timeout is None else time.monotonic() + timeout
+        )
+        while True:
+            remaining: T.Optional[float] = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+
+            if not self._reader.poll(remaining):
+                raise Empty
+
+            with self._lock:
+                sequence, size, taken, notified, name = self._read_header()
+                if notified:
+                    self._reader.recv_bytes()
+
+                # another consumer might take the message while we were waiting for the lock
+                if not taken:
+                    self._attach_data(name)
+                    message: T.Any = ForkingPickler.loads(self._data.buf[:size])
+                    self._write_header(sequence, size, True, False, name)
+                    return message
+
+                self._write_header(sequence, size, taken, False, name)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise Empty
+
+    def put_nowait(self, obj: T.Any) -> None:
+        self.put(obj, False)
+
+    def get_nowait(self) -> T.Any:
+        return self.get(False)
+
+    def qsize(self) -> int:
+        return 0 if self.empty() else 1
+
+    def empty(self) -> bool:
+        _, _, taken, _, _ = self._read_header()
+        return taken
+
+    def full(self) -> bool:
+        # a new message always replaces the old one
+        return False
+
+    def _read_header(self) -> T.Tuple[int, int, bool, bool, str]:
+        sequence, size, taken, notified, name = _HEADER.unpack_from(self._header.buf)
+        return sequence, size, taken, notified, name.rstrip(b"\0").decode()
+
+    def _write_header(
+        self, sequence: int, size: int, taken: bool, notified: bool, name: str
+    ) -> None:
+        _HEADER.pack_into(
+            self._header.buf, 0, sequence, size, taken, notified, name.encode()
+        )
+
+    def _attach_data(self, name: str) -> None:
+        """Switches to the current memory block if another process has replaced it with a bigger one."""
+        if self._data.name != name:
+            self._data.close()
+            self._data = SharedMemory(name=name)
+
+    def _grow_data(self, size: int) -> None:
+        old_data = self._data
+        self._data = SharedMemory(create=True, size=max(size, 2 * old_data.size))
+
+        # processes that have mapped the old block still can read it
+        old_data.close()
+        try:
+            old_data.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _unlink_memory(header: SharedMemory) -> None:
+    data_name: str = _HEADER.unpack_from(header.buf)[4].rstrip(b"\0").decode()
+    header.close()
+    header.unlink()
+
+    try:
+        data = SharedMemory(name=data_name)
+    except FileNotFoundError:
+        return
+
+    data.close()
+    data.unlink()
@@ -0,0 +1,5 @@
+class MessageBatch(list):
+    """
+    Several messages that go through a queue as one item.
+    RobotProcess.consume returns them one by one, RobotProcess.consume_batch returns them at once.
+    """
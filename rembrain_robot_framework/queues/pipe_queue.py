@@ -0,0 +1,119 @@
+import multiprocessing
+import time
+import typing as T
+from multiprocessing.context import BaseContext
+from multiprocessing.reduction import ForkingPickler
+from queue import Empty, Full
+from threading import Lock
+
+
+class PipeQueue:
+    """
+    Inter-process queue for one publishing and one consuming process, which is a plain pipe.
+
+    Unlike multiprocessing.Queue it has no feeder thread:
+    put() pickles the message and writes it into the pipe right away, get() reads it.
+    The number of messages is limited by a semaphore and counted by two counters,
+    each of them is written by one side only, so qsize()/full()/empty() work like for other queues.
+
+    put() writes the message in the calling thread, so a message bigger than the pipe buffer (64 KB on Linux)
+    is written while the consumer reads it: block and timeout limit only the wait for a free place.
+    Use it for small messages that need low latency, multiprocessing.Queue buffers big ones in its feeder thread.
+
+    Only one process may put, threads of it share a local write lock.
+    Reads are guarded by a lock shared between processes, because the publisher also gets messages
+    when it evicts them (publish with clear_on_overflow).
+
+    :param maxsize: Max number of messages in the queue.
+    :param ctx: Multiprocessing context used to create the queue primitives.
+    """
+
+    def __init__(self, maxsize: int, ctx: T.Optional[BaseContext] = None):
+        if maxsize <= 0:
+            raise ValueError("Pipe queue must have a positive max size.")
+
+        if ctx is None:
+            ctx = multiprocessing.get_context()
+
+        self._maxsize: int = maxsize
+        self._reader, self._writer = ctx.Pipe(duplex=False)
+        self._free_places = ctx.BoundedSemaphore(maxsize)
+
+        # written only by the publisher and by the consumer respectively
+        self._sent = ctx.Value("Q", 0, lock=False)
+        self._received = ctx.Value("Q", 0, lock=False)
+
+        # poll() and recv_bytes() of a reader must not be split by a reader of another process
+        self._read_lock = ctx.Lock()
+        self._init_write_lock()
+
+    def put(
+        self, obj: T.Any, block: bool = True, timeout: T.Optional[float] = None
+    ) -> None:
+        data = ForkingPickler.dumps(obj)
+
+        if not self._free_places.acquire(block, timeout):
+            raise Full
+
+        with self._write_lock:
+            # it's counted before sending, so the consumer never sees more received messages than sent
+            self._sent.value += 1
+            try:
+                self._writer.send_bytes(data)
+            except BaseException:
+                self._sent.value -= 1
+                self._free_places.release()
+                raise
+
+    def get(self, block: bool = True, timeout: T.Optional[float] = None) -> T.Any:
+        deadline: T.Optional[float] = None
+        if block and timeout is not None:
+            deadline = time.monotonic() + timeout
+
+        if not self._read_lock.acquire(block, timeout):
+            raise Empty
+
+        try:
+            if not block:
+                timeout = 0.0
+            elif deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+
+            if not self._reader.poll(timeout):
+                raise Empty
+
+            data: bytes = self._reader.recv_bytes()
+            self._received.value += 1
+        finally:
+            self._read_lock.release()
+
+        self._free_places.release()
+        return ForkingPickler.loads(data)
+
+    def put_nowait(self, obj: T.Any) -> None:
+        self.put(obj, False)
+
+    def get_nowait(self) -> T.Any:
+        return self.get(False)
+
+    def qsize(self) -> int:
+        return max(self._sent.value - self._received.value, 0)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        return self.qsize() >= self._maxsize
+
+    def _init_write_lock(self) -> None:
+        # threads of one process must not interleave their messages in the pipe
+        self._write_lock = Lock()
+
+    def __getstate__(self) -> dict:
+        state: dict = self.__dict__.copy()
+        del state["_write_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._init_write_lock()
@@ -0,0 +1,208 @@
+import time
+import typing as T
+from enum import Enum
+from multiprocessing.context import BaseContext
+from multiprocessing.reduction import ForkingPickler
+from queue import Empty, Full
+
+from rembrain_robot_framework.queues.disk_spill import DiskSpill
+from rembrain_robot_framework.queues.serialized_message import SerializedMessage
+
+
+class OverflowPolicy(str, Enum):
+    # wait until there is a place in the queue, drop the message after the timeout (if it's set)
+    BLOCK = "block"
+    # drop the new message
+    DROP_NEW = "drop_new"
+    # drop the oldest messages of the queue to make a place for the new one
+    DROP_OLDEST = "drop_oldest"
+    # store messages to a bounded buffer on disk while the queue is full
+    SPILL = "spill"
+
+
+class PolicyQueue:
+    """
+    Wraps an inter-process queue and applies an overflow policy when a message is put into the full queue,
+    so one slow consumer doesn't stall its producers.
+    Every dropped message is counted in a counter shared between processes.
+
+    If max_bytes is set, the queue is also full when the serialized messages in it take max_bytes.
+    Such queue holds messages as SerializedMessage, RobotProcess.consume loads them.
+    A message bigger than max_bytes is accepted only by the empty queue.
+
+    :param queue: Queue to wrap.
+    :param policy: What to do when the queue is full.
+    :param ctx: Multiprocessing context used to create the shared counter.
+    :param timeout: Max time in seconds to wait for a place with the 'block' policy. None - wait forever.
+    :param spill: Disk buffer for the 'spill' policy. Messages are dropped when it is full too.
+    :param max_bytes: Max total size of the serialized messages in the queue. None - no limit.
+    """
+
+    def __init__(
+        self,
+        queue: T.Any,
+        policy: T.Union[OverflowPolicy, str],
+        ctx: BaseContext,
+        timeout: T.Optional[float] = None,
+        spill: T.Optional[DiskSpill] = None,
+        max_bytes: T.Optional[int] = None,
+    ):
+        self.policy = OverflowPolicy(policy)
+        if self.policy == OverflowPolicy.SPILL and spill is None:
+            raise ValueError("Disk spill is required for the 'spill' overflow policy.")
+
+        self._queue: T.Any = queue
+        self._timeout: T.Optional[float] = timeout
+        self._spill: T.Optional[DiskSpill] = spill
+        self._dropped = ctx.Value("Q", 0)
+
+        self.max_bytes: T.Optional[int] = max_bytes
+        self._bytes = ctx.Value("Q", 0, lock=False)
+        self._bytes_changed = ctx.Condition()
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped.value
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the serialized messages in the queue (it's counted only if max_bytes is set)."""
+        return self._bytes.value
+
+    @property
+    def supports_out_of_band(self) -> bool:
+        return getattr(self._queue, "supports_out_of_band", False)
+
+    @property
+    def _maxsize(self) -> T.Optional[int]:
+        return getattr(self._queue, "_maxsize", None)
+
+    @property
+    def _reader(self) -> T.Any:
+        # spilled messages don't wake up the pipe, such queue has to be polled
+        if self._spill is not None:
+            return None
+
+        return getattr(self._queue, "_reader", None)
+
+    def put(
+        self, obj: T.Any, block: bool = True, timeout: T.Optional[float] = None
+    ) -> None:
+        if self.max_bytes is not None and not isinstance(obj, SerializedMessage):
+            obj = SerializedMessage.dump(obj)
+
+        if self.policy == OverflowPolicy.BLOCK:
+            if timeout is None:
+                timeout = self._timeout
+
+            deadline: T.Optional[float] = (
+                None if timeout is None else time.monotonic() + timeout
+            )
+            if not self._reserve(obj, timeout if block else 0.0):
+                self._drop()
+                return
+
+            try:
+                remaining: T.Optional[float] = None
+                if deadline is not None:
+                    remaining = max(0.0, deadline - time.monotonic())
+
+                self._queue.put(obj, block, remaining)
+            except Full:
+                self._release(obj)
+                self._drop()
+
+        elif self.policy == OverflowPolicy.DROP_NEW:
+            if not self._put_nowait(obj):
+                self._drop()
+
+        elif self.policy == OverflowPolicy.DROP_OLDEST:
+            while not self._put_nowait(obj):
+                try:
+                    self.get_nowait()
+                    self._drop()
+                except Empty:
+                    pass
+
+        elif self.policy == OverflowPolicy.SPILL:
+            # while there are spilled messages, new ones go after them to keep the order
+            if len(self._spill) == 0 and self._put_nowait(obj):
+                return
+
+            if not self._spill.push(ForkingPickler.dumps(obj)):
+                self._drop()
+
+    def get(self, block: bool = True, timeout: T.Optional[float] = None) -> T.Any:
+        # messages in the queue are older than the spilled ones
+        if self._spill is not None and len(self._spill) > 0 and self._queue.empty():
+            data: T.Optional[bytes] = self._spill.pop()
+            if data is not None:
+                return ForkingPickler.loads(data)
+
+        obj: T.Any = self._queue.get(block, timeout)
+        self._release(obj)
+        return obj
+
+    def put_nowait(self, obj: T.Any) -> None:
+        self.put(obj, False)
+
+    def get_nowait(self) -> T.Any:
+        return self.get(False)
+
+    def qsize(self) -> int:
+        spilled: int = len(self._spill) if self._spill is not None else 0
+        return self._queue.qsize() + spilled
+
+    def empty(self) -> bool:
+        if self._spill is not None and len(self._spill) > 0:
+            return False
+
+        return self._queue.empty()
+
+    def full(self) -> bool:
+        if self.max_bytes is not None and self._bytes.value >= self.max_bytes:
+            return True
+
+        return self._queue.full()
+
+    def _put_nowait(self, obj: T.Any) -> bool:
+        if not self._reserve(obj, 0.0):
+            return False
+
+        try:
+            self._queue.put_nowait(obj)
+        except Full:
+            self._release(obj)
+            return False
+
+        return True
+
+    def _reserve(self, obj: T.Any, timeout: T.Optional[float]) -> bool:
+        """Waits until the message fits into max_bytes and counts its size."""
+        if self.max_bytes is None:
+            return True
+
+        size: int = obj.nbytes
+        with self._bytes_changed:
+            if not self._bytes_changed.wait_for(
+                lambda: self._bytes.value == 0
+                or self._bytes.value + size <= self.max_bytes,
+                timeout,
+            ):
+                return False
+
+            self._bytes.value += size
+
+        return True
+
+    def _release(self, obj: T.Any) -> None:
+        if self.max_bytes is None:
+            return
+
+        with self._bytes_changed:
+            self._bytes.value -= obj.nbytes
+            self._bytes_changed.notify_all()
+
+    def _drop(self) -> None:
+        with self._dropped.get_lock():
+            self._dropped.value += 1
@@ -0,0 +1,114 @@
+import logging
+import typing as T
+from collections import defaultdict
+from multiprocessing.context import BaseContext
+from queue import Empty
+
+log = logging.getLogger(__name__)
+
+
+class SequencedMessage:
+    """Message published by a replica while it handled the input message with the given sequence number."""
+
+    __slots__ = ("source", "sequence", "message")
+
+    def __init__(self, source: str, sequence: int, message: T.Any):
+        self.source: str = source
+        self.sequence: int = sequence
+        self.message: T.Any = message
+
+
+class SequenceEnd:
+    """
+    Marker that a replica has finished handling the input message with the given sequence number.
+    It's sent only to the queues the replica has published nothing into for that input message.
+    """
+
+    __slots__ = ("source", "sequence")
+
+    def __init__(self, source: str, sequence: int):
+        self.source: str = source
+        self.sequence: int = sequence
+
+
+class Sequencer:
+    """
+    Numbers messages that replicas of a process take from their shared consume queue.
+    Taking a message and its number is atomic, so numbers follow the order of the queue.
+
+    :param source: Name of the replicated process.
+    :param ctx: Multiprocessing context used to create the shared counter.
+    """
+
+    def __init__(self, source: str, ctx: BaseContext):
+        self.source: str = source
+        self._lock = ctx.Lock()
+        self._next = ctx.Value("Q", 0, lock=False)
+
+    def get(
+        self, queue: T.Any, block: bool = True, timeout: T.Optional[float] = None
+    ) -> T.Tuple[int, T.Any]:
+        """Gets a message from the queue with its sequence number."""
+        if not self._lock.acquire(block, timeout):
+            raise Empty
+
+        try:
+            item: T.Any = queue.get(block, timeout)
+            sequence: int = self._next.value
+            self._next.value += 1
+        finally:
+            self._lock.release()
+
+        return sequence, item
+
+
+class ReorderBuffer:
+    """
+    Restores the order of messages published by replicas.
+    Messages of the input message N are released after the messages (or the end markers) of all input messages
+    before N. The first message of an input message ends it, so its further messages are released as they come.
+    Publish them in one publish_many() call to keep them together.
+
+    :param max_pending: Max number of sequence numbers to wait for. If there are more of them
+    (e.g. a replica was killed while it handled a message), the missing numbers are skipped.
+    """
+
+    MAX_PENDING = 1000
+
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.max_pending: int = max_pending
+        self._next: int = 0
+        self._messages: T.DefaultDict[int, T.List[T.Any]] = defaultdict(list)
+        self._ended: T.Set[int] = set()
+
+    def add(self, item: T.Union[SequencedMessage, SequenceEnd]) -> T.List[T.Any]:
+        """Adds a message or an end marker and returns the messages that are ready in order."""
+        if isinstance(item, SequencedMessage):
+            # further messages of an input message that is already released don't wait
+            if item.sequence < self._next:
+                return [item.message]
+
+            self._messages[item.sequence].append(item.message)
+
+        if item.sequence >= self._next:
+            self._ended.add(item.sequence)
+
+        pending: int = len(self._ended)
+        if pending > self.max_pending:
+            skip_to: int = min(self._ended)
+            log.warning(
+                f"Messages {self._next}-{skip_to - 1} were lost, reordering continues from {skip_to}."
+            )
+            self._next = skip_to
+
+        return self._release()
+
+    def _release(self) -> T.List[T.Any]:
+        ready: T.List[T.Any] = []
+        while True:
+            ready.extend(self._messages.pop(self._next, ()))
+            if self._next not in self._ended:
+                return ready
+
+            self._ended.remove(self._next)
+            self._next += 1
@@ -0,0 +1,44 @@
+import pickle
+import typing as T
+
+
+class SerializedMessage:
+    """
+    Message that is pickled once in the publishing process, so the same bytes can be put
+    into several queues without pickling the message for each of them.
+    RobotProcess.consume loads the original message back.
+
+    Out-of-band buffers (pickle protocol 5) point to the memory of the original message.
+    They are used only for queues that copy them at put(), e.g. SharedMemoryQueue.
+    """
+
+    __slots__ = ("header", "buffers")
+
+    def __init__(self, header: bytes, buffers: T.Tuple[T.Any, ...] = ()):
+        self.header: bytes = header
+        self.buffers: T.Tuple[T.Any, ...] = buffers
+
+    @classmethod
+    def dump(cls, message: T.Any, out_of_band: bool = False) -> "SerializedMessage":
+        if not out_of_band:
+            return cls(pickle.dumps(message, protocol=5))
+
+        buffers: T.List[pickle.PickleBuffer] = []
+        header: bytes = pickle.dumps(
+            message, protocol=5, buffer_callback=buffers.append
+        )
+        return cls(header, tuple(b.raw() for b in buffers))
+
+    def load(self) -> T.Any:
+        return pickle.loads(self.header, buffers=self.buffers)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.header) + sum(memoryview(b).nbytes for b in self.buffers)
+
+    def __reduce__(self):
+        if self.buffers:
+            # memory views can't be pickled - pass the message in-band
+            return SerializedMessage, (pickle.dumps(self.load(), protocol=5),)
+
+        return SerializedMessage, (self.header,)
@@ -0,0 +1,162 @@
+import logging
+import multiprocessing
+import pickle
+import time
+import typing as T
+import weakref
+from multiprocessing.context import BaseContext
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty, Full
+
+from rembrain_robot_framework.queues.serialized_message import SerializedMessage
+
+log = logging.getLogger(__name__)
+
+
+class SharedMemoryQueue:
+    """
+    Inter-process queue that keeps message buffers (e.g. numpy frames) in a ring of fixed-size
+    shared memory slots. Only a small pickled header goes through the pipe.
+
+    Messages are pickled with protocol 5, so every contiguous numpy array is written straight into
+    the slot and the consumer gets arrays that are views on the slot memory.
+    A view stays valid until the next get() on the same queue object - copy the array if you need to keep it longer.
+    Messages which buffers don't fit into a slot are sent through the pipe as usual.
+    Out-of-band buffers of a SerializedMessage are copied into the slot as they are.
+
+    :param slot_size: Size of one slot in bytes. It should fit all arrays of a message, e.g. rgb + depth frame.
+    :param maxsize: Number of slots, i.e. max number of messages in the queue.
+    :param ctx: Multiprocessing context used to create the queue primitives.
+    """
+
+    supports_out_of_band = True
+
+    def __init__(
+        self, slot_size: int, maxsize: int, ctx: T.Optional[BaseContext] = None
+    ):
+        if slot_size <= 0:
+            raise ValueError("Slot size of shared memory queue must be positive.")
+
+        if maxsize <= 0:
+            raise ValueError("Shared memory queue must have a positive max size.")
+
+        if ctx is None:
+            ctx = multiprocessing.get_context()
+
+        self._slot_size: int = slot_size
+        self._maxsize: int = maxsize
+
+        self._shm = SharedMemory(create=True, size=slot_size * maxsize)
+        # only the creator of the memory block removes it
+        weakref.finalize(self, _unlink_memory, self._shm)
+
+        # (slot, header, buffer sizes) of published messages
+        self._index = ctx.Queue(maxsize=maxsize)
+        self._free_slots = ctx.Queue(maxsize=maxsize)
+        for slot in range(maxsize):
+            self._free_slots.put(slot)
+
+        # slot that backs the arrays returned by the last get()
+        self._held_slot: T.Optional[int] = None
+
+    @property
+    def slot_size(self) -> int:
+        return self._slot_size
+
+    @property
+    def _reader(self) -> T.Any:
+        """Pipe end that becomes readable when a message comes, used by RobotProcess.consume_any."""
+        return self._index._reader
+
+    def put(
+        self, obj: T.Any, block: bool = True, timeout: T.Optional[float] = None
+    ) -> None:
+        # a process that both gets and puts (e.g. publish with clear_on_overflow) evicts messages
+        self._release_held_slot()
+
+        if not isinstance(obj, SerializedMessage):
+            obj = SerializedMessage.dump(obj, out_of_band=True)
+
+        if not obj.buffers:
+            self._index.put((None, obj.header, ()), block, timeout)
+            return
+
+        sizes: T.List[int] = [b.nbytes for b in obj.buffers]
+        if sum(sizes) > self._slot_size:
+            log.debug(
+                f"Message of {sum(sizes)} bytes exceeds the slot size {self._slot_size}, it is sent through the pipe."
+            )
+            self._index.put(
+                (None, pickle.dumps(obj.load(), protocol=5), ()), block, timeout
+            )
+            return
+
+        deadline: T.Optional[float] = None
+        if block and timeout is not None:
+            deadline = time.monotonic() + timeout
+
+        try:
+            slot: int = self._free_slots.get(block, timeout)
+        except Empty:
+            raise Full
+
+        offset: int = slot * self._slot_size
+        for buffer, size in zip(obj.buffers, sizes):
+            self._shm.buf[offset : offset + size] = buffer
+            offset += size
+
+        if deadline is not None:
+            timeout = max(0.0, deadline - time.monotonic())
+
+        try:
+            # messages sent through the pipe take places of the index, but not slots
+            self._index.put((slot, obj.header, sizes), block, timeout)
+        except Full:
+            self._free_slots.put(slot)
+            raise
+
+    def get(self, block: bool = True, timeout: T.Optional[float] = None) -> T.Any:
+        self._release_held_slot()
+
+        slot, header, sizes = self._index.get(block, timeout)
+        if slot is None:
+            return pickle.loads(header)
+
+        offset: int = slot * self._slot_size
+        views: T.List[memoryview] = []
+        for size in sizes:
+            views.append(self._shm.buf[offset : offset + size])
+            offset += size
+
+        self._held_slot = slot
+        return pickle.loads(header, buffers=views)
+
+    def put_nowait(self, obj: T.Any) -> None:
+        self.put(obj, False)
+
+    def get_nowait(self) -> T.Any:
+        return self.get(False)
+
+    def qsize(self) -> int:
+        return self._index.qsize()
+
+    def empty(self) -> bool:
+        return self._index.empty()
+
+    def full(self) -> bool:
+        return self._free_slots.empty() or self._index.full()
+
+    def _release_held_slot(self) -> None:
+        if self._held_slot is not None:
+            self._free_slots.put(self._held_slot)
+            self._held_slot = None
+
+
+def _unlink_memory(shm: SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # arrays returned by get() still point to the memory
+        pass
+
+    shm.unlink()
@@ -0,0 +1,21 @@
+import queue
+import typing as T
+
+
+class ThreadQueue(queue.Queue):
+    """
+    Queue between processes that run as threads of one OS process (see 'group' in config).
+    Messages are passed by reference without pickling, so consumers must not change them.
+
+    Pickling the queue (to pass it to the OS process of the group) creates an empty queue.
+    All references to the queue inside the same pickled object get the same new queue.
+    """
+
+    in_memory = True
+
+    @property
+    def _maxsize(self) -> int:
+        return self.maxsize
+
+    def __reduce__(self) -> T.Tuple[T.Any, ...]:
+        return ThreadQueue, (self.maxsize,)
@@ -0,0 +1,19 @@
+import typing as T
+
+
+class TimedMessage:
+    """
+    Message with the time it was published, so the consumer knows how long it was in the queue.
+    It's used when telemetry is turned on, RobotProcess.consume unwraps the original message.
+
+    :param sent_at: Time of publishing (time.time()).
+    :param nbytes: Size of the serialized message if it's known.
+    :param message: Original message, maybe a SerializedMessage.
+    """
+
+    __slots__ = ("sent_at", "nbytes", "message")
+
+    def __init__(self, sent_at: float, nbytes: T.Optional[int], message: T.Any):
+        self.sent_at: float = sent_at
+        self.nbytes: T.Optional[int] = nbytes
+        self.message: T.Any = message
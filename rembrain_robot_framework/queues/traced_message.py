@@ -0,0 +1,18 @@
+import typing as T
+
+
+class TracedMessage:
+    """
+    Message with the trace context of its path through processes.
+    It's used when the publishing process has a current trace, RobotProcess.consume unwraps the original message
+    and makes the trace current in the consuming process.
+
+    :param trace: TraceContext of the message.
+    :param message: Original message.
+    """
+
+    __slots__ = ("trace", "message")
+
+    def __init__(self, trace: T.Any, message: T.Any):
+        self.trace: T.Any = trace
+        self.message: T.Any = message
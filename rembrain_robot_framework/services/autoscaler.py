@@ -0,0 +1,73 @@
+class Autoscaler:
+    """
+    Decides how many replicas of a process should run by the occupancy of its consume queues.
+
+    It adds a replica when the occupancy is above target_occupancy for scale_up_checks checks in a row
+    and removes one when the occupancy is below target_occupancy * LOW_WATERMARK for scale_down_checks checks in a row,
+    so short bursts don't make the number of replicas flap.
+
+    :param min_replicas: Min number of replicas, they are started at once.
+    :param max_replicas: Max number of replicas.
+    :param target_occupancy: Fraction of the queue size that replicas should keep.
+    :param scale_up_checks: Number of checks in a row with a high occupancy to add a replica.
+    :param scale_down_checks: Number of checks in a row with a low occupancy to remove a replica.
+    """
+
+    LOW_WATERMARK = 0.5
+
+    def __init__(
+        self,
+        min_replicas: int,
+        max_replicas: int,
+        target_occupancy: float = 0.5,
+        scale_up_checks: int = 3,
+        scale_down_checks: int = 5,
+    ):
+        if not 1 <= min_replicas <= max_replicas:
+            raise ValueError("Replicas must satisfy 1 <= min_replicas <= max_replicas.")
+
+        if not 0.0 < target_occupancy <= 1.0:
+            raise ValueError("Target occupancy must be in (0, 1].")
+
+        self.min_replicas: int = min_replicas
+        self.max_replicas: int = max_replicas
+        self.target_occupancy: float = target_occupancy
+        self.scale_up_checks: int = scale_up_checks
+        self.scale_down_checks: int = scale_down_checks
+
+        self.replicas: int = min_replicas
+        self._high_checks: int = 0
+        self._low_checks: int = 0
+
+    def update(self, occupancy: float) -> int:
+        """
+        Takes the current occupancy of the queues (0 - empty, 1 - full).
+        Returns the change of the number of replicas: 1, -1 or 0.
+        """
+        if occupancy > self.target_occupancy:
+            self._high_checks += 1
+            self._low_checks = 0
+        elif occupancy < self.target_occupancy * self.LOW_WATERMARK:
+            self._low_checks += 1
+            self._high_checks = 0
+        else:
+            self._high_checks = 0
+            self._low_checks = 0
+
+        if (
+            self._high_checks >= self.scale_up_checks
+            and self.replicas < self.max_replicas
+        ):
+            self._high_checks = 0
+            self.replicas += 1
+            return 1
+
+        if (
+            self._low_checks >= self.scale_down_checks
+            and self.replicas > self.min_replicas
+        ):
+            self._low_checks = 0
+            self.replicas -= 1
+            return -1
+
+        return 0
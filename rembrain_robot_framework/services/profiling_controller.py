@@ -0,0 +1,232 @@
+import cProfile
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import typing as T
+from collections import deque
+from threading import Lock, Timer
+
+from rembrain_robot_framework.models.control_message import ControlMessage
+from rembrain_robot_framework.services.stack_monitor import StackMonitor
+
+
+class ProfilingController:
+    """
+    Runs control commands that RobotDispatcher sends to a running process (ControlMessage)
+    and writes their results to output_dir:
+        - stack profiler: '<process>.<time>.<pid>.collapsed', stacks of all threads (see StackMonitor)
+        - cProfile: '<process>.<time>.<pid>.prof', it can be opened with pstats or snakeviz
+        - memory snapshot: '<process>.<time>.<pid>.tracemalloc', it's loaded by tracemalloc.Snapshot.load()
+
+    Commands come in the thread that reads the system queue. cProfile profiles only the thread it's enabled in,
+    so the thread of the process starts and stops it at its next consume or publish (see run_pending()).
+
+    :param process_name: Name of the process.
+    :param output_dir: Directory for the results.
+    """
+
+    DEFAULT_OUTPUT_DIR = StackMonitor.DEFAULT_OUTPUT_DIR
+    # memory allocations are traced for this time if tracemalloc isn't started yet
+    DEFAULT_MEMORY_TRACE_DURATION = 10.0
+    # number of frames of a traceback of an allocation
+    MEMORY_TRACE_FRAMES = 10
+
+    def __init__(self, process_name: str, output_dir: str = DEFAULT_OUTPUT_DIR):
+        self.process_name: str = process_name
+        self._output_dir: str = output_dir
+        # the controller is created by the thread that runs the process
+        self._process_thread: int = threading.get_ident()
+
+        self._lock = Lock()
+        self._stack_monitor: T.Optional[StackMonitor] = None
+        self._cprofile: T.Optional[cProfile.Profile] = None
+        self._cprofile_requested: bool = False
+        # profiler => timer that stops it after the duration
+        self._timers: T.Dict[str, Timer] = {}
+
+        # calls that must be made by the thread of the process
+        self.pending: T.Deque[T.Callable[[], None]] = deque()
+        self.log = logging.getLogger(f"{self.__class__.__name__} ({process_name})")
+
+    def handle(self, message: ControlMessage) -> None:
+        try:
+            if message.command == ControlMessage.START_PROFILER:
+                self.start_profiler(message.profiler, message.duration)
+            elif message.command == ControlMessage.STOP_PROFILER:
+                self.stop_profiler(message.profiler)
+            elif message.command == ControlMessage.MEMORY_SNAPSHOT:
+                self.take_memory_snapshot(message.duration)
+            elif message.command == ControlMessage.SET_LOG_LEVEL:
+                self.set_log_level(message.level)
+            else:
+                self.log.error(f"Unknown control command: {message.command}.")
+        except Exception:
+            self.log.error(
+                f"Failed to run control command {message.command}.", exc_info=True
+            )
+
+    def start_profiler(self, profiler: str, duration: T.Optional[float] = None) -> None:
+        """
+        :param profiler: 'stack' or 'cprofile'.
+        :param duration: Seconds after which the profiler is stopped. If it's None - it works until stop_profiler().
+        """
+        with self._lock:
+            if profiler == ControlMessage.STACK:
+                if self._stack_monitor is not None:
+                    self.log.warning("Stack profiler is already running.")
+                    return
+
+                self._stack_monitor = StackMonitor(
+                    self._get_name(), output_dir=self._output_dir
+                )
+                self._stack_monitor.start_monitoring()
+            elif profiler == ControlMessage.CPROFILE:
+                if self._cprofile_requested:
+                    self.log.warning("cProfile is already running.")
+                    return
+
+                self._cprofile_requested = True
+                self.pending.append(self._start_cprofile)
+            else:
+                raise ValueError(f"Unknown profiler: {profiler}.")
+
+            self.log.info(f"Profiler {profiler} is started.")
+            if duration is not None:
+                timer = Timer(duration, self.stop_profiler, args=(profiler,))
+                timer.daemon = True
+                timer.start()
+                self._timers[profiler] = timer
+
+    def stop_profiler(self, profiler: str) -> None:
+        """Stops the profiler and writes its result."""
+        with self._lock:
+            # a manual stop cancels the stop by the duration, so it doesn't stop the next run of the profiler
+            timer: T.Optional[Timer] = self._timers.pop(profiler, None)
+            if timer is not None:
+                timer.cancel()
+
+            if profiler == ControlMessage.STACK:
+                monitor: T.Optional[StackMonitor] = self._stack_monitor
+                self._stack_monitor = None
+            elif profiler == ControlMessage.CPROFILE:
+                if not self._cprofile_requested:
+                    self.log.warning("cProfile isn't running.")
+                    return
+
+                self._cprofile_requested = False
+                self.pending.append(self._stop_cprofile)
+                return
+            else:
+                raise ValueError(f"Unknown profiler: {profiler}.")
+
+        if monitor is None:
+            self.log.warning("Stack profiler isn't running.")
+            return
+
+        monitor.stop_monitoring()
+        self.log.info(
+            f"Stacks of {monitor.samples} samples are written to {monitor.output_path}."
+        )
+
+    def take_memory_snapshot(self, duration: T.Optional[float] = None) -> None:
+        """
+        Writes a snapshot of the memory allocated by Python.
+        If tracemalloc isn't started, it's started and the snapshot has the allocations made during the duration.
+
+        :param duration: Seconds to wait before the snapshot. If it's None - DEFAULT_MEMORY_TRACE_DURATION
+        if tracemalloc isn't started, otherwise the snapshot is taken at once.
+        """
+        started_here: bool = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(self.MEMORY_TRACE_FRAMES)
+            if duration is None:
+                duration = self.DEFAULT_MEMORY_TRACE_DURATION
+
+        if not duration:
+            self._dump_memory_snapshot(started_here)
+            return
+
+        self.log.info(f"Memory snapshot will be taken in {duration} s.")
+        timer = Timer(duration, self._dump_memory_snapshot, args=(started_here,))
+        timer.daemon = True
+        timer.start()
+
+    def set_log_level(self, level: T.Optional[str]) -> None:
+        """Sets the level of the root logger of the process."""
+        if not level:
+            raise ValueError("Log level isn't set.")
+
+        logging.getLogger().setLevel(level.upper())
+        self.log.info(f"Log level is set to {level.upper()}.")
+
+    def run_pending(self) -> None:
+        """Makes the calls that must be made by the thread of the process."""
+        if threading.get_ident() != self._process_thread:
+            return
+
+        while self.pending:
+            call: T.Callable[[], None] = self.pending.popleft()
+            try:
+                call()
+            except Exception:
+                self.log.error("Failed to run control command.", exc_info=True)
+
+    def close(self) -> None:
+        """Stops the profilers and writes their results, it's called when the process finishes."""
+        for timer in list(self._timers.values()):
+            timer.cancel()
+
+        if self._stack_monitor is not None:
+            self.stop_profiler(ControlMessage.STACK)
+
+        if self._cprofile_requested or self._cprofile is not None:
+            self._cprofile_requested = False
+            self.pending.append(self._stop_cprofile)
+
+        self.run_pending()
+
+    def _start_cprofile(self) -> None:
+        if self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _stop_cprofile(self) -> None:
+        profile: T.Optional[cProfile.Profile] = self._cprofile
+        if profile is None:
+            return
+
+        self._cprofile = None
+        profile.disable()
+
+        path: str = self._get_path("prof")
+        profile.dump_stats(path)
+        self.log.info(f"cProfile stats are written to {path}.")
+
+    def _dump_memory_snapshot(self, stop_tracing: bool) -> None:
+        try:
+            snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+            if stop_tracing:
+                tracemalloc.stop()
+
+            path: str = self._get_path("tracemalloc")
+            snapshot.dump(path)
+        except Exception:
+            self.log.error("Failed to take memory snapshot.", exc_info=True)
+            return
+
+        top: T.List[tracemalloc.Statistic] = snapshot.statistics("lineno")[:5]
+        self.log.info(
+            f"Memory snapshot is written to {path}, top allocations:\n"
+            + "\n".join(str(s) for s in top)
+        )
+
+    def _get_name(self) -> str:
+        return f"{self.process_name}.{time.strftime('%Y%m%d-%H%M%S')}"
+
+    def _get_path(self, extension: str) -> str:
+        os.makedirs(self._output_dir, exist_ok=True)
+        return os.path.join(
+            self._output_dir, f"{self._get_name()}.{os.getpid()}.{extension}"
+        )
@@ -0,0 +1,143 @@
+import time
+import typing as T
+from collections import defaultdict
+from queue import Full
+from threading import Lock, Thread
+
+
+def percentile(values: T.Sequence[float], q: float) -> T.Optional[float]:
+    """Returns the q-th (0..1) percentile of the values by the nearest rank, None if there are no values."""
+    if not values:
+        return None
+
+    ordered: T.List[float] = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class _ConsumeStats:
+    __slots__ = ("messages", "bytes", "window_messages", "window_bytes", "delays")
+
+    def __init__(self):
+        self.messages: int = 0
+        self.bytes: int = 0
+        self.window_messages: int = 0
+        self.window_bytes: int = 0
+        # queueing delays of the messages consumed during the current window
+        self.delays: T.List[float] = []
+
+
+class QueueTelemetry:
+    """
+    Collects statistics of the queues of a process and sends them to RobotDispatcher every interval
+    from a background thread, so reports come even while the process waits for messages.
+
+    The consumer records how long every message was in its queue (by the publishing time of TimedMessage)
+    and the size of the message. The publisher records messages it evicts with 'clear_on_overflow'.
+    A report is a dict:
+        {
+            "process": process name,
+            "reported_at": time of the report,
+            "consumed": {queue name: {messages, bytes, messages_per_second, bytes_per_second,
+                                      delay_p50, delay_p99}},
+            "evicted": {queue name: {index of the queue in the publish queues: number}},
+        }
+
+    :param process_name: Name of the process.
+    :param reports: Queue to send reports to.
+    :param interval: Interval of the reports in seconds.
+    """
+
+    DEFAULT_INTERVAL = 1.0
+    # limits memory of the delays of a very busy queue
+    MAX_DELAYS = 10000
+
+    def __init__(
+        self, process_name: str, reports: T.Any, interval: float = DEFAULT_INTERVAL
+    ):
+        self.process_name: str = process_name
+        self._reports: T.Any = reports
+        # reports that are not sent yet are not needed, the exit of the process must not wait for them
+        if hasattr(reports, "cancel_join_thread"):
+            reports.cancel_join_thread()
+        self._interval: float = interval
+
+        self._consumed: T.DefaultDict[str, _ConsumeStats] = defaultdict(_ConsumeStats)
+        self._evicted: T.DefaultDict[str, T.DefaultDict[int, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._window_start: float = time.monotonic()
+        self._lock = Lock()
+        self._thread: T.Optional[Thread] = None
+
+    def start(self) -> None:
+        """Starts sending reports every interval."""
+        if self._thread is None:
+            self._thread = Thread(
+                target=self._report_periodically, name="QueueTelemetry", daemon=True
+            )
+            self._thread.start()
+
+    def on_consumed(
+        self, queue_name: str, sent_at: float, nbytes: T.Optional[int]
+    ) -> None:
+        delay: float = max(time.time() - sent_at, 0.0)
+
+        with self._lock:
+            stats: _ConsumeStats = self._consumed[queue_name]
+            stats.messages += 1
+            stats.window_messages += 1
+
+            if nbytes is not None:
+                stats.bytes += nbytes
+                stats.window_bytes += nbytes
+
+            if len(stats.delays) < self.MAX_DELAYS:
+                stats.delays.append(delay)
+
+    def on_evicted(self, queue_name: str, queue_index: int) -> None:
+        with self._lock:
+            self._evicted[queue_name][queue_index] += 1
+
+    def report(self) -> None:
+        """Sends statistics of the current window and starts a new one."""
+        with self._lock:
+            snapshot: dict = self._snapshot()
+
+            self._window_start = time.monotonic()
+            for stats in self._consumed.values():
+                stats.window_messages = 0
+                stats.window_bytes = 0
+                stats.delays = []
+
+        try:
+            self._reports.put_nowait(snapshot)
+        except Full:
+            # the dispatcher doesn't read reports now, the next one will have the totals anyway
+            pass
+
+    def _report_periodically(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            self.report()
+
+    def _snapshot(self) -> dict:
+        window: float = max(time.monotonic() - self._window_start, 1e-9)
+
+        return {
+            "process": self.process_name,
+            "reported_at": time.time(),
+            "consumed": {
+                queue_name: {
+                    "messages": stats.messages,
+                    "bytes": stats.bytes,
+                    "messages_per_second": stats.window_messages / window,
+                    "bytes_per_second": stats.window_bytes / window,
+                    "delay_p50": percentile(stats.delays, 0.5),
+                    "delay_p99": percentile(stats.delays, 0.99),
+                }
+                for queue_name, stats in self._consumed.items()
+            },
+            "evicted": {
+                queue_name: dict(counts) for queue_name, counts in self._evicted.items()
+            },
+        }
@@ -0,0 +1,137 @@
+import os
+import time
+import typing as T
+
+
+class ResourceSampler:
+    """
+    Samples resource usage of processes from /proc (Linux only).
+
+    For every process it reads /proc/<pid>/stat (CPU time, threads, RSS), and status and sched of every thread
+    (context switches, migrations between CPUs), because in /proc/<pid>/status and sched they are counted
+    for the main thread only. Stats of a process:
+        - pid
+        - cpu_percent: CPU usage since the previous sample, it's > 100 if several threads run at once
+        - rss_bytes: resident memory
+        - threads: number of threads
+        - voluntary_ctxt_switches: the process waited (I/O, locks, queues)
+        - involuntary_ctxt_switches: the kernel took the CPU away, a lot of them means the node is oversubscribed
+        - migrations: moves of threads between CPUs
+
+    :param proc_root: Mount point of procfs.
+    """
+
+    DEFAULT_INTERVAL = 5.0
+
+    def __init__(self, proc_root: str = "/proc"):
+        self._proc_root: str = proc_root
+        self._clock_ticks: int = os.sysconf("SC_CLK_TCK")
+        self._page_size: int = os.sysconf("SC_PAGE_SIZE")
+        # pid => (CPU time, time of the sample) of the previous sample
+        self._cpu_times: T.Dict[int, T.Tuple[float, float]] = {}
+
+    @classmethod
+    def is_supported(cls, proc_root: str = "/proc") -> bool:
+        return os.path.exists(os.path.join(proc_root, "self", "stat"))
+
+    def sample(self, pids: T.Dict[str, int]) -> T.Dict[str, dict]:
+        """
+        Returns stats of the processes: {process name: stats}.
+        Processes that don't exist anymore are skipped.
+
+        :param pids: Process name => pid.
+        """
+        result: T.Dict[str, dict] = {}
+        stats_by_pid: T.Dict[int, T.Optional[dict]] = {}
+
+        for name, pid in pids.items():
+            # processes of a group share the pid
+            if pid not in stats_by_pid:
+                stats_by_pid[pid] = self.read_process(pid)
+
+            if stats_by_pid[pid] is not None:
+                result[name] = stats_by_pid[pid]
+
+        # forget processes that have gone
+        for pid in set(self._cpu_times) - set(stats_by_pid):
+            del self._cpu_times[pid]
+
+        return result
+
+    def read_process(self, pid: int) -> T.Optional[dict]:
+        """Returns stats of the process or None if it doesn't exist."""
+        try:
+            with open(os.path.join(self._proc_root, str(pid), "stat")) as f:
+                # the name of the executable may contain spaces and parentheses
+                fields: T.List[str] = f.read().rsplit(")", 1)[1].split()
+
+            switches: T.Dict[str, int] = self._read_thread_counters(pid)
+        except (FileNotFoundError, ProcessLookupError):
+            return None
+
+        # fields are numbered from 'state' (3rd field of proc(5))
+        cpu_time: float = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        now: float = time.monotonic()
+
+        cpu_percent: T.Optional[float] = None
+        if pid in self._cpu_times:
+            last_cpu_time, last_time = self._cpu_times[pid]
+            cpu_percent = (
+                100.0 * (cpu_time - last_cpu_time) / max(now - last_time, 1e-9)
+            )
+        self._cpu_times[pid] = (cpu_time, now)
+
+        return {
+            "pid": pid,
+            "cpu_percent": cpu_percent,
+            "rss_bytes": int(fields[21]) * self._page_size,
+            "threads": int(fields[17]),
+            **switches,
+        }
+
+    def _read_thread_counters(self, pid: int) -> T.Dict[str, int]:
+        counters: T.Dict[str, int] = {
+            "voluntary_ctxt_switches": 0,
+            "involuntary_ctxt_switches": 0,
+            "migrations": 0,
+        }
+
+        tasks_dir: str = os.path.join(self._proc_root, str(pid), "task")
+        for tid in os.listdir(tasks_dir):
+            try:
+                status: T.Dict[str, str] = self._read_keys(
+                    os.path.join(tasks_dir, tid, "status")
+                )
+            except FileNotFoundError:
+                # the thread has finished
+                continue
+
+            try:
+                sched: T.Dict[str, str] = self._read_keys(
+                    os.path.join(tasks_dir, tid, "sched")
+                )
+            except OSError:
+                # the kernel is built without scheduler debug info
+                sched = {}
+
+            counters["voluntary_ctxt_switches"] += int(
+                status.get("voluntary_ctxt_switches", 0)
+            )
+            counters["involuntary_ctxt_switches"] += int(
+                status.get("nonvoluntary_ctxt_switches", 0)
+            )
+            counters["migrations"] += int(float(sched.get("se.nr_migrations", 0)))
+
+        return counters
+
+    @staticmethod
+    def _read_keys(path: str) -> T.Dict[str, str]:
+        """Reads lines like 'key: value'."""
+        result: T.Dict[str, str] = {}
+        with open(path) as f:
+            for line in f:
+                key, sep, value = line.partition(":")
+                if sep:
+                    result[key.strip()] = value.strip()
+
+        return result
@@ -0,0 +1,204 @@
+import heapq
+import logging
+import time
+import typing as T
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from queue import Empty
+from threading import Event, Lock, Thread, current_thread
+from uuid import UUID
+
+from rembrain_robot_framework.models.control_message import ControlMessage
+
+
+class ResponseFuture(UUID):
+    """
+    UUID of a request that is also a handle to wait for its response.
+    It's pickled as a plain UUID, so it can be stored or sent like before.
+    """
+
+    def __init__(self, uid: UUID, router: "ResponseRouter"):
+        super().__init__(int=uid.int)
+        object.__setattr__(self, "_router", router)
+
+    def result(self, timeout: T.Optional[float] = None) -> T.Any:
+        """
+        Waits for the response and returns its data.
+
+        :raise: TimeoutError: if the response didn't come during the timeout or the request has expired
+        """
+        return self._router.wait(self, timeout)
+
+    def done(self) -> bool:
+        return self._router.get_future(self).done()
+
+    def __reduce__(self):
+        return UUID, (str(self),)
+
+
+class _PendingResponse(Future):
+    """Future of a response that also keeps the trace context the response came with."""
+
+    def __init__(self):
+        super().__init__()
+        self.trace: T.Any = None
+
+
+class ResponseRouter:
+    """
+    Receives responses from the personal system queue of a process in a background thread
+    and routes them to the futures of the requests by uid.
+
+    A request that gets no response during its ttl (or a response nobody waits for) expires,
+    so abandoned requests don't pile up.
+    Control messages of RobotDispatcher that come to the same queue are passed to on_control.
+
+    :param queue: Personal system queue of the process.
+    :param on_control: Handler of control messages, they are dropped if it's None.
+    """
+
+    DEFAULT_TTL = 600.0
+    # how often the receiver checks expired requests if there are no responses
+    POLL_TIMEOUT = 0.5
+
+    def __init__(
+        self,
+        queue: T.Any,
+        on_control: T.Optional[T.Callable[[ControlMessage], None]] = None,
+    ):
+        self._queue: T.Any = queue
+        self._on_control: T.Optional[T.Callable[[ControlMessage], None]] = on_control
+        self._lock = Lock()
+        # uid => (future, expiration time)
+        self._futures: T.Dict[UUID, T.Tuple[_PendingResponse, float]] = {}
+        self._expirations: T.List[T.Tuple[float, UUID]] = []
+        self._thread: T.Optional[Thread] = None
+        self._stopped = Event()
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    def register(self, uid: UUID, ttl: T.Optional[float] = None) -> ResponseFuture:
+        """Registers a request before sending it and returns the handle for its response."""
+        self.get_future(uid, ttl)
+        return ResponseFuture(uid, self)
+
+    def get_future(self, uid: UUID, ttl: T.Optional[float] = None) -> _PendingResponse:
+        with self._lock:
+            if uid in self._futures:
+                return self._futures[uid][0]
+
+            future: _PendingResponse = self._add(uid, ttl)
+            self._start()
+
+        return future
+
+    def start(self) -> None:
+        """Starts receiving before the first request, it's needed to get control messages."""
+        with self._lock:
+            self._start()
+
+    def stop(self) -> None:
+        """
+        Stops receiving, the queue is left to the next instance of the process.
+        It waits for the receiver thread, so the receiver can't take a response of the next instance.
+        """
+        self._stopped.set()
+
+        if self._thread is not None and self._thread is not current_thread():
+            self._thread.join()
+
+    def wait(self, uid: UUID, timeout: T.Optional[float] = None) -> T.Any:
+        future: Future = self.get_future(uid)
+        try:
+            result: T.Any = future.result(timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No response for request {uid}.")
+
+        self.discard(uid)
+        return result
+
+    def discard(self, uid: UUID) -> None:
+        with self._lock:
+            self._futures.pop(uid, None)
+
+    def _add(self, uid: UUID, ttl: T.Optional[float]) -> _PendingResponse:
+        expiration: float = time.monotonic() + (
+            self.DEFAULT_TTL if ttl is None else ttl
+        )
+
+        future = _PendingResponse()
+        self._futures[uid] = (future, expiration)
+        heapq.heappush(self._expirations, (expiration, uid))
+        return future
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = Thread(
+                target=self._receive, name="ResponseRouter", daemon=True
+            )
+            self._thread.start()
+
+    def _receive(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                response: T.Any = self._queue.get(timeout=self.POLL_TIMEOUT)
+            except Empty:
+                response = None
+            except (OSError, ValueError):
+                # the queue is closed, the process is finishing
+                return
+
+            if response is not None and self._stopped.is_set():
+                # it came during stopping, so it belongs to the next instance
+                self._queue.put(response)
+                return
+
+            if isinstance(response, ControlMessage):
+                self._control(response)
+            elif response is not None:
+                self._resolve(response)
+
+            self._expire()
+
+    def _control(self, message: ControlMessage) -> None:
+        if self._on_control is None:
+            self.log.warning(
+                f"Control message {message.command} is dropped, profiling is turned off."
+            )
+            return
+
+        self._on_control(message)
+
+    def _resolve(self, response: T.Any) -> None:
+        with self._lock:
+            if response.uid in self._futures:
+                future: Future = self._futures[response.uid][0]
+            else:
+                # nobody waits for it yet
+                future = self._add(response.uid, None)
+
+        if future.done():
+            self.log.warning(f"Duplicated response for request {response.uid}.")
+            return
+
+        future.trace = getattr(response, "trace", None)
+
+        # services send exceptions of their handlers
+        if isinstance(response.data, BaseException):
+            future.set_exception(response.data)
+        else:
+            future.set_result(response.data)
+
+    def _expire(self) -> None:
+        now: float = time.monotonic()
+        expired: T.List[Future] = []
+
+        with self._lock:
+            while self._expirations and self._expirations[0][0] <= now:
+                expiration, uid = heapq.heappop(self._expirations)
+
+                # the request might be resolved and registered again
+                if uid in self._futures and self._futures[uid][1] == expiration:
+                    expired.append(self._futures.pop(uid)[0])
+
+        for future in expired:
+            if not future.done():
+                future.set_exception(TimeoutError("Request has expired."))
@@ -0,0 +1,125 @@
+import functools
+import os
+import threading
+import time
+import typing as T
+from collections import deque
+from contextlib import contextmanager
+from queue import Full
+from threading import Thread
+
+
+class SpanRecorder:
+    """
+    Records durations of named sections of a process into a ring buffer
+    and sends them to RobotDispatcher every interval from a background thread.
+
+    A span is a tuple (name, start, duration, thread id, args): start is wall clock time (time.time()),
+    so spans of different processes are on one timeline, duration is measured by time.perf_counter().
+    Recording is an append to a deque, if the dispatcher doesn't take spans, the oldest ones are overwritten.
+    A report is a dict:
+        {"process": process name, "pid": process id, "spans": [span, ...]}
+
+    :param process_name: Name of the process.
+    :param reports: Queue to send reports to.
+    :param capacity: Max number of spans that are kept between reports.
+    :param interval: Interval of the reports in seconds.
+    """
+
+    DEFAULT_CAPACITY = 10000
+    DEFAULT_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        process_name: str,
+        reports: T.Any,
+        capacity: int = DEFAULT_CAPACITY,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.process_name: str = process_name
+        self._reports: T.Any = reports
+        # spans that are not sent yet are not needed, the exit of the process must not wait for them
+        if hasattr(reports, "cancel_join_thread"):
+            reports.cancel_join_thread()
+        self._interval: float = interval
+
+        self._spans: T.Deque[tuple] = deque(maxlen=capacity)
+        self._thread: T.Optional[Thread] = None
+
+    def start(self) -> None:
+        """Starts sending spans every interval."""
+        if self._thread is None:
+            self._thread = Thread(
+                target=self._report_periodically, name="SpanRecorder", daemon=True
+            )
+            self._thread.start()
+
+    @contextmanager
+    def span(self, name: str, **args) -> T.Iterator[None]:
+        start: float = time.time()
+        started: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - started, args)
+
+    def record(
+        self, name: str, start: float, duration: float, args: T.Optional[dict] = None
+    ) -> None:
+        self._spans.append((name, start, duration, threading.get_ident(), args or None))
+
+    def drain(self) -> T.List[tuple]:
+        """Takes all recorded spans."""
+        spans: T.List[tuple] = []
+        try:
+            while True:
+                spans.append(self._spans.popleft())
+        except IndexError:
+            pass
+
+        return spans
+
+    def report(self) -> None:
+        """Sends the spans recorded since the previous report."""
+        spans: T.List[tuple] = self.drain()
+        if not spans:
+            return
+
+        try:
+            self._reports.put_nowait(
+                {"process": self.process_name, "pid": os.getpid(), "spans": spans}
+            )
+        except Full:
+            # the dispatcher doesn't read spans now, a gap on the timeline is better than a blocked process
+            pass
+
+    def _report_periodically(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            self.report()
+
+
+def spanned(name: T.Optional[str] = None) -> T.Callable:
+    """
+    Decorator for methods of RobotProcess that records every call as a span.
+
+    Example:
+    class YoloImageProcessor(RobotProcess):
+        @spanned("inference")
+        def infer(self, image):
+            ...
+
+    :param name: Name of the span, the qualified name of the method by default.
+    """
+
+    def decorator(method: T.Callable) -> T.Callable:
+        span_name: str = name or method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.span(span_name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,179 +1,212 @@
-import linecache
+import dis
 import logging
 import os
 import sys
-import time
+import tempfile
 import threading
+import time
 import typing as T
 
 logger = logging.getLogger(__name__)
 
+# one frame of a sampled stack: (id of the code object, index of the last instruction),
+# the name of the function and the line number are resolved only at export
+_Frame = T.Tuple[int, int]
+# stack from the inner frame, frames are flattened: (code id, instruction, code id, instruction, ...)
+_Stack = T.Tuple[int, ...]
+
 
 class StackMonitor:
     """
-    Uses code from the hanging_threads library: https://github.com/niccokunzmann/hanging_threads
+    Sampling profiler of all threads of the process.
+
+    Every sample takes the frames of the threads and counts the stack as a flat tuple of ints
+    (id of code, instruction index, ...), so sampling doesn't build strings, doesn't decode line tables
+    and doesn't take locks. The stack of a thread that stays in the same frame (waiting for a queue, sleep)
+    isn't walked again.
+    Names of functions, files and line numbers are resolved only when the stacks are exported.
+
+    Stacks are written in the collapsed format of flamegraphs (one line 'thread;outer;...;inner count'),
+    to '<output_dir>/<name>.<pid>.collapsed' every export_interval and at stop_monitoring().
+    The file has all samples since the start, it can be opened with flamegraph.pl, speedscope or inferno.
+    The number of counted stacks is limited, so the memory doesn't grow with the running time:
+    after max_stacks new stacks are counted as '[other stacks]' of their thread.
     """
 
-    def __init__(self, name, **kwargs):
+    DEFAULT_SAMPLING_RATE = 100.0
+    DEFAULT_EXPORT_INTERVAL = 5.0
+    DEFAULT_MAX_STACKS = 10000
+    # label of the stacks that are not counted separately after max_stacks
+    OTHER_STACKS = "[other stacks]"
+    DEFAULT_OUTPUT_DIR = os.path.join(tempfile.gettempdir(), "rembrain_profiles")
+
+    def __init__(self, name: str, **kwargs):
         """
-        :param poll_interval: Interval between stack polls (in seconds) Default: 0.1
-        :param print_interval: Interval between stack prints (in seconds) Default: 5
-        :param clear_on_print: Whether to clear the stack counters on each print to prevent memory leaks Default: True
+        :param sampling_rate: Number of samples per second. Default: 100
+        :param export_interval: Interval between writings of the stacks to the file (in seconds). Default: 5
+        :param output_dir: Directory for the files of the stacks. Default: <temp dir>/rembrain_profiles
+        :param max_stacks: Max number of different stacks that are counted separately. Default: 10000
         """
-        self._monitor_thread: T.Optional[StoppableThread] = None
-        self._print_thread: T.Optional[StoppableThread] = None
-        self._poll_interval = float(kwargs.get("poll_interval", 0.1))
-        self._print_interval = float(kwargs.get("print_interval", 5))
-        self._clear_on_print = bool(kwargs.get("clear_on_print", True))
-
-        self._stack_counter = {}
-        self._stack_lock = threading.Lock()
-        self._interval_start = time.time()
-        self._name = name
-
-    def start_monitoring(self):
-        self._interval_start = time.time()
-        if not self._monitor_thread:
-            self._monitor_thread = StoppableThread(target=self._monitor_fn, daemon=True)
+        self._name: str = name
+        self._sampling_interval: float = 1.0 / float(
+            kwargs.get("sampling_rate", self.DEFAULT_SAMPLING_RATE)
+        )
+        self._export_interval: float = float(
+            kwargs.get("export_interval", self.DEFAULT_EXPORT_INTERVAL)
+        )
+        self._output_dir: str = str(kwargs.get("output_dir", self.DEFAULT_OUTPUT_DIR))
+        self._max_stacks: int = int(kwargs.get("max_stacks", self.DEFAULT_MAX_STACKS))
+
+        # (thread name, stack) => number of samples, only the sampling thread changes it
+        self._stack_counter: T.Dict[T.Tuple[str, _Stack], int] = {}
+        # code objects of the counted stacks, they are kept alive so their ids stay unique
+        self._codes: T.Dict[int, T.Any] = {}
+        # thread id => (inner frame, its instruction, its caller, key of the stack) of the previous sample
+        self._last_stacks: T.Dict[int, tuple] = {}
+        self._thread_names: T.Dict[int, str] = {}
+        self._stopped = threading.Event()
+        self._monitor_thread: T.Optional[threading.Thread] = None
+
+        # CPU time of the sampling thread, it's the overhead of the monitor
+        self.sampling_time: float = 0.0
+        self.samples: int = 0
+
+    @property
+    def output_path(self) -> str:
+        return os.path.join(self._output_dir, f"{self._name}.{os.getpid()}.collapsed")
+
+    def start_monitoring(self) -> None:
+        if self._monitor_thread is None:
+            self._stopped.clear()
+            self._monitor_thread = threading.Thread(
+                target=self._monitor_fn, name="StackMonitor", daemon=True
+            )
             self._monitor_thread.start()
 
-        if not self._print_thread:
-            self._print_thread = StoppableThread(target=self._print_stacks, daemon=True)
-            self._print_thread.start()
-
-    def _monitor_fn(self):
-        while not self._monitor_thread.is_stopped():
-            time.sleep(self._poll_interval)
-
-            with self._stack_lock:
-                frames = self._get_frames()
-
-                for thread_name in frames:
-                    frame_str = frames[thread_name]
-
-                    if thread_name not in self._stack_counter:
-                        self._stack_counter[thread_name] = {}
-
-                    if frame_str not in self._stack_counter[thread_name]:
-                        self._stack_counter[thread_name][frame_str] = 1
-                    else:
-                        self._stack_counter[thread_name][frame_str] += 1
-
-    def stop_monitoring(self):
-        # Print the stacks one last time
-        self.__print()
-        with self._stack_lock:
-            if self._monitor_thread:
-                self._monitor_thread.stop()
-
-            if self._print_thread:
-                self._print_thread.stop()
-
-    def _get_frames(self):
-        threads = {thread.ident: thread for thread in threading.enumerate()}
-        res = {}
-        frames = sys._current_frames()
-
-        for thread_id, frame in frames.items():
-            if thread_id in (self._monitor_thread.ident, self._print_thread.ident):
+    def stop_monitoring(self) -> None:
+        if self._monitor_thread is None:
+            return
+
+        self._stopped.set()
+        self._monitor_thread.join()
+        self._monitor_thread = None
+        self._last_stacks = {}
+
+        # the last samples
+        self.export()
+
+    def export(self) -> None:
+        """Writes the stacks to the output file."""
+        os.makedirs(self._output_dir, exist_ok=True)
+        with open(self.output_path, "w") as f:
+            f.write(self.collapsed())
+
+    def collapsed(self) -> str:
+        """Returns the stacks in the collapsed format: a line 'thread;outer frame;...;inner frame count' per stack."""
+        labels: T.Dict[_Frame, str] = {}
+        lines: T.List[str] = []
+
+        for (thread_name, stack), count in list(self._stack_counter.items()):
+            frames: T.List[str] = [thread_name.replace(";", ":")]
+            if not stack:
+                frames.append(self.OTHER_STACKS)
+
+            for i in range(len(stack) - 2, -1, -2):
+                frame: _Frame = (stack[i], stack[i + 1])
+                if frame not in labels:
+                    labels[frame] = self._frame_label(self._codes[frame[0]], frame[1])
+
+                frames.append(labels[frame])
+
+            lines.append(f"{';'.join(frames)} {count}\n")
+
+        return "".join(lines)
+
+    def _monitor_fn(self) -> None:
+        own_id: int = threading.get_ident()
+        next_export: float = time.monotonic() + self._export_interval
+
+        while not self._stopped.wait(self._sampling_interval):
+            started: float = time.thread_time()
+            self._sample(own_id)
+            self.sampling_time += time.thread_time() - started
+            self.samples += 1
+
+            if time.monotonic() >= next_export:
+                next_export = time.monotonic() + self._export_interval
+                try:
+                    self.export()
+                except OSError:
+                    logger.warning(
+                        f"Failed to write stacks to {self.output_path}.", exc_info=True
+                    )
+
+    def _sample(self, own_id: int) -> None:
+        last_stacks: T.Dict[int, tuple] = {}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
                 continue
 
-            res[threads[thread_id].name] = self.thread2list(frame)
-
-        return res
-
-    @staticmethod
-    def thread2list(frame):
-        frames = []
-
-        while frame:
-            frames.insert(0, StackMonitor.frame2string(frame))
-            frame = frame.f_back
+            # a thread that waits (a queue, a socket, sleep) stays in the same frame, its stack isn't walked again
+            inner_frame, instruction, caller = frame, frame.f_lasti, frame.f_back
+            last: T.Optional[tuple] = self._last_stacks.get(thread_id)
+            if (
+                last is not None
+                and last[0] is inner_frame
+                and last[1] == instruction
+                and last[2] is caller
+            ):
+                key = last[3]
+                self._stack_counter[key] += 1
+                last_stacks[thread_id] = last
+                continue
 
-        return "".join(frames)
+            # it's the hot loop: no tuples per frame and no hashing of code objects
+            stack: T.List[int] = []
+            codes: T.List[T.Any] = []
+            add_frame = stack.append
+            add_code = codes.append
+            while frame is not None:
+                code = frame.f_code
+                add_code(code)
+                add_frame(id(code))
+                add_frame(frame.f_lasti)
+                frame = frame.f_back
+
+            key = (self._get_thread_name(thread_id), tuple(stack))
+            count: T.Optional[int] = self._stack_counter.get(key)
+            if count is None and len(self._stack_counter) >= self._max_stacks:
+                # the empty stack counts the other stacks of the thread
+                key = (key[0], ())
+                count = self._stack_counter.get(key, 0)
+            elif count is None:
+                for code in codes:
+                    self._codes[id(code)] = code
+                count = 0
+
+            self._stack_counter[key] = count + 1
+            last_stacks[thread_id] = (inner_frame, instruction, caller, key)
+
+        # frames of the previous sample are released, finished threads are forgotten
+        self._last_stacks = last_stacks
+
+    def _get_thread_name(self, thread_id: int) -> str:
+        if thread_id not in self._thread_names:
+            # threads are listed only when an unknown one appears
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            self._thread_names.setdefault(thread_id, str(thread_id))
+
+        return self._thread_names[thread_id]
 
     @staticmethod
-    def frame2string(frame):
-        lineno = frame.f_lineno
-        co = frame.f_code
-        filename = co.co_filename
-        name = co.co_name
-
-        s = f"File '{filename}', line {lineno}, in {name}:"
-        line = linecache.getline(filename, lineno, frame.f_globals).lstrip()
-        return s + f"\r\n\t{line}"
-
-    def _print_stacks(self):
-        while True:
-            time.sleep(self._print_interval)
-
-            if self._print_thread.is_stopped():
+    def _frame_label(code: T.Any, instruction: int) -> str:
+        line: T.Optional[int] = code.co_firstlineno
+        for offset, line_of_offset in dis.findlinestarts(code):
+            if offset > instruction:
                 break
+            if line_of_offset is not None:
+                line = line_of_offset
 
-            self.__print()
-
-    def __print(self):
-        with self._stack_lock:
-            if len(self._stack_counter):
-                dt = time.time() - self._interval_start
-                res = f"Stack samples for process {os.getpid()}, name {self._name} for the last {dt:.0f} s.:"
-
-                for thread_id, frames_cnt in self._stack_counter.items():
-                    res += "\r\n========================================================\r\n"
-                    res += f"||THREAD '{thread_id}':||\r\n{self.frame_cnt_to_str(frames_cnt)}"
-
-                # logger.info(res)
-                print(res)
-                if self._clear_on_print:
-                    self._interval_start = time.time()
-                    self._stack_counter.clear()
-
-    @staticmethod
-    def frame_cnt_to_str(frames_cnt):
-        s = ""
-        for frame in sorted(frames_cnt, key=frames_cnt.get, reverse=True):
-            s += f">>>COUNT: {frames_cnt[frame]}:\r\n{frame}"
-
-        return s
-
-
-class StoppableThread(threading.Thread):
-    def __init__(self, *args, **kwargs):
-        super(StoppableThread, self).__init__(*args, **kwargs)
-        self._stopped = False
-
-    def stop(self):
-        self._stopped = True
-
-    def is_stopped(self):
-        return self._stopped
-
-
-# For debugging of StackMonitor
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG)
-
-    def fn_1():
-        print("Hi1")
-        time.sleep(1)
-
-    def fn_2():
-        print("Hi2")
-        time.sleep(0.5)
-
-    def loop():
-        while True:
-            fn_1()
-            fn_2()
-
-    sm = StackMonitor("")
-    sm.start_monitoring()
-
-    t1 = threading.Thread(target=loop, daemon=True)
-    t1.start()
-    time.sleep(5)
-
-    print("\r\nSTOPPED\r\n")
-    sm.stop_monitoring()
-
-    time.sleep(20)
+        name: str = getattr(code, "co_qualname", code.co_name)
+        return f"{name} ({os.path.basename(code.co_filename)}:{line})".replace(";", ":")
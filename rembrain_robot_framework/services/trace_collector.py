@@ -0,0 +1,59 @@
+import typing as T
+from collections import defaultdict, deque
+from threading import Lock
+
+from rembrain_robot_framework.models.trace_context import TraceContext
+from rembrain_robot_framework.services.queue_telemetry import percentile
+
+
+class TraceCollector:
+    """
+    Collects finished traces and reports percentiles of their latencies:
+        {
+            "total": {"count": number of traces, "p50": seconds, "p99": seconds},
+            "hops": {"name.stage -> name.stage": {"count", "p50", "p99"}},
+        }
+
+    Only the last max_samples latencies of every hop are kept, so the report describes recent traffic.
+
+    :param max_samples: Number of the latest latencies to keep for every hop.
+    """
+
+    DEFAULT_MAX_SAMPLES = 10000
+
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        self._max_samples: int = max_samples
+        self._totals: T.Deque[float] = deque(maxlen=max_samples)
+        self._hops: T.DefaultDict[str, T.Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self._max_samples)
+        )
+        self._lock = Lock()
+
+    def add(self, trace: TraceContext) -> None:
+        with self._lock:
+            self._totals.append(trace.total)
+            for label, latency in trace.latencies():
+                self._hops[label].append(latency)
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "total": self._summarize(self._totals),
+                "hops": {
+                    label: self._summarize(latencies)
+                    for label, latencies in self._hops.items()
+                },
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+            self._hops.clear()
+
+    @staticmethod
+    def _summarize(latencies: T.Sequence[float]) -> dict:
+        return {
+            "count": len(latencies),
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+        }
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from multiprocessing import Queue
+from queue import Empty
+from threading import Timer
+
+import pytest
+
+from rembrain_robot_framework import AsyncRobotProcess
+from rembrain_robot_framework.models.request import Request
+from rembrain_robot_framework.queues import PipeQueue, ThreadQueue
+
+
+@pytest.fixture()
+def default_proc_params_fx() -> dict:
+    return {
+        "name": "rp",
+        "shared_objects": {},
+        "consume_queues": {},
+        "publish_queues": {},
+        "system_queues": {},
+        "watcher_queue": None,
+    }
+
+
+@pytest.mark.parametrize("queue_class", (Queue, ThreadQueue))
+def test_consume_waits_for_message(default_proc_params_fx: dict, queue_class: type) -> None:
+    common_queue = queue_class(2)
+    default_proc_params_fx.update(consume_queues={"message1": common_queue})
+    r = AsyncRobotProcess(**default_proc_params_fx)
+
+    Timer(0.3, common_queue.put, args=("test",)).start()
+    started: float = time.monotonic()
+    assert asyncio.run(r.aconsume(timeout=2.0)) == "test"
+    assert 0.2 < time.monotonic() - started < 1.0
+
+    with pytest.raises(Empty):
+        asyncio.run(r.aconsume(timeout=0.3))
+
+
+def test_publish_to_full_queue_does_not_block_loop(default_proc_params_fx: dict) -> None:
+    common_queue = Queue(maxsize=1)
+    default_proc_params_fx.update(
+        consume_queues={"message1": common_queue},
+        publish_queues={"message1": [common_queue]},
+    )
+    r = AsyncRobotProcess(**default_proc_params_fx)
+
+    async def ticker() -> int:
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.05)
+            ticks += 1
+
+        return ticks
+
+    async def main() -> list:
+        await r.apublish(1)
+        publishing = asyncio.ensure_future(r.apublish(2))
+        ticks: int = await ticker()
+
+        messages = [await r.aconsume(timeout=2.0)]
+        await publishing
+        messages.append(await r.aconsume(timeout=2.0))
+        return [ticks, messages]
+
+    assert asyncio.run(main()) == [5, [1, 2]]
+
+
+def test_publish_of_big_message_to_pipe_does_not_block_loop(
+    default_proc_params_fx: dict,
+) -> None:
+    # the message is bigger than the pipe buffer, so the put waits for the consumer even though the queue isn't full
+    pipe = PipeQueue(maxsize=2)
+    default_proc_params_fx.update(
+        consume_queues={"message1": pipe}, publish_queues={"message1": [pipe]}
+    )
+    r = AsyncRobotProcess(**default_proc_params_fx)
+    message = b"x" * 1024 * 1024
+
+    async def main() -> list:
+        publishing = asyncio.ensure_future(r.apublish(message))
+        await asyncio.sleep(0.2)
+        done: bool = publishing.done()
+
+        received: bytes = await r.aconsume(timeout=2.0)
+        await publishing
+        return [done, received == message]
+
+    assert asyncio.run(main()) == [False, True]
+    r.free_resources()
+
+
+def test_sync_methods_are_kept(default_proc_params_fx: dict) -> None:
+    common_queue = Queue(maxsize=2)
+    system_queue = Queue(maxsize=2)
+    default_proc_params_fx.update(
+        consume_queues={"message1": common_queue},
+        publish_queues={"message1": [common_queue]},
+        system_queues={"rp": system_queue},
+    )
+    r = AsyncRobotProcess(**default_proc_params_fx)
+
+    r.publish(Request(client_process="rp", data="request"))
+    request: Request = r.get_request()
+    r.respond_to(Request(uid=request.uid, client_process="rp", data="response"))
+    assert r.wait_response(request.uid, timeout=2.0) == "response"
+
+
+def test_consume_any(default_proc_params_fx: dict) -> None:
+    q1, q2 = Queue(maxsize=2), Queue(maxsize=2)
+    default_proc_params_fx.update(consume_queues={"message1": q1, "message2": q2})
+    r = AsyncRobotProcess(**default_proc_params_fx)
+
+    Timer(0.2, q2.put, args=("test",)).start()
+    assert asyncio.run(r.aconsume_any(timeout=2.0)) == ("message2", "test")
+
+
+def test_wait_response(default_proc_params_fx: dict) -> None:
+    system_queue = Queue(maxsize=5)
+    default_proc_params_fx.update(system_queues={"rp": system_queue})
+    r = AsyncRobotProcess(**default_proc_params_fx)
+
+    first = Request(client_process="rp", data="first")
+    second = Request(client_process="rp", data="second")
+    Timer(0.1, system_queue.put, args=(first,)).start()
+    Timer(0.2, system_queue.put, args=(second,)).start()
+
+    assert asyncio.run(r.await_response(second.uid, timeout=2.0)) == "second"
+    assert asyncio.run(r.await_response(first.uid, timeout=2.0)) == "first"
@@ -1,10 +1,11 @@
 import time
 import typing as T
+from queue import Empty
 from uuid import UUID
 
 import numpy as np
 
-from rembrain_robot_framework import RobotProcess
+from rembrain_robot_framework import AsyncRobotProcess, RobotProcess
 from rembrain_robot_framework.models.request import Request
 
 
@@ -30,6 +31,15 @@ class P2(RobotProcess):
                 self.log.info(f"{self.name} {record} received")
 
 
+class AsyncP2(AsyncRobotProcess):
+    async def run(self) -> None:
+        for _ in range(2):
+            record: str = await self.aconsume(timeout=2.0)
+            if record == "hi":
+                with self.shared.hi_lock:
+                    self.shared.hi_received.value += 1
+
+
 class P3(RobotProcess):
     def run(self) -> None:
         rec: str = self.consume("messages1")
@@ -168,3 +178,88 @@ class WatcherP2(RobotProcess):
     def run(self) -> None:
         time.sleep(1)
         self.heartbeat(self.TEST_MESSAGE)
+
+
+class NumberSender(RobotProcess):
+    def run(self) -> None:
+        for i in range(100):
+            self.publish(i)
+
+
+class SlowWorker(RobotProcess):
+    def run(self) -> None:
+        while True:
+            number: int = self.consume()
+            time.sleep(np.random.random() * 0.05)
+
+            self.shared.workers[self.name] = True
+            self.publish(number)
+
+
+class OrderCollector(RobotProcess):
+    def run(self) -> None:
+        for _ in range(100):
+            self.shared.results.append(self.consume())
+
+
+class PollingConsumer(RobotProcess):
+    def run(self) -> None:
+        while True:
+            try:
+                record: str = self.consume(timeout=0.2)
+            except Empty:
+                continue
+
+            with self.span("handle"), self.shared.hi_lock:
+                self.shared.hi_received.value += 1
+            self.log.info(f"{self.name} {record} received")
+
+
+class FailingProcess(RobotProcess):
+    def run(self) -> None:
+        raise RuntimeError("Failure for restart.")
+
+
+class Ticker(RobotProcess):
+    def run(self) -> None:
+        while True:
+            self.publish("hi")
+            time.sleep(0.05)
+
+
+class EvictingSender(RobotProcess):
+    def run(self) -> None:
+        for i in range(2000):
+            self.publish(i, clear_on_overflow=True)
+
+        self.shared.sent.value = True
+
+
+class LastNumberConsumer(RobotProcess):
+    def run(self) -> None:
+        self.shared.ordered.value = True
+        self.shared.last_number.value = -1
+        while True:
+            try:
+                number: int = self.consume(timeout=0.05)
+            except Empty:
+                continue
+
+            if number <= self.shared.last_number.value:
+                self.shared.ordered.value = False
+            self.shared.last_number.value = number
+
+
+class Sleeper(RobotProcess):
+    def run(self) -> None:
+        while True:
+            time.sleep(0.1)
+
+
+class ExitIgnoringProcess(RobotProcess):
+    def run(self) -> None:
+        while True:
+            try:
+                time.sleep(0.1)
+            except SystemExit:
+                self.log.info(f"{self.name} ignores exit")
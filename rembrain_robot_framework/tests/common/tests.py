@@ -1,13 +1,25 @@
+import json
 import os
+import platform
+from multiprocessing import Process
+from multiprocessing.connection import wait
 from unittest import mock
 
 import pytest
 from envyaml import EnvYAML
 from pytest_mock import MockerFixture
 
-from rembrain_robot_framework import RobotDispatcher
+from rembrain_robot_framework import RobotDispatcher, utils
 from rembrain_robot_framework.processes import StubProcess
+from rembrain_robot_framework.queues import (
+    LatestValueQueue,
+    OverflowPolicy,
+    PipeQueue,
+    SerializedMessage,
+    ThreadQueue,
+)
 from rembrain_robot_framework.tests.common.processes import *
+from rembrain_robot_framework.utils import ConfigurationError
 
 
 @pytest.fixture
@@ -53,6 +65,24 @@ def test_queues_are_the_same(robot_dispatcher_fx: RobotDispatcher) -> None:
     assert robot_dispatcher_fx.get_queue_max_size("messages") == 20
 
 
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config1.yaml",
+             {
+                 "p1": {"process_class": P1, "keep_alive": False},
+                 "p1_new": {"process_class": P1, "keep_alive": False},
+                 "p2": {"process_class": AsyncP2, "keep_alive": False},
+                 "p2_new": {"process_class": AsyncP2, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_async_process(robot_dispatcher_fx: RobotDispatcher) -> None:
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 4
+
+
 @pytest.mark.parametrize(
     "robot_dispatcher_fx",
     ((
@@ -72,6 +102,49 @@ def test_input_queues_different(robot_dispatcher_fx: RobotDispatcher) -> None:
     assert robot_dispatcher_fx.get_queue_max_size("messages2") == 50
 
 
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config2.yaml",
+             {
+                 "p1": {"process_class": P1, "keep_alive": False},
+                 "p1_new": {"process_class": P1, "keep_alive": False},
+                 "p3": {"process_class": P3, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_single_producer_queues_are_not_pipes(robot_dispatcher_fx: RobotDispatcher) -> None:
+    # pipes are used only if they are set in 'queues_types'
+    queue = robot_dispatcher_fx.processes["p3"]["consume_queues"]["messages1"]
+    assert not isinstance(queue, PipeQueue)
+    assert robot_dispatcher_fx.processes["p1"]["publish_queues"]["messages1"] == [queue]
+
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 2
+    assert queue.empty()
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_clear_on_overflow.yaml",
+             {
+                 "sender": {"process_class": EvictingSender, "keep_alive": False},
+                 "consumer": {"process_class": LastNumberConsumer, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_publisher_evicts_from_pipe_while_consumer_reads(robot_dispatcher_fx: RobotDispatcher) -> None:
+    assert isinstance(robot_dispatcher_fx.processes["consumer"]["consume_queues"]["numbers"], PipeQueue)
+
+    time.sleep(5.0)
+    assert robot_dispatcher_fx.shared_objects["sent"].value
+    assert robot_dispatcher_fx.shared_objects["last_number"].value == 1999
+    assert robot_dispatcher_fx.shared_objects["ordered"].value
+
+
 @pytest.mark.parametrize(
     "robot_dispatcher_fx",
     ((
@@ -97,6 +170,12 @@ def test_output_queues_different(robot_dispatcher_fx: RobotDispatcher) -> None:
                  "p1": {"process_class": VideoSender, "keep_alive": False},
                  "p2": {"process_class": VideoConsumer, "keep_alive": False},
              },
+     ), (
+             "config4_shared_memory.yaml",
+             {
+                 "p1": {"process_class": VideoSender, "keep_alive": False},
+                 "p2": {"process_class": VideoConsumer, "keep_alive": False},
+             },
      ),),
     indirect=True,
 )
@@ -338,3 +417,485 @@ def test_queue_is_not_in_consume_and_publish(robot_dispatcher_class_fx: tuple):
         class_(config, processes)
 
     assert f"Process 'p2' has the same queue for consume and publish." in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_queue_policies.yaml",
+             {
+                 "p1": {"process_class": StubProcess, "keep_alive": False},
+                 "p2": {"process_class": StubProcess, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_latest_queue_policy(robot_dispatcher_fx: RobotDispatcher) -> None:
+    consume_queues = robot_dispatcher_fx.processes["p2"]["consume_queues"]
+    assert isinstance(consume_queues["messages1"], LatestValueQueue)
+    assert not isinstance(consume_queues["messages2"], LatestValueQueue)
+
+    publish_queues = robot_dispatcher_fx.processes["p1"]["publish_queues"]
+    assert publish_queues["messages1"] == [consume_queues["messages1"]]
+
+    for _ in range(3):
+        consume_queues["messages1"].put("test")
+
+    time.sleep(1.0)
+    assert not robot_dispatcher_fx.check_queues_overflow()
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_overflow_policies.yaml",
+             {
+                 "p1": {"process_class": StubProcess, "keep_alive": False},
+                 "p2": {"process_class": StubProcess, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_overflow_policies(robot_dispatcher_fx: RobotDispatcher) -> None:
+    consume_queues = robot_dispatcher_fx.processes["p2"]["consume_queues"]
+    assert consume_queues["messages1"].policy == OverflowPolicy.DROP_NEW
+    assert consume_queues["messages2"].policy == OverflowPolicy.BLOCK
+
+    for _ in range(5):
+        consume_queues["messages1"].put("test")
+
+    consume_queues["messages2"].put("test")
+    time.sleep(1.0)
+
+    assert robot_dispatcher_fx.get_dropped_messages() == {"p2": {"messages1": 3, "messages2": 0}}
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_queues_max_bytes.yaml",
+             {
+                 "p1": {"process_class": StubProcess, "keep_alive": False},
+                 "p2": {"process_class": StubProcess, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_queues_max_bytes(robot_dispatcher_fx: RobotDispatcher) -> None:
+    queue = robot_dispatcher_fx.processes["p2"]["consume_queues"]["messages1"]
+    assert queue.max_bytes == 2100
+
+    for _ in range(5):
+        queue.put(b"x" * 1000)
+        time.sleep(0.1)
+
+    queues_bytes = robot_dispatcher_fx.get_queues_bytes()
+    assert 2000 < queues_bytes["p2"]["messages1"] < 2100
+    assert robot_dispatcher_fx.get_dropped_messages() == {"p2": {"messages1": 3}}
+    assert robot_dispatcher_fx.check_queues_overflow()
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_spill.yaml",
+             {
+                 "p1": {"process_class": StubProcess, "keep_alive": False},
+                 "p2": {"process_class": StubProcess, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_spill_with_queues_max_bytes(robot_dispatcher_fx: RobotDispatcher) -> None:
+    consume_queues = robot_dispatcher_fx.processes["p2"]["consume_queues"]
+    # max bytes of the spill buffer don't limit the queue itself
+    assert consume_queues["messages1"].max_bytes is None
+    assert consume_queues["messages1"]._spill.max_bytes == RobotDispatcher.DEFAULT_SPILL_BYTES
+
+    queue = consume_queues["messages2"]
+    assert queue.max_bytes == 2100
+    assert queue._spill.max_bytes == 4096
+
+    for i in range(5):
+        queue.put(bytes([i]) * 1000)
+        time.sleep(0.1)
+
+    assert robot_dispatcher_fx.get_queues_bytes()["p2"]["messages2"] < 2100
+    # messages of a queue with max bytes are kept serialized
+    messages = [queue.get(timeout=1.0) for _ in range(5)]
+    assert all(isinstance(m, SerializedMessage) for m in messages)
+    assert [m.load()[0] for m in messages] == list(range(5))
+    assert robot_dispatcher_fx.get_dropped_messages() == {"p2": {"messages1": 0, "messages2": 0}}
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_replicas.yaml",
+             {
+                 "sender": {"process_class": NumberSender, "keep_alive": False},
+                 "worker": {"process_class": SlowWorker, "keep_alive": False},
+                 "collector": {"process_class": OrderCollector, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_replicas_preserve_order(robot_dispatcher_fx: RobotDispatcher) -> None:
+    workers = ["worker#0", "worker#1", "worker#2"]
+    assert all(w in robot_dispatcher_fx.processes for w in workers)
+    assert "worker" not in robot_dispatcher_fx.processes
+
+    consume_queues = [robot_dispatcher_fx.processes[w]["consume_queues"]["numbers"] for w in workers]
+    assert all(q is consume_queues[0] for q in consume_queues)
+
+    time.sleep(5.0)
+    assert list(robot_dispatcher_fx.shared_objects["results"]) == list(range(100))
+    assert len(robot_dispatcher_fx.shared_objects["workers"]) > 1
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_ordered_spill.yaml",
+             {
+                 "sender": {"process_class": NumberSender, "keep_alive": False},
+                 "worker": {"process_class": SlowWorker, "keep_alive": False},
+                 "collector": {"process_class": OrderCollector, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_replicas_preserve_order_with_spill(robot_dispatcher_fx: RobotDispatcher) -> None:
+    assert robot_dispatcher_fx.processes["collector"]["consume_queues"]["results"].policy == OverflowPolicy.SPILL
+
+    time.sleep(5.0)
+    assert list(robot_dispatcher_fx.shared_objects["results"]) == list(range(100))
+    assert robot_dispatcher_fx.get_dropped_messages()["collector"] == {"results": 0}
+
+
+@pytest.mark.parametrize("robot_dispatcher_class_fx", (("config_with_replicas.yaml",),), indirect=True)
+@pytest.mark.parametrize(
+    "queue_settings",
+    (
+        {"queue_policies": {"results": "latest"}},
+        {"overflow_policies": {"results": "drop_oldest"}},
+        {"overflow_policies": {"results": {"policy": "drop_new"}}},
+    ),
+)
+def test_preserve_order_with_dropping_queue(robot_dispatcher_class_fx: tuple, queue_settings: dict) -> None:
+    class_, config = robot_dispatcher_class_fx
+    config = {**config.export(), **queue_settings}
+    processes: dict = {p: {"process_class": StubProcess} for p in config["processes"]}
+
+    with pytest.raises(ConfigurationError):
+        class_(config, processes)
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_autoscaling.yaml",
+             {
+                 "p1": {"process_class": StubProcess, "keep_alive": False},
+                 "worker": {"process_class": StubProcess, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_autoscaling(robot_dispatcher_fx: RobotDispatcher) -> None:
+    assert "worker#0" in robot_dispatcher_fx.processes
+    assert "worker#1" not in robot_dispatcher_fx.processes
+    assert "worker#1" in robot_dispatcher_fx.system_queues
+
+    queue = robot_dispatcher_fx.processes["worker#0"]["consume_queues"]["messages"]
+    for _ in range(8):
+        queue.put("test")
+
+    time.sleep(1.0)
+    for _ in range(3):
+        robot_dispatcher_fx.autoscale()
+
+    assert "worker#1" in robot_dispatcher_fx.process_pool
+    assert robot_dispatcher_fx.processes["worker#1"]["consume_queues"]["messages"] is queue
+
+    while not queue.empty():
+        queue.get(timeout=1.0)
+
+    for _ in range(5):
+        robot_dispatcher_fx.autoscale()
+
+    assert "worker#1" not in robot_dispatcher_fx.process_pool
+    assert "worker#1" not in robot_dispatcher_fx.processes
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_group.yaml",
+             {
+                 "p1": {"process_class": P1, "keep_alive": False},
+                 "p2": {"process_class": P2, "keep_alive": False},
+                 "p2_new": {"process_class": P2, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_process_group(robot_dispatcher_fx: RobotDispatcher) -> None:
+    assert isinstance(robot_dispatcher_fx.processes["p2"]["consume_queues"]["messages"], ThreadQueue)
+    assert not isinstance(robot_dispatcher_fx.processes["p2_new"]["consume_queues"]["messages"], ThreadQueue)
+
+    process_pool = robot_dispatcher_fx.process_pool
+    assert process_pool["p1"] is process_pool["p2"]
+    assert process_pool["p1"] is not process_pool["p2_new"]
+
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 2
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_startup.yaml",
+             {
+                 "p1": {"process_class": P1, "keep_alive": False},
+                 "p1_new": {"process_class": P1, "keep_alive": False},
+                 "p2": {"process_class": P2, "keep_alive": False},
+                 "p2_new": {"process_class": P2, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_forkserver_startup(robot_dispatcher_fx: RobotDispatcher) -> None:
+    assert robot_dispatcher_fx.mp_context.get_start_method() == "forkserver"
+    # no shared dict/list in the config
+    assert robot_dispatcher_fx._manager is None
+
+    # start_processes() waits until all processes are ready
+    timings: T.Dict[str, float] = robot_dispatcher_fx.get_startup_timings()
+    assert set(timings) == {"p1", "p1_new", "p2", "p2_new"}
+    assert all(t > 0 for t in timings.values())
+
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 4
+
+
+@pytest.mark.parametrize(
+    "startup",
+    (
+        {"start_method": "fork"},
+        {"start_method": "spawn", "preload": ["numpy"]},
+    ),
+)
+def test_incorrect_startup(startup: dict) -> None:
+    with pytest.raises(ConfigurationError):
+        RobotDispatcher({"processes": {}, "startup": startup}, {})
+
+
+@pytest.mark.parametrize("robot_dispatcher_fx", (("config_with_import_paths.yaml", {}),), indirect=True)
+def test_process_class_import_paths(robot_dispatcher_fx: RobotDispatcher) -> None:
+    assert robot_dispatcher_fx.processes["p1"]["process_class"] == "rembrain_robot_framework.tests.common.processes:P1"
+
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 1
+
+
+@pytest.mark.parametrize("robot_dispatcher_class_fx", (("config_empty.yaml",),), indirect=True)
+@pytest.mark.parametrize(
+    "process_class",
+    (
+        "rembrain_robot_framework.tests.common.processes.P1",
+        "rembrain_robot_framework.tests.common.not_existing:P1",
+        "rembrain_robot_framework.tests.common.processes:NotExisting",
+    ),
+)
+def test_incorrect_import_path(robot_dispatcher_class_fx: tuple, process_class: str) -> None:
+    class_, _ = robot_dispatcher_class_fx
+    config: dict = {"processes": {"p1": {"process_class": process_class}}}
+
+    with pytest.raises(ConfigurationError):
+        class_(config)
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_fuse.yaml",
+             {
+                 "p1": {"process_class": P1, "keep_alive": False},
+                 "p2": {"process_class": P2, "keep_alive": False},
+                 "p1_new": {"process_class": P1, "keep_alive": False},
+                 "p2_new": {"process_class": P2, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_fused_processes(robot_dispatcher_fx: RobotDispatcher) -> None:
+    processes: dict = robot_dispatcher_fx.processes
+    assert isinstance(processes["p2"]["consume_queues"]["messages"], ThreadQueue)
+    # fused automatically
+    assert isinstance(processes["p2_new"]["consume_queues"]["messages_new"], ThreadQueue)
+
+    process_pool = robot_dispatcher_fx.process_pool
+    assert process_pool["p1"] is process_pool["p2"]
+    assert process_pool["p1_new"] is process_pool["p2_new"]
+    assert process_pool["p1"] is not process_pool["p1_new"]
+
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 2
+
+
+@pytest.mark.parametrize("robot_dispatcher_class_fx", (("config_with_fuse.yaml",),), indirect=True)
+@pytest.mark.parametrize("fuse", (["p1"], ["p2", "p1"], ["p1", "p3"]))
+def test_incorrect_fuse(robot_dispatcher_class_fx: tuple, fuse: T.List[str]) -> None:
+    class_, config = robot_dispatcher_class_fx
+    config = {**config.export(), "fuse": fuse}
+    processes: dict = {p: {"process_class": StubProcess} for p in config["processes"]}
+
+    with pytest.raises(ConfigurationError):
+        class_(config, processes)
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_telemetry.yaml",
+             {
+                 "p1": {"process_class": P1, "keep_alive": False},
+                 "p2": {"process_class": P2, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_queue_stats(robot_dispatcher_fx: RobotDispatcher) -> None:
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 1
+
+    stats: dict = robot_dispatcher_fx.queue_stats()["p2"]["messages"]
+    assert stats["size"] == 0
+    assert stats["max_size"] == 50
+    assert stats["dropped"] == 0
+    assert stats["messages"] == 1
+    # the message to one queue isn't pickled by the publisher
+    assert stats["bytes"] == 0
+    # no messages during the last interval
+    assert stats["messages_per_second"] == 0.0
+
+
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_spans.yaml",
+             {
+                 "p1": {"process_class": P1, "keep_alive": False},
+                 "p2": {"process_class": PollingConsumer, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_export_chrome_trace(robot_dispatcher_fx: RobotDispatcher, tmp_path) -> None:
+    time.sleep(3.0)
+    assert robot_dispatcher_fx.shared_objects["hi_received"].value == 1
+
+    path: str = str(tmp_path / "trace.json")
+    assert robot_dispatcher_fx.export_chrome_trace(path) > 0
+
+    with open(path) as f:
+        events: T.List[dict] = json.load(f)["traceEvents"]
+
+    assert any(e["ph"] == "M" and e["args"]["name"].startswith("p2 ") for e in events)
+    assert [e["name"] for e in events if e["name"] == "handle"] == ["handle"]
+
+    waits: T.List[dict] = [e for e in events if e["name"] == "blocked waiting"]
+    assert waits and all(e["args"] == {"queue": "messages"} for e in waits)
+    assert robot_dispatcher_fx.export_chrome_trace(path, window=0.0) == 0
+
+
+@pytest.mark.skipif(platform.system() != "Linux", reason="/proc is required")
+@pytest.mark.parametrize(
+    "robot_dispatcher_fx",
+    ((
+             "config_with_resources.yaml",
+             {
+                 "p1": {"process_class": FailingProcess},
+                 "p2": {"process_class": P2, "keep_alive": False},
+             },
+     ),),
+    indirect=True,
+)
+def test_resource_stats(robot_dispatcher_fx: RobotDispatcher) -> None:
+    assert robot_dispatcher_fx.resource_stats()["p2"]["cpu_percent"] is None
+    time.sleep(2.5)
+
+    stats: dict = robot_dispatcher_fx.resource_stats()
+    assert set(stats.keys()) == {"p1", "p2"}
+    assert stats["p1"]["restarts"] == 1
+    assert stats["p2"]["restarts"] == 0
+    assert stats["p2"]["pid"] == robot_dispatcher_fx.process_pool["p2"].pid
+    assert stats["p2"]["cpu_percent"] >= 0.0
+    assert stats["p2"]["rss_bytes"] > 0
+    assert stats["p2"]["threads"] >= 1
+
+    robot_dispatcher_fx.stop_process("p1")
+
+
+def test_control_commands(tmp_path) -> None:
+    with mock.patch.dict("os.environ", {"PROFILING_DIR": str(tmp_path)}):
+        config: T.Any = EnvYAML(os.path.join(os.path.dirname(__file__), "configs", "config_with_profiling.yaml"))
+
+    robot_dispatcher = RobotDispatcher(
+        config, {"p1": {"process_class": Ticker}, "p2": {"process_class": PollingConsumer}}
+    )
+    robot_dispatcher.start_processes()
+    try:
+        robot_dispatcher.set_log_level("p2", "warning")
+        robot_dispatcher.start_profiler("p2", "stack", duration=0.5)
+        robot_dispatcher.start_profiler("p2", "cprofile", duration=0.5)
+        robot_dispatcher.take_memory_snapshot("p2", duration=0.2)
+        with pytest.raises(ValueError):
+            robot_dispatcher.start_profiler("p2", "perf")
+
+        time.sleep(2.0)
+        files: T.Dict[str, str] = {name.rsplit(".", 1)[1]: name for name in os.listdir(tmp_path)}
+        assert set(files) == {"collapsed", "prof", "tracemalloc"}
+        assert all(name.startswith("p2.") for name in files.values())
+
+        with open(tmp_path / files["collapsed"]) as f:
+            assert "PollingConsumer.run" in f.read()
+    finally:
+        robot_dispatcher.stop_process("p1")
+        robot_dispatcher.stop_process("p2")
+        robot_dispatcher.stop_logging()
+
+
+def test_stop_process_without_waiting(mocker: MockerFixture) -> None:
+    mocker.patch.object(RobotDispatcher, "STOP_TIMEOUT", 0.5)
+    robot_dispatcher = RobotDispatcher(
+        # the processes handle SIGTERM when they are ready
+        {"processes": {"p1": {}, "p2": {}}, "startup": {"wait_ready": True}},
+        {"p1": {"process_class": ExitIgnoringProcess}, "p2": {"process_class": Sleeper}},
+    )
+    robot_dispatcher.start_processes()
+    try:
+        ignoring: Process = robot_dispatcher.process_pool["p1"]
+        started: float = time.monotonic()
+        robot_dispatcher.stop_process("p1", wait=False)
+
+        assert time.monotonic() - started < 0.3
+        assert "p1" not in robot_dispatcher.process_pool
+        # it's killed after STOP_TIMEOUT, before it would exit by itself
+        assert wait([ignoring.sentinel], utils.EXIT_TIMEOUT - 1.0)
+
+        sleeper: Process = robot_dispatcher.process_pool["p2"]
+        robot_dispatcher.stop_process("p2")
+        assert sleeper.exitcode == 0
+    finally:
+        robot_dispatcher.stop_logging()
+
+
+def test_control_commands_require_profiling() -> None:
+    robot_dispatcher = RobotDispatcher({"processes": {}})
+
+    with pytest.raises(ConfigurationError):
+        robot_dispatcher.set_log_level("p1", "debug")
+
+    robot_dispatcher.stop_logging()
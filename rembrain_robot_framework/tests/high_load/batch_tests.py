@@ -0,0 +1,81 @@
+import time
+import typing as T
+from multiprocessing import get_context
+
+import pytest
+
+from rembrain_robot_framework import RobotProcess
+
+MESSAGES = 50000
+BATCH_SIZE = 100
+
+
+def _consume(queue: T.Any, count: int, batched: bool, started: T.Any, done: T.Any) -> None:
+    process = RobotProcess(
+        name="consumer",
+        shared_objects={},
+        consume_queues={"telemetry": queue},
+        publish_queues={},
+        system_queues={},
+        watcher_queue=None,
+    )
+
+    process.consume()
+    started.set()
+
+    received = 0
+    while received < count:
+        if batched:
+            received += len(process.consume_batch(max_items=BATCH_SIZE))
+        else:
+            process.consume()
+            received += 1
+
+    done.set()
+
+
+def _measure_throughput(batched: bool) -> float:
+    """Returns number of small messages per second that go from one process to another."""
+    ctx = get_context("spawn")
+    queue = ctx.Queue(maxsize=50)
+    started, done = ctx.Event(), ctx.Event()
+    consumer = ctx.Process(
+        target=_consume, args=(queue, MESSAGES, batched, started, done), daemon=True
+    )
+    consumer.start()
+
+    process = RobotProcess(
+        name="producer",
+        shared_objects={},
+        consume_queues={},
+        publish_queues={"telemetry": [queue]},
+        system_queues={},
+        watcher_queue=None,
+    )
+    message = {"joint": 1, "position": 0.5, "velocity": 0.1}
+
+    # don't count the start of the consumer
+    process.publish(message)
+    started.wait()
+    start: float = time.time()
+
+    for i in range(0, MESSAGES, BATCH_SIZE if batched else 1):
+        if batched:
+            process.publish_many([message] * BATCH_SIZE)
+        else:
+            process.publish(message)
+
+    done.wait()
+    elapsed: float = time.time() - start
+
+    consumer.join()
+    return MESSAGES / elapsed
+
+
+@pytest.mark.slow
+def test_batch_throughput_benchmark() -> None:
+    single = _measure_throughput(batched=False)
+    batched = _measure_throughput(batched=True)
+
+    print(f"\npublish/consume: {single:.0f} msg/s, publish_many/consume_batch: {batched:.0f} msg/s")
+    assert batched > single * 10
@@ -0,0 +1,87 @@
+import os
+import time
+import typing as T
+
+import numpy as np
+import pytest
+
+from rembrain_robot_framework.pack import PackType, Packer, Unpacker
+
+FRAMES = 50
+RESOLUTIONS = ((640, 480), (1920, 1080))
+
+
+def _make_frame(width: int, height: int) -> T.Tuple[np.ndarray, np.ndarray]:
+    """A smooth picture with noise, it's compressed like a camera frame rather than a flat or random image."""
+    x, y = np.meshgrid(np.linspace(0, 255, width), np.linspace(0, 255, height))
+    noise = np.random.randint(0, 20, (height, width, 3))
+    rgb = (np.stack((x, y, (x + y) / 2), axis=-1) + noise).clip(0, 255).astype(np.uint8)
+    depth = (x * 20 + y * 5).astype(np.uint16)
+    return rgb, depth
+
+
+def _measure(pack: T.Callable[[], T.Any]) -> float:
+    """Returns the median time of a call."""
+    times: T.List[float] = []
+    for _ in range(FRAMES):
+        start: float = time.perf_counter()
+        pack()
+        times.append(time.perf_counter() - start)
+
+    return float(np.median(times))
+
+
+def _compare(*calls: T.Callable[[], T.Any]) -> T.List[float]:
+    """
+    Returns the min time of every call. The calls take turns after a warm-up,
+    so a change of the machine load affects all of them alike.
+    """
+    for call in calls:
+        call()
+
+    times: T.List[T.List[float]] = [[] for _ in calls]
+    for _ in range(FRAMES):
+        for call, call_times in zip(calls, times):
+            start: float = time.perf_counter()
+            call()
+            call_times.append(time.perf_counter() - start)
+
+    return [min(call_times) for call_times in times]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("pack_type", (PackType.JPG, PackType.JPG_PNG))
+@pytest.mark.parametrize("width, height", RESOLUTIONS)
+def test_codec_benchmark(pack_type: PackType, width: int, height: int) -> None:
+    rgb, depth = _make_frame(width, height)
+    meta: dict = {"fx": 1000, "fy": 1000, "width": width, "height": height}
+    packer = Packer(pack_type)
+
+    encoding: float = _measure(lambda: packer._encode(rgb, depth, dict(meta)))
+    packing: float = _measure(lambda: packer.pack(rgb, depth, dict(meta)))
+    packing_into: float = _measure(lambda: packer.pack_into(rgb, depth, dict(meta)))
+    package: bytes = packer.pack(rgb, depth, dict(meta))
+    stages: str = ", ".join(f"{stage} {duration * 1e3:.2f} ms" for stage, duration in packer.timings.items())
+
+    parallel_packer = Packer(pack_type, parallel=True)
+    parallel_packing: float = _measure(lambda: parallel_packer.pack(rgb, depth, dict(meta)))
+    parallel_packer.close()
+    unpacker = Unpacker()
+    unpacking: float = _measure(lambda: unpacker.unpack(package))
+    reading_meta: float = _measure(lambda: unpacker.read_meta(package))
+
+    print(
+        f"\n{pack_type.name} {width}x{height}: {len(package) / 1024:.0f} KiB, encoding {encoding * 1e3:.2f} ms, "
+        f"pack {packing * 1e3:.2f} ms, pack_into {packing_into * 1e3:.2f} ms, "
+        f"unpack {unpacking * 1e3:.2f} ms, read_meta {reading_meta * 1e6:.1f} us\n"
+        f"  stages: {stages}, parallel pack {parallel_packing * 1e3:.2f} ms on {os.cpu_count()} CPUs"
+    )
+
+    # copying of the package is a small part of the encoding
+    fastest_encoding, fastest_packing_into = _compare(
+        lambda: packer._encode(rgb, depth, dict(meta)),
+        lambda: packer.pack_into(rgb, depth, dict(meta)),
+    )
+    assert fastest_packing_into < fastest_encoding * 1.2
+    # meta is read without the images
+    assert reading_meta < unpacking / 100
@@ -0,0 +1,67 @@
+import time
+import typing as T
+from multiprocessing import get_context
+
+import numpy as np
+import pytest
+
+from rembrain_robot_framework import RobotProcess
+
+FRAMES = 200
+
+
+def _drain(queue: T.Any, count: int) -> None:
+    for _ in range(count):
+        queue.get()
+
+
+def _measure_publish(message: T.Any, consumers: int, serialize_once: bool) -> float:
+    """Returns CPU time of the publishing process (including queue feeder threads) per message."""
+    ctx = get_context("spawn")
+    queues = [ctx.Queue(maxsize=10) for _ in range(consumers)]
+    readers = [ctx.Process(target=_drain, args=(q, FRAMES), daemon=True) for q in queues]
+    for reader in readers:
+        reader.start()
+
+    process = RobotProcess(
+        name="publisher",
+        shared_objects={},
+        consume_queues={},
+        publish_queues={"frames": queues},
+        system_queues={},
+        watcher_queue=None,
+    )
+
+    start: float = time.process_time()
+    for _ in range(FRAMES):
+        if serialize_once:
+            process.publish(message)
+        else:
+            # how publish worked before: every queue pickles the message on its own
+            for q in queues:
+                q.put(message)
+
+    for reader in readers:
+        reader.join()
+
+    return (time.process_time() - start) / FRAMES
+
+
+@pytest.mark.slow
+def test_fan_out_publish_benchmark() -> None:
+    message = (
+        np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8),
+        np.random.randint(0, 5000, (480, 640), dtype=np.uint16),
+        {"frameindex": 1, "objects": [{"id": i, "box": [i, i, 10, 10]} for i in range(100)]},
+    )
+
+    print("\nconsumers | before, ms | after, ms")
+    results = {}
+    for consumers in (1, 2, 4):
+        before = _measure_publish(message, consumers, serialize_once=False)
+        after = _measure_publish(message, consumers, serialize_once=True)
+        results[consumers] = before, after
+        print(f"{consumers:9} | {before * 1000:10.3f} | {after * 1000:9.3f}")
+
+    before, after = results[4]
+    assert after < before
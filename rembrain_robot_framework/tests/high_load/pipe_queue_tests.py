@@ -0,0 +1,51 @@
+import time
+import typing as T
+from multiprocessing import get_context
+
+import numpy as np
+import pytest
+
+from rembrain_robot_framework.queues import PipeQueue
+
+MESSAGES = 200
+SIZES = (100, 10_000, 1_000_000, 1920 * 1080 * 3)
+
+
+def _echo(requests: T.Any, responses: T.Any, count: int) -> None:
+    for _ in range(count):
+        responses.put(requests.get())
+
+
+def _measure_latency(create_queue: T.Callable[[], T.Any], size: int) -> float:
+    """Returns the median one-way latency of a message between two processes."""
+    ctx = get_context("spawn")
+    requests, responses = create_queue(), create_queue()
+    echo = ctx.Process(target=_echo, args=(requests, responses, MESSAGES), daemon=True)
+    echo.start()
+
+    message = np.random.randint(0, 255, size, dtype=np.uint8)
+    latencies: T.List[float] = []
+    for _ in range(MESSAGES):
+        start: float = time.perf_counter()
+        requests.put(message)
+        responses.get()
+        latencies.append((time.perf_counter() - start) / 2)
+
+    echo.join()
+    return float(np.median(latencies))
+
+
+@pytest.mark.slow
+def test_pipe_queue_latency_benchmark() -> None:
+    ctx = get_context("spawn")
+
+    print("\nmessage size, bytes | mp.Queue, us | PipeQueue, us")
+    results = {}
+    for size in SIZES:
+        queue_latency = _measure_latency(lambda: ctx.Queue(maxsize=10), size)
+        pipe_latency = _measure_latency(lambda: PipeQueue(10, ctx), size)
+        results[size] = queue_latency, pipe_latency
+        print(f"{size:19} | {queue_latency * 1e6:12.1f} | {pipe_latency * 1e6:13.1f}")
+
+    # a single measurement is noisy on a loaded machine
+    assert sum(pipe < queue for queue, pipe in results.values()) > len(SIZES) / 2
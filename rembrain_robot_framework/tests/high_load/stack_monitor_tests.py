@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pytest
+
+from rembrain_robot_framework.services.stack_monitor import StackMonitor
+
+SAMPLING_RATE = 100
+DURATION = 5.0
+THREADS = 4
+STACK_DEPTH = 20
+
+
+def _recurse(depth: int, stop: threading.Event) -> None:
+    if depth > 0:
+        _recurse(depth - 1, stop)
+        return
+
+    while not stop.is_set():
+        sum(range(1000))
+        time.sleep(0.001)
+
+
+@pytest.mark.slow
+def test_stack_monitor_overhead_benchmark(tmp_path) -> None:
+    stop = threading.Event()
+    threads = [threading.Thread(target=_recurse, args=(STACK_DEPTH, stop), daemon=True) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+
+    monitor = StackMonitor("benchmark", sampling_rate=SAMPLING_RATE, output_dir=str(tmp_path))
+    monitor.start_monitoring()
+    time.sleep(DURATION)
+    monitor.stop_monitoring()
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    # sampling holds the GIL, so its time is taken from the threads of the process
+    overhead: float = monitor.sampling_time / DURATION
+    print(
+        f"\n{monitor.samples} samples of {THREADS + 1} threads at {SAMPLING_RATE} Hz, "
+        f"{monitor.sampling_time / monitor.samples * 1e6:.0f} us per sample, overhead {overhead:.3%}"
+    )
+
+    assert monitor.samples >= SAMPLING_RATE * DURATION * 0.5
+    assert overhead < 0.01
@@ -1,5 +1,6 @@
 from rembrain_robot_framework.models.request import Request
 from rembrain_robot_framework.models.bind_request import BindRequest
+from rembrain_robot_framework.models.trace_context import TraceContext
 
 
 def test_correct_request_bson():
@@ -31,3 +32,15 @@ def test_correct_ws_bind_request_bson():
     assert request_after.bind_key == bind_key
     assert request_after.request.client_process == client_process
     assert request_after.request.data == data
+
+
+def test_trace_survives_bson() -> None:
+    trace = TraceContext().with_hop("client", "publish")
+
+    request_after = Request.from_bson(Request(client_process="client", data=b"qwe", trace=trace).to_bson())
+    assert request_after.trace == trace
+
+    bind_request = BindRequest(bind_key="key", request=Request(client_process="client", data=b"qwe", trace=trace))
+    assert BindRequest.from_bson(bind_request.to_bson()).request.trace == trace
+
+    assert Request.from_bson(Request(client_process="client", data=b"qwe").to_bson()).trace is None
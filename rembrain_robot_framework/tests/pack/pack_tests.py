@@ -2,7 +2,7 @@ import numpy as np
 import pytest
 from _pytest.fixtures import SubRequest
 
-from rembrain_robot_framework.pack import PackType, Packer, Unpacker
+from rembrain_robot_framework.pack import PackHeader, PackType, Packer, Unpacker
 from rembrain_robot_framework.tests.models import Image
 
 
@@ -44,3 +44,63 @@ def test_correct_full_pack_jpg(pack_buffer_fx: bytes, img_data_fx: Image) -> Non
     assert len(test_unpacker_result) == 3
     assert np.sqrt(np.mean(np.square(test_unpacker_result[0] - img_data_fx.rgb))) < 5
     assert test_unpacker_result[1] is None
+
+
+@pytest.mark.parametrize("pack_type", (PackType.JPG_PNG, PackType.JPG))
+def test_pack_into(pack_type: PackType, img_data_fx: Image) -> None:
+    packer = Packer(pack_type)
+    expected: bytes = Packer(pack_type).pack(img_data_fx.rgb, img_data_fx.depth, dict(img_data_fx.camera))
+
+    view: memoryview = packer.pack_into(img_data_fx.rgb, img_data_fx.depth, dict(img_data_fx.camera))
+    assert view == expected
+
+    # the buffer is reused by the next frames that fit it
+    small: memoryview = packer.pack_into(img_data_fx.rgb[:100, :100], img_data_fx.depth[:50, :50])
+    assert small.obj is view.obj
+    assert len(small) < len(view)
+
+    rgb, _, meta = Unpacker().unpack(bytes(small))
+    assert rgb.shape == (100, 100, 3)
+
+
+@pytest.mark.parametrize("pack_type", (PackType.JPG_PNG, PackType.JPG))
+def test_parse_header_and_read_meta(pack_type: PackType, img_data_fx: Image) -> None:
+    buffer: memoryview = Packer(pack_type).pack_into(img_data_fx.rgb, img_data_fx.depth, dict(img_data_fx.camera))
+    unpacker = Unpacker()
+
+    header: PackHeader = unpacker.parse_header(buffer)
+    assert header.pack_type == pack_type
+    assert header.size == len(buffer)
+    assert (header.depth_size > 0) == (pack_type == PackType.JPG_PNG)
+
+    meta: dict = unpacker.read_meta(buffer)
+    assert meta["fx"] == img_data_fx.camera["fx"]
+    assert ("frameindex" in meta) == (pack_type == PackType.JPG_PNG)
+
+    # an incomplete package
+    assert unpacker.parse_header(buffer[:-1]) is None
+    assert unpacker.read_meta(buffer[:5]) is None
+    assert unpacker.unpack(buffer[:-1]) == (None, None, None)
+
+
+@pytest.mark.parametrize("pack_buffer_fx", (PackType.JPG_PNG,), indirect=True)
+def test_pre_unpack_doesnt_copy(pack_buffer_fx: bytes) -> None:
+    rgb, depth, meta = Unpacker().pre_unpack(pack_buffer_fx)
+
+    assert isinstance(meta, str)
+    for encoded in (rgb, depth):
+        assert not encoded.flags.owndata
+        assert encoded.base.obj is pack_buffer_fx
+
+
+def test_parallel_encoding(img_data_fx: Image) -> None:
+    stages = []
+    packer = Packer(PackType.JPG_PNG, parallel=True, on_stage=lambda stage, *_: stages.append(stage))
+    try:
+        result: bytes = packer.pack(img_data_fx.rgb, img_data_fx.depth, dict(img_data_fx.camera))
+    finally:
+        packer.close()
+
+    assert result == Packer(PackType.JPG_PNG).pack(img_data_fx.rgb, img_data_fx.depth, dict(img_data_fx.camera))
+    assert sorted(stages) == ["depth", "pack", "rgb"]
+    assert all(duration > 0 for duration in packer.timings.values())
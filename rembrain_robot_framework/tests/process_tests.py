@@ -1,11 +1,23 @@
-from multiprocessing import Queue
+import queue
+from multiprocessing import Queue, get_context
 import time
 from queue import Empty
+from threading import Thread
 
+import numpy as np
 import pytest
 from pytest_mock import MockerFixture
 
 from rembrain_robot_framework import RobotProcess
+from rembrain_robot_framework.queues import (
+    OverflowPolicy,
+    PolicyQueue,
+    SequencedMessage,
+    SequenceEnd,
+    Sequencer,
+    SharedMemoryQueue,
+    ThreadQueue,
+)
 from rembrain_robot_framework.utils import ConfigurationError
 
 
@@ -115,3 +127,367 @@ def test_check_is_empty(default_proc_params_fx: dict) -> None:
     r._consume_queues = {"message1": Queue(maxsize=2), "message2": q}
     assert r.is_empty("message1")
     assert not r.is_empty("message2")
+
+
+def test_fan_out_publish(default_proc_params_fx: dict) -> None:
+    test_message = {"frame": [1, 2, 3]}
+    q1, q2 = Queue(maxsize=2), Queue(maxsize=2)
+
+    default_proc_params_fx.update(publish_queues={"message1": [q1, q2]})
+    r = RobotProcess(**default_proc_params_fx)
+    r.publish(test_message)
+
+    for q in (q1, q2):
+        consumer = RobotProcess(**{**default_proc_params_fx, "consume_queues": {"message1": q}})
+        assert consumer.consume() == test_message
+
+
+def test_publish_to_queue_with_max_bytes(default_proc_params_fx: dict) -> None:
+    common_queue = PolicyQueue(Queue(maxsize=10), OverflowPolicy.DROP_NEW, get_context(), max_bytes=2500)
+    default_proc_params_fx.update(
+        consume_queues={"message1": common_queue},
+        publish_queues={"message1": [common_queue]},
+    )
+    r = RobotProcess(**default_proc_params_fx)
+
+    for i in range(3):
+        r.publish({"number": i, "data": b"x" * 1000})
+
+    time.sleep(1)
+    assert [r.consume()["number"] for _ in range(2)] == [0, 1]
+    assert r.is_empty()
+    assert common_queue.dropped == 1
+    assert common_queue.nbytes == 0
+
+
+def test_publish_to_thread_queues_by_reference(default_proc_params_fx: dict) -> None:
+    test_message = {"frame": [1, 2, 3]}
+    q1, q2 = ThreadQueue(2), ThreadQueue(2)
+
+    default_proc_params_fx.update(publish_queues={"message1": [q1, q2]})
+    r = RobotProcess(**default_proc_params_fx)
+    r.publish(test_message)
+
+    for q in (q1, q2):
+        consumer = RobotProcess(**{**default_proc_params_fx, "consume_queues": {"message1": q}})
+        assert consumer.consume(timeout=1.0) is test_message
+
+
+def test_queue_telemetry(default_proc_params_fx: dict) -> None:
+    reports = Queue(maxsize=10)
+    q = Queue(maxsize=5)
+    params: dict = {**default_proc_params_fx, "telemetry_queue": reports, "telemetry_interval": 1000.0}
+
+    publisher = RobotProcess(**{**params, "name": "publisher", "publish_queues": {"messages": [q]}})
+    consumer = RobotProcess(**{**params, "name": "consumer", "consume_queues": {"messages": q}})
+
+    for i in range(6):
+        publisher.publish(i, clear_on_overflow=True)
+
+    time.sleep(0.2)
+    assert consumer.consume() == 1
+
+    publisher.free_resources()
+    assert reports.get(timeout=1.0)["evicted"] == {"messages": {0: 1}}
+
+    consumer.free_resources()
+    report: dict = reports.get(timeout=1.0)
+    assert report["process"] == "consumer"
+
+    stats: dict = report["consumed"]["messages"]
+    assert stats["messages"] == 1
+    # the message to one queue isn't pickled by the publisher, so its size is unknown
+    assert stats["bytes"] == 0
+    assert stats["delay_p50"] >= 0.2
+
+
+def test_queue_telemetry_measures_pickled_messages(default_proc_params_fx: dict) -> None:
+    reports = Queue(maxsize=10)
+    q1, q2 = Queue(maxsize=5), Queue(maxsize=5)
+    params: dict = {**default_proc_params_fx, "telemetry_queue": reports, "telemetry_interval": 1000.0}
+
+    publisher = RobotProcess(**{**params, "name": "publisher", "publish_queues": {"messages": [q1, q2]}})
+    consumer = RobotProcess(**{**params, "name": "consumer", "consume_queues": {"messages": q1}})
+
+    publisher.publish(np.zeros(1000, dtype=np.uint8))
+    assert consumer.consume().nbytes == 1000
+
+    consumer.free_resources()
+    stats: dict = reports.get(timeout=1.0)["consumed"]["messages"]
+    assert stats["messages"] == 1
+    assert stats["bytes"] >= 1000
+
+
+def test_serve_requests(default_proc_params_fx: dict) -> None:
+    requests_queue = Queue(maxsize=50)
+    client = RobotProcess(
+        **{
+            **default_proc_params_fx,
+            "name": "client",
+            "publish_queues": {"requests": [requests_queue]},
+            "system_queues": {"client": Queue(maxsize=50)},
+        }
+    )
+    service = RobotProcess(
+        **{
+            **default_proc_params_fx,
+            "name": "service",
+            "consume_queues": {"requests": requests_queue},
+            "system_queues": client._system_queues,
+        }
+    )
+
+    def square(data: int) -> int:
+        if data < 0:
+            raise ValueError("negative")
+
+        time.sleep(0.1)
+        return data * data
+
+    Thread(target=service.serve_requests, args=(square,), kwargs={"max_workers": 8}, daemon=True).start()
+
+    started: float = time.monotonic()
+    responses = [client.send_request(i) for i in range(16)]
+    assert [r.result(timeout=5.0) for r in responses] == [i * i for i in range(16)]
+    # requests are handled concurrently
+    assert time.monotonic() - started < 1.0
+
+    with pytest.raises(ValueError):
+        client.wait_response(client.send_request(-1), timeout=5.0)
+
+
+def test_publish_many_and_consume(default_proc_params_fx: dict) -> None:
+    common_queue = Queue(maxsize=2)
+    default_proc_params_fx.update(
+        consume_queues={"message1": common_queue},
+        publish_queues={"message1": [common_queue]},
+    )
+    r = RobotProcess(**default_proc_params_fx)
+
+    r.publish_many(range(5))
+    assert [r.consume() for _ in range(3)] == [0, 1, 2]
+    assert not r.is_empty()
+
+    r.publish_many(range(5, 10))
+    time.sleep(1)
+    assert r.consume_batch(max_items=4, timeout=2.0) == [3, 4, 5, 6]
+    assert r.consume_batch(timeout=2.0) == [7, 8, 9]
+    assert r.consume_batch(timeout=0.5) == []
+
+
+def test_consume_batch_from_shared_memory(default_proc_params_fx: dict) -> None:
+    shared_queue = SharedMemoryQueue(1024, 2, get_context("spawn"))
+    default_proc_params_fx.update(
+        consume_queues={"message1": shared_queue},
+        publish_queues={"message1": [shared_queue]},
+    )
+    r = RobotProcess(**default_proc_params_fx)
+
+    for i in (1, 2):
+        r.publish(np.full(8, i, dtype=np.uint8))
+
+    time.sleep(1)
+    batch = r.consume_batch(timeout=2.0)
+    assert [int(a[0]) for a in batch] == [1, 2]
+
+    # messages of the freed slots are overwritten by the next ones
+    for i in (9, 10):
+        r.publish(np.full(8, i, dtype=np.uint8), clear_on_overflow=True)
+
+    assert [a.tolist() for a in batch] == [[1] * 8, [2] * 8]
+
+
+def test_sequence_end_only_for_queues_without_messages(default_proc_params_fx: dict) -> None:
+    inputs, results, others = Queue(maxsize=5), Queue(maxsize=5), Queue(maxsize=5)
+    default_proc_params_fx.update(
+        consume_queues={"inputs": inputs},
+        publish_queues={"results": [results], "others": [others]},
+        sequencer=Sequencer("rp", get_context("spawn")),
+    )
+    r = RobotProcess(**default_proc_params_fx)
+
+    inputs.put("a")
+    inputs.put("b")
+    time.sleep(0.5)
+
+    assert r.consume() == "a"
+    r.publish("A", queue_name="results")
+    # the next input message ends the previous one
+    assert r.consume() == "b"
+    time.sleep(0.5)
+
+    message = results.get(timeout=1.0)
+    assert isinstance(message, SequencedMessage)
+    assert (message.sequence, message.message) == (0, "A")
+    assert results.empty()
+
+    end = others.get(timeout=1.0)
+    assert isinstance(end, SequenceEnd)
+    assert end.sequence == 0
+    assert others.empty()
+
+
+def test_incorrect_batch_calls(default_proc_params_fx: dict) -> None:
+    default_proc_params_fx.update(
+        consume_queues={"message1": Queue(maxsize=2), "message2": Queue(maxsize=2)},
+        publish_queues={"message1": [Queue(maxsize=2)], "message2": [Queue(maxsize=2)]},
+    )
+    r = RobotProcess(**default_proc_params_fx)
+
+    with pytest.raises(ConfigurationError):
+        r.publish_many(["message"])
+
+    with pytest.raises(ConfigurationError):
+        r.consume_batch()
+
+
+def test_consume_with_timeout(default_proc_params_fx: dict) -> None:
+    default_proc_params_fx.update(consume_queues={"message1": Queue(maxsize=2)})
+    r = RobotProcess(**default_proc_params_fx)
+
+    start = time.time()
+    with pytest.raises(Empty):
+        r.consume(timeout=0.5)
+
+    assert 0.5 <= time.time() - start < 2
+
+
+def test_consume_any(default_proc_params_fx: dict) -> None:
+    q1, q2, q3 = Queue(maxsize=2), Queue(maxsize=2), Queue(maxsize=2)
+    default_proc_params_fx.update(
+        consume_queues={"message1": q1, "message2": q2, "message3": q3},
+        publish_queues={"message1": [q1], "message2": [q2], "message3": [q3]},
+    )
+    r = RobotProcess(**default_proc_params_fx)
+
+    with pytest.raises(Empty):
+        r.consume_any(timeout=0.5)
+
+    r.publish("hi", queue_name="message2")
+    assert r.consume_any(["message1", "message2"], timeout=2.0) == ("message2", "hi")
+
+    r.publish_many(["hi1", "hi2"], queue_name="message3")
+    assert r.consume_any(timeout=2.0) == ("message3", "hi1")
+    assert r.consume_any(timeout=2.0) == ("message3", "hi2")
+
+    with pytest.raises(ConfigurationError):
+        r.consume_any(["message4"])
+
+
+def test_consume_any_from_queue_without_reader(default_proc_params_fx: dict) -> None:
+    thread_queue = queue.Queue(maxsize=2)
+    default_proc_params_fx.update(consume_queues={"message1": thread_queue, "message2": Queue(maxsize=2)})
+    r = RobotProcess(**default_proc_params_fx)
+
+    with pytest.raises(Empty):
+        r.consume_any(timeout=0.5)
+
+    thread_queue.put("hi")
+    assert r.consume_any(timeout=2.0) == ("message1", "hi")
+
+
+def test_trace_context(default_proc_params_fx: dict) -> None:
+    q1 = Queue(maxsize=10)
+    q2 = Queue(maxsize=10)
+    source = RobotProcess(**{**default_proc_params_fx, "name": "source", "publish_queues": {"frames": [q1]}})
+    middle = RobotProcess(
+        **{
+            **default_proc_params_fx,
+            "name": "middle",
+            "consume_queues": {"frames": q1},
+            "publish_queues": {"results": [q2]},
+        }
+    )
+    sink = RobotProcess(**{**default_proc_params_fx, "name": "sink", "consume_queues": {"results": q2}})
+
+    trace = source.start_trace()
+    source.publish("frame")
+    source.trace = None
+    source.publish("untraced frame")
+
+    assert middle.consume(timeout=1.0) == "frame"
+    assert middle.trace.trace_id == trace.trace_id
+    middle.publish_many(["a", "b"])
+
+    assert middle.consume(timeout=1.0) == "untraced frame"
+    assert middle.trace is None
+
+    assert sink.consume_batch(timeout=1.0) == ["a", "b"]
+    finished = sink.finish_trace()
+    assert [f"{h.name}.{h.stage}" for h in finished.hops] == [
+        "source.start",
+        "source.publish",
+        "middle.consume",
+        "middle.publish",
+        "sink.consume",
+        "sink.finish",
+    ]
+    assert sink.trace is None
+    assert sink.finish_trace() is None
+
+    report: dict = sink.trace_report()
+    assert report["total"]["count"] == 1
+    assert "middle.publish -> sink.consume" in report["hops"]
+
+
+def test_trace_of_request(default_proc_params_fx: dict) -> None:
+    requests_queue = Queue(maxsize=10)
+    system_queues: dict = {"client": Queue(maxsize=10)}
+    client = RobotProcess(
+        **{
+            **default_proc_params_fx,
+            "name": "client",
+            "publish_queues": {"requests": [requests_queue]},
+            "system_queues": system_queues,
+        }
+    )
+    service = RobotProcess(
+        **{
+            **default_proc_params_fx,
+            "name": "service",
+            "consume_queues": {"requests": requests_queue},
+            "system_queues": system_queues,
+        }
+    )
+
+    trace = client.start_trace()
+    uid = client.send_request("ping")
+
+    request = service.get_request()
+    assert request.trace.trace_id == trace.trace_id
+    service.respond_to(request.copy(update={"data": "pong"}))
+
+    client.trace = None
+    assert client.wait_response(uid, timeout=1.0) == "pong"
+    assert client.trace.trace_id == trace.trace_id
+    assert [h.stage for h in client.trace.hops] == ["start", "publish", "consume", "respond", "response"]
+
+
+def test_spans(default_proc_params_fx: dict) -> None:
+    reports = Queue(maxsize=10)
+    q = Queue(maxsize=1)
+    params: dict = {**default_proc_params_fx, "spans_queue": reports, "spans_interval": 1000.0}
+
+    publisher = RobotProcess(**{**params, "name": "publisher", "publish_queues": {"messages": [q]}})
+    consumer = RobotProcess(**{**params, "name": "consumer", "consume_queues": {"messages": q}})
+
+    with pytest.raises(Empty):
+        consumer.consume(timeout=0.2)
+
+    publisher.publish(1)
+    Thread(target=lambda: (time.sleep(0.2), consumer.consume()), daemon=True).start()
+    with publisher.span("compute", step=1):
+        # the queue is full, it waits for the consumer
+        publisher.publish(2)
+
+    publisher.free_resources()
+    spans: dict = {s[0]: s for s in reports.get(timeout=1.0)["spans"]}
+    assert spans["blocked publishing"][2] >= 0.15
+    assert spans["blocked publishing"][4] == {"queue": "messages"}
+    assert spans["compute"][4] == {"step": 1}
+
+    consumer.free_resources()
+    report: dict = reports.get(timeout=1.0)
+    assert report["process"] == "consumer"
+    assert report["spans"][0][0] == "blocked waiting"
+    assert report["spans"][0][2] >= 0.2
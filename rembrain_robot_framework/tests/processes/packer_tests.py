@@ -1,11 +1,15 @@
 import json
+from contextlib import suppress
+from multiprocessing import get_context
+from threading import Thread
 
 import numpy as np
 import pytest
 from pytest_mock import MockerFixture
 
-from rembrain_robot_framework.pack import PackType
+from rembrain_robot_framework.pack import Packer, PackType, Unpacker
 from rembrain_robot_framework.processes import VideoPacker, VideoUnpacker
+from rembrain_robot_framework.queues import SharedMemoryQueue, ThreadQueue
 from rembrain_robot_framework.tests.exceptions import FinishTestException
 from rembrain_robot_framework.tests.models import Image
 
@@ -133,3 +137,150 @@ def test_correct_full_pack_png(mocker: MockerFixture, img_data_fx: Image, packer
     assert np.sqrt(np.mean(np.square(test_unpacker_result[0] - img_data_fx.rgb))) < 5
     assert (test_unpacker_result[1] == img_data_fx.depth).all()
     assert "time" in test_unpacker_result[2]
+
+
+@pytest.mark.parametrize("packer_fx", (PackType.JPG,), indirect=True)
+def test_trace_goes_with_frame(mocker: MockerFixture, img_data_fx: Image, packer_fx, unpacker_fx) -> None:
+    trace = packer_fx.start_trace()
+    test_packer_result = None
+
+    def publish(message, *args, **kwargs):
+        nonlocal test_packer_result
+        test_packer_result = message
+        raise FinishTestException
+
+    mocker.patch.object(packer_fx, "consume", return_value=(img_data_fx.rgb, img_data_fx.depth))
+    mocker.patch.object(packer_fx, "publish", publish)
+    with pytest.raises(FinishTestException):
+        packer_fx.run()
+
+    unpacked_trace = None
+
+    def publish(message, *args, **kwargs):
+        nonlocal unpacked_trace
+        unpacked_trace = unpacker_fx.trace
+        raise FinishTestException
+
+    mocker.patch.object(unpacker_fx, "consume", return_value=test_packer_result)
+    mocker.patch.object(unpacker_fx, "publish", publish)
+    with pytest.raises(FinishTestException):
+        unpacker_fx.run()
+
+    assert unpacked_trace.trace_id == trace.trace_id
+    assert [f"{h.name}.{h.stage}" for h in unpacked_trace.hops] == [
+        "video_packer.start",
+        "video_packer.pack",
+        "video_unpacker.unpack",
+    ]
+
+
+def test_pipeline_keeps_order_of_frames(img_data_fx: Image) -> None:
+    frames, packages = ThreadQueue(maxsize=10), ThreadQueue(maxsize=10)
+    packer = VideoPacker(
+        name="video_packer",
+        shared_objects={},
+        consume_queues={"frames": frames},
+        publish_queues={"packages": [packages]},
+        system_queues={},
+        watcher_queue=None,
+        pack_type=PackType.JPG_PNG,
+        parallel_encoding=True,
+        pipeline=True,
+    )
+    for i in range(5):
+        frames.put((img_data_fx.rgb, img_data_fx.depth, {"n": i}))
+
+    Thread(target=packer.run, daemon=True).start()
+    unpacker = Unpacker()
+    assert [unpacker.read_meta(packages.get(timeout=5.0))["n"] for _ in range(5)] == list(range(5))
+
+    # a single frame isn't held until the next one comes
+    frames.put((img_data_fx.rgb, img_data_fx.depth, {"n": 5}))
+    assert unpacker.read_meta(packages.get(timeout=5.0))["n"] == 5
+    assert set(packer.packer.timings) == {"rgb", "depth", "pack"}
+
+
+def _send_frames(queue: SharedMemoryQueue, rgb: np.ndarray, depth: np.ndarray) -> None:
+    for i in range(6):
+        queue.put((np.full_like(rgb, i * 40), np.full_like(depth, i * 1000), {"n": i}))
+
+
+def test_pipeline_copies_frames_of_shared_memory(img_data_fx: Image) -> None:
+    rgb, depth = img_data_fx.rgb, img_data_fx.depth
+    ctx = get_context("spawn")
+    frames = SharedMemoryQueue(rgb.nbytes + depth.nbytes, 2, ctx)
+    packages = ThreadQueue(maxsize=10)
+    packer = VideoPacker(
+        name="video_packer",
+        shared_objects={},
+        consume_queues={"frames": frames},
+        publish_queues={"packages": [packages]},
+        system_queues={},
+        watcher_queue=None,
+        pack_type=PackType.JPG_PNG,
+        pipeline=True,
+    )
+
+    def run_packer() -> None:
+        # the queue is closed while the packer waits for the next frame after the test
+        with suppress(EOFError, OSError):
+            packer.run()
+
+    # the sender writes the next frame into the slot freed by the packer
+    sender = ctx.Process(target=_send_frames, args=(frames, rgb, depth))
+    sender.start()
+    Thread(target=run_packer, daemon=True).start()
+
+    unpacker = Unpacker()
+    for i in range(6):
+        unpacked_rgb, unpacked_depth, meta = unpacker.unpack(packages.get(timeout=10.0))
+        assert json.loads(meta)["n"] == i
+        assert abs(float(unpacked_rgb.mean()) - i * 40) < 2
+        assert (unpacked_depth == i * 1000).all()
+
+    sender.join()
+
+
+
+def test_unpacker_skips_camera_of_incomplete_package(mocker: MockerFixture, img_data_fx: Image, unpacker_fx) -> None:
+    package: bytes = Packer(PackType.JPG).pack(img_data_fx.rgb, None, {"time": 1.0})
+    test_unpacker_result = None
+
+    def publish(message, *args, **kwargs):
+        nonlocal test_unpacker_result
+        test_unpacker_result = message
+        raise FinishTestException
+
+    error = mocker.patch.object(unpacker_fx.log, "error")
+    # the loop stops at the second consume if the package isn't published
+    mocker.patch.object(unpacker_fx, "consume", side_effect=[package[:-10], FinishTestException()])
+    mocker.patch.object(unpacker_fx, "publish", publish)
+    with pytest.raises(FinishTestException):
+        unpacker_fx.run()
+
+    assert test_unpacker_result == (None, None, None)
+    error.assert_not_called()
+
+
+def test_unpacker_parses_camera_only_if_needed(mocker: MockerFixture, img_data_fx: Image) -> None:
+    package: bytes = Packer(PackType.JPG).pack(img_data_fx.rgb, None, {"time": 1.0})
+    # neither the shared camera nor the trace needs camera data
+    unpacker = VideoUnpacker(
+        name="video_unpacker",
+        shared_objects={},
+        consume_queues={},
+        publish_queues={},
+        system_queues={},
+        watcher_queue=None,
+    )
+
+    def publish(message, *args, **kwargs):
+        raise FinishTestException
+
+    json_module = mocker.patch("rembrain_robot_framework.processes.video_unpacker.json")
+    mocker.patch.object(unpacker, "consume", side_effect=[package, FinishTestException()])
+    mocker.patch.object(unpacker, "publish", publish)
+    with pytest.raises(FinishTestException):
+        unpacker.run()
+
+    json_module.loads.assert_not_called()
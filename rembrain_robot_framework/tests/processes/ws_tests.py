@@ -1,8 +1,10 @@
 import asyncio
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import AsyncMock
 
 import pytest
 
+from rembrain_robot_framework.models.request import Request
+from rembrain_robot_framework.models.trace_context import TraceContext
 from rembrain_robot_framework.processes import WsRobotProcess
 from rembrain_robot_framework.tests.exceptions import FinishTestException
 from rembrain_robot_framework.ws import WsCommandType
@@ -60,9 +62,8 @@ def ws_proc(ws_proc_params_fx, mocker):
     ws_mock.send.side_effect = send_called
 
     # PROCESS MOCK SETUP
-    # Stubbing out is_empty and consume so we always have something to send
-    mocker.patch.object(proc, "is_empty", return_value=False)
-    mocker.patch.object(proc, "consume", return_value=b"some_data")
+    # Stubbing out consume so we always have something to send
+    mocker.patch.object(proc, "aconsume", return_value=b"some_data")
 
     return proc, ws_mock
 
@@ -76,10 +77,10 @@ def test_required_args(ws_proc_params_fx, arg):
 
 def test_push_non_binary_fails(mocker, ws_proc_push_fx):
     proc: WsRobotProcess = ws_proc_push_fx[0]
-    mocker.patch.object(proc, "consume", return_value="non-binary data")
+    mocker.patch.object(proc, "aconsume", return_value="non-binary data")
 
     with pytest.raises(RuntimeError) as ex:
-        proc.run()
+        asyncio.run(proc.run())
 
     assert "Data to send to ws should be binary" in str(ex.value)
 
@@ -94,7 +95,7 @@ def test_first_thing_sent_is_control_packet(ws_proc_push_fx):
     ws_mock.send.side_effect = send_mock
 
     with pytest.raises(FinishTestException):
-        proc.run()
+        asyncio.run(proc.run())
 
     ws_mock.send.assert_awaited_with(proc._get_control_packet())
 
@@ -117,9 +118,9 @@ def test_push_sends_consumed_data(ws_proc_push_fx):
 
     ws_mock.send.side_effect = send_mock
     with pytest.raises(FinishTestException):
-        proc.run()
+        asyncio.run(proc.run())
 
-    ws_mock.send.assert_awaited_with(proc.consume.return_value)
+    ws_mock.send.assert_awaited_with(proc.aconsume.return_value)
 
 
 @pytest.mark.timeout(4)
@@ -136,7 +137,7 @@ def test_push_sends_pings(ws_proc_push_fx):
 
     ws_mock.send.side_effect = send_mock
     with pytest.raises(FinishTestException):
-        proc.run()
+        asyncio.run(proc.run())
 
     ws_mock.send.assert_awaited_with('{"command": "ping"}')
 
@@ -148,12 +149,12 @@ def test_pull_publishes_received_data(mocker, ws_proc_pull_fx):
     def publish_mock(*args):
         raise FinishTestException
 
-    pub_mock = MagicMock()
+    pub_mock = AsyncMock()
     pub_mock.side_effect = publish_mock
-    mocker.patch.object(proc, "publish", pub_mock)
+    mocker.patch.object(proc, "apublish", pub_mock)
 
     with pytest.raises(FinishTestException):
-        proc.run()
+        asyncio.run(proc.run())
 
     pub_mock.assert_called_with(b"recv_data")
 
@@ -177,9 +178,9 @@ def test_pull_type_conversion(mocker, ws_proc_params_fx, data_type, recv_val, ex
     def publish_mock(*args):
         raise FinishTestException
 
-    pub_mock = MagicMock()
+    pub_mock = AsyncMock()
     pub_mock.side_effect = publish_mock
-    mocker.patch.object(proc, "publish", pub_mock)
+    mocker.patch.object(proc, "apublish", pub_mock)
 
     async def recv_called(*args):
         await asyncio.sleep(0.05)
@@ -187,7 +188,7 @@ def test_pull_type_conversion(mocker, ws_proc_params_fx, data_type, recv_val, ex
 
     ws_mock.recv.side_effect = recv_called
     with pytest.raises(FinishTestException):
-        proc.run()
+        asyncio.run(proc.run())
 
     pub_mock.assert_called_with(expected)
 
@@ -208,10 +209,40 @@ def test_pull_doesnt_publish_pings(mocker, ws_proc_pull_fx):
         return "ping"
 
     ws_mock.recv.side_effect = recv_called
-    pub_mock = MagicMock()
-    mocker.patch.object(proc, "publish", pub_mock)
+    pub_mock = AsyncMock()
+    mocker.patch.object(proc, "apublish", pub_mock)
 
     with pytest.raises(FinishTestException):
-        proc.run()
+        asyncio.run(proc.run())
 
     pub_mock.assert_not_called()
+
+
+@pytest.mark.timeout(2)
+def test_pull_continues_trace_of_request(mocker, ws_proc_params_fx):
+    ws_proc_params_fx["data_type"] = "request"
+    proc, ws_mock = ws_proc(ws_proc_params_fx, mocker)
+
+    trace = TraceContext().with_hop("client", "start").with_hop("ws_push", "push")
+    # the websocket gives plain bytes
+    request_data = bytes(Request(client_process="client", data=b"qwe", trace=trace).to_bson())
+
+    async def recv_called(*args):
+        await asyncio.sleep(0.05)
+        return request_data
+
+    ws_mock.recv.side_effect = recv_called
+
+    published_trace = None
+
+    def publish_mock(message, *args):
+        nonlocal published_trace
+        published_trace = proc.trace
+        raise FinishTestException
+
+    mocker.patch.object(proc, "apublish", AsyncMock(side_effect=publish_mock))
+    with pytest.raises(FinishTestException):
+        asyncio.run(proc.run())
+
+    assert published_trace.trace_id == trace.trace_id
+    assert [h.stage for h in published_trace.hops] == ["start", "push", "pull"]
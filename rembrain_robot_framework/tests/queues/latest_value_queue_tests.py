@@ -0,0 +1,53 @@
+import time
+from multiprocessing import get_context
+from queue import Empty
+
+import numpy as np
+import pytest
+
+from rembrain_robot_framework.queues import LatestValueQueue
+
+
+def _publish_frames(queue: LatestValueQueue, count: int) -> None:
+    for i in range(count):
+        queue.put(np.full((720, 1280, 3), i % 255, dtype=np.uint8))
+
+    time.sleep(1.0)
+
+
+@pytest.fixture()
+def latest_queue_fx() -> LatestValueQueue:
+    return LatestValueQueue(get_context("spawn"))
+
+
+def test_keeps_only_newest_message(latest_queue_fx: LatestValueQueue) -> None:
+    for i in range(5):
+        latest_queue_fx.put(i)
+        time.sleep(0.1)
+
+    assert latest_queue_fx.get(timeout=2.0) == 4
+
+    with pytest.raises(Empty):
+        latest_queue_fx.get(timeout=0.5)
+
+    assert latest_queue_fx.empty()
+    assert not latest_queue_fx.full()
+
+
+def test_put_does_not_block_without_consumer(latest_queue_fx: LatestValueQueue) -> None:
+    start = time.time()
+    for i in range(100):
+        latest_queue_fx.put(np.full((720, 1280, 3), i, dtype=np.uint8))
+
+    assert time.time() - start < 2.0
+    assert (latest_queue_fx.get(timeout=2.0) == 99).all()
+
+
+def test_consume_from_another_process(latest_queue_fx: LatestValueQueue) -> None:
+    producer = get_context("spawn").Process(target=_publish_frames, args=(latest_queue_fx, 50))
+    producer.start()
+    producer.join()
+
+    frame = latest_queue_fx.get(timeout=2.0)
+    assert frame.shape == (720, 1280, 3)
+    assert (frame == 49).all()
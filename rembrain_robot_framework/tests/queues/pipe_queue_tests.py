@@ -0,0 +1,77 @@
+import pickle
+import time
+from multiprocessing import get_context
+from queue import Empty, Full
+from threading import Thread
+
+import numpy as np
+import pytest
+
+from rembrain_robot_framework.queues import PipeQueue
+
+
+def _publish_frames(queue: PipeQueue, count: int) -> None:
+    for i in range(count):
+        queue.put(np.full((480, 640, 3), i % 255, dtype=np.uint8))
+
+
+@pytest.fixture()
+def pipe_queue_fx() -> PipeQueue:
+    return PipeQueue(3, get_context("spawn"))
+
+
+def test_keeps_order_and_size(pipe_queue_fx: PipeQueue) -> None:
+    assert pipe_queue_fx.empty()
+
+    for i in range(3):
+        pipe_queue_fx.put(i)
+
+    assert pipe_queue_fx.qsize() == 3
+    assert pipe_queue_fx.full()
+
+    with pytest.raises(Full):
+        pipe_queue_fx.put(3, timeout=0.1)
+
+    with pytest.raises(Full):
+        pipe_queue_fx.put_nowait(3)
+
+    assert [pipe_queue_fx.get() for _ in range(3)] == [0, 1, 2]
+    assert pipe_queue_fx.empty()
+
+    with pytest.raises(Empty):
+        pipe_queue_fx.get(timeout=0.1)
+
+    with pytest.raises(Empty):
+        pipe_queue_fx.get_nowait()
+
+
+def test_put_waits_for_place(pipe_queue_fx: PipeQueue) -> None:
+    for i in range(3):
+        pipe_queue_fx.put(i)
+
+    def consume() -> None:
+        time.sleep(0.3)
+        pipe_queue_fx.get()
+
+    Thread(target=consume).start()
+    pipe_queue_fx.put(3, timeout=2.0)
+
+    assert [pipe_queue_fx.get() for _ in range(3)] == [1, 2, 3]
+
+
+def test_consume_from_another_process(pipe_queue_fx: PipeQueue) -> None:
+    producer = get_context("spawn").Process(target=_publish_frames, args=(pipe_queue_fx, 20))
+    producer.start()
+
+    for i in range(20):
+        frame = pipe_queue_fx.get(timeout=5.0)
+        assert frame.shape == (480, 640, 3)
+        assert (frame == i).all()
+
+    producer.join()
+    assert pipe_queue_fx.empty()
+
+
+def test_not_pickled_outside_spawning(pipe_queue_fx: PipeQueue) -> None:
+    with pytest.raises(RuntimeError):
+        pickle.dumps(pipe_queue_fx)
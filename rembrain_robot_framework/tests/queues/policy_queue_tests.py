@@ -0,0 +1,104 @@
+import time
+from multiprocessing import get_context
+from queue import Empty
+
+import pytest
+
+from rembrain_robot_framework.queues import DiskSpill, OverflowPolicy, PolicyQueue
+
+
+def _create_queue(policy: OverflowPolicy, maxsize: int = 2, **kwargs) -> PolicyQueue:
+    ctx = get_context("spawn")
+    return PolicyQueue(ctx.Queue(maxsize=maxsize), policy, ctx, **kwargs)
+
+
+def _get_all(queue: PolicyQueue) -> list:
+    # multiprocessing queue puts messages to the pipe in a background thread
+    time.sleep(0.5)
+
+    messages = []
+    while True:
+        try:
+            messages.append(queue.get(timeout=0.5))
+        except Empty:
+            return messages
+
+
+def test_block_with_timeout() -> None:
+    queue = _create_queue(OverflowPolicy.BLOCK, timeout=0.1)
+    for i in range(3):
+        queue.put(i)
+
+    assert queue.dropped == 1
+    assert _get_all(queue) == [0, 1]
+
+
+def test_drop_new() -> None:
+    queue = _create_queue(OverflowPolicy.DROP_NEW)
+    for i in range(5):
+        queue.put(i)
+
+    assert queue.dropped == 3
+    assert _get_all(queue) == [0, 1]
+
+
+def test_drop_oldest() -> None:
+    queue = _create_queue(OverflowPolicy.DROP_OLDEST)
+    for i in range(5):
+        queue.put(i)
+        time.sleep(0.1)
+
+    assert queue.dropped == 3
+    assert _get_all(queue) == [3, 4]
+
+
+def test_spill_to_disk(tmp_path) -> None:
+    spill = DiskSpill(str(tmp_path), 1024, get_context("spawn"))
+    queue = _create_queue(OverflowPolicy.SPILL, spill=spill)
+
+    for i in range(5):
+        queue.put({"number": i})
+
+    assert len(spill) == 3
+    assert queue.qsize() == 5
+    assert queue.dropped == 0
+    assert _get_all(queue) == [{"number": i} for i in range(5)]
+    assert len(list(tmp_path.iterdir())) == 0
+
+
+def test_spill_is_bounded(tmp_path) -> None:
+    spill = DiskSpill(str(tmp_path), 100, get_context("spawn"))
+    queue = _create_queue(OverflowPolicy.SPILL, spill=spill)
+
+    for _ in range(5):
+        queue.put(b"x" * 60)
+
+    assert queue.dropped == 2
+    assert len(_get_all(queue)) == 3
+
+
+def test_spill_requires_buffer() -> None:
+    with pytest.raises(ValueError):
+        _create_queue(OverflowPolicy.SPILL)
+
+
+def test_max_bytes() -> None:
+    queue = _create_queue(OverflowPolicy.DROP_NEW, maxsize=100, max_bytes=3000)
+    for _ in range(5):
+        queue.put(b"x" * 1000)
+
+    assert queue.dropped == 3
+    assert 2000 < queue.nbytes < 3000
+
+    messages = _get_all(queue)
+    assert [m.load() for m in messages] == [b"x" * 1000] * 2
+    assert queue.nbytes == 0
+
+
+def test_message_bigger_than_max_bytes() -> None:
+    queue = _create_queue(OverflowPolicy.BLOCK, maxsize=100, max_bytes=100, timeout=0.1)
+    queue.put(b"x" * 1000)
+    queue.put(b"x")
+
+    assert queue.dropped == 1
+    assert [m.load() for m in _get_all(queue)] == [b"x" * 1000]
@@ -0,0 +1,22 @@
+from rembrain_robot_framework.queues import ReorderBuffer, SequencedMessage, SequenceEnd
+
+
+def test_reorder_messages() -> None:
+    buffer = ReorderBuffer()
+
+    assert buffer.add(SequencedMessage("p", 1, "b")) == []
+    assert buffer.add(SequencedMessage("p", 0, "a")) == ["a", "b"]
+    assert buffer.add(SequencedMessage("p", 1, "c")) == ["c"]
+    assert buffer.add(SequenceEnd("p", 3)) == []
+    assert buffer.add(SequencedMessage("p", 4, "e")) == []
+    assert buffer.add(SequencedMessage("p", 2, "d")) == ["d", "e"]
+    assert buffer.add(SequenceEnd("p", 5)) == []
+    assert buffer.add(SequencedMessage("p", 6, "f")) == ["f"]
+
+
+def test_skip_lost_messages() -> None:
+    buffer = ReorderBuffer(max_pending=2)
+
+    assert buffer.add(SequencedMessage("p", 1, "a")) == []
+    assert buffer.add(SequenceEnd("p", 2)) == []
+    assert buffer.add(SequencedMessage("p", 3, "b")) == ["a", "b"]
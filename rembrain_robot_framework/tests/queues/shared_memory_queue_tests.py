@@ -0,0 +1,89 @@
+from queue import Empty, Full
+
+import numpy as np
+import pytest
+
+from rembrain_robot_framework.queues import SerializedMessage, SharedMemoryQueue
+from rembrain_robot_framework.tests.models import Image
+
+
+@pytest.fixture()
+def img_data_fx() -> Image:
+    return Image.get_data()
+
+
+@pytest.fixture()
+def shm_queue_fx(img_data_fx: Image) -> SharedMemoryQueue:
+    return SharedMemoryQueue(img_data_fx.rgb.nbytes + img_data_fx.depth.nbytes, 2)
+
+
+def test_correct_put_and_get_frame(shm_queue_fx: SharedMemoryQueue, img_data_fx: Image) -> None:
+    shm_queue_fx.put((img_data_fx.rgb, img_data_fx.depth, img_data_fx.camera))
+    rgb, depth, camera = shm_queue_fx.get(timeout=2.0)
+
+    assert (rgb == img_data_fx.rgb).all()
+    assert (depth == img_data_fx.depth).all()
+    assert camera == img_data_fx.camera
+
+    # arrays are views on the shared memory slot
+    assert not rgb.flags.owndata
+    assert not depth.flags.owndata
+
+
+def test_message_without_arrays(shm_queue_fx: SharedMemoryQueue) -> None:
+    shm_queue_fx.put({"command": "test"})
+    assert shm_queue_fx.get(timeout=2.0) == {"command": "test"}
+
+
+def test_message_bigger_than_slot(shm_queue_fx: SharedMemoryQueue) -> None:
+    big_array = np.ones(shm_queue_fx.slot_size + 1, dtype=np.uint8)
+    shm_queue_fx.put(big_array)
+
+    assert (shm_queue_fx.get(timeout=2.0) == big_array).all()
+
+
+def test_slots_are_reused(shm_queue_fx: SharedMemoryQueue, img_data_fx: Image) -> None:
+    for i in range(10):
+        shm_queue_fx.put(img_data_fx.rgb + i, timeout=2.0)
+        assert (shm_queue_fx.get(timeout=2.0) == img_data_fx.rgb + i).all()
+
+
+def test_full_and_empty(shm_queue_fx: SharedMemoryQueue, img_data_fx: Image) -> None:
+    with pytest.raises(Empty):
+        shm_queue_fx.get(timeout=0.5)
+
+    shm_queue_fx.put(img_data_fx.rgb)
+    shm_queue_fx.put(img_data_fx.rgb)
+
+    with pytest.raises(Full):
+        shm_queue_fx.put(img_data_fx.rgb, timeout=0.5)
+
+
+@pytest.mark.parametrize("out_of_band", (True, False))
+def test_put_serialized_message(shm_queue_fx: SharedMemoryQueue, img_data_fx: Image, out_of_band: bool) -> None:
+    shm_queue_fx.put(SerializedMessage.dump((img_data_fx.rgb, img_data_fx.camera), out_of_band))
+    rgb, camera = shm_queue_fx.get(timeout=2.0)
+
+    assert (rgb == img_data_fx.rgb).all()
+    assert camera == img_data_fx.camera
+
+
+def test_full_index_keeps_slots(shm_queue_fx: SharedMemoryQueue, img_data_fx: Image) -> None:
+    # messages without arrays take places of the index, but not slots
+    shm_queue_fx.put({"command": "first"})
+    shm_queue_fx.put({"command": "second"})
+    assert shm_queue_fx.full()
+
+    with pytest.raises(Full):
+        shm_queue_fx.put(img_data_fx.rgb, timeout=0.5)
+
+    with pytest.raises(Full):
+        shm_queue_fx.put_nowait(img_data_fx.rgb)
+
+    assert shm_queue_fx.get(timeout=2.0) == {"command": "first"}
+    assert shm_queue_fx.get(timeout=2.0) == {"command": "second"}
+
+    # the slots taken by the failed puts are free again
+    shm_queue_fx.put(img_data_fx.rgb, timeout=0.5)
+    shm_queue_fx.put(img_data_fx.rgb, timeout=0.5)
+    assert shm_queue_fx.full()
@@ -0,0 +1,31 @@
+import pytest
+
+from rembrain_robot_framework.services.autoscaler import Autoscaler
+
+
+def test_scale_up_after_sustained_load() -> None:
+    autoscaler = Autoscaler(1, 3, target_occupancy=0.5, scale_up_checks=3)
+
+    assert [autoscaler.update(0.9) for _ in range(3)] == [0, 0, 1]
+    assert autoscaler.replicas == 2
+
+    # a short burst isn't enough
+    assert [autoscaler.update(o) for o in (0.9, 0.3, 0.9, 0.9)] == [0, 0, 0, 0]
+    assert [autoscaler.update(0.9) for _ in range(4)] == [1, 0, 0, 0]
+    assert autoscaler.replicas == 3
+
+
+def test_scale_down_with_hysteresis() -> None:
+    autoscaler = Autoscaler(1, 2, target_occupancy=0.5, scale_up_checks=1, scale_down_checks=2)
+    assert autoscaler.update(1.0) == 1
+
+    # between the low watermark and the target nothing changes
+    assert [autoscaler.update(0.4) for _ in range(5)] == [0] * 5
+    assert [autoscaler.update(0.1) for _ in range(3)] == [0, -1, 0]
+    assert autoscaler.replicas == 1
+
+
+@pytest.mark.parametrize("replicas", ((0, 2), (3, 2)))
+def test_incorrect_replicas(replicas: tuple) -> None:
+    with pytest.raises(ValueError):
+        Autoscaler(*replicas)
@@ -0,0 +1,88 @@
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from threading import Thread
+
+from rembrain_robot_framework.models.control_message import ControlMessage
+from rembrain_robot_framework.services.profiling_controller import ProfilingController
+
+
+def profiled_function() -> int:
+    return sum(range(1000))
+
+
+def test_cprofile_runs_in_thread_of_process(tmp_path) -> None:
+    controller = ProfilingController("p", str(tmp_path))
+
+    # commands come from another thread
+    message = ControlMessage(command=ControlMessage.START_PROFILER, profiler=ControlMessage.CPROFILE)
+    thread = Thread(target=controller.handle, args=(message,))
+    thread.start()
+    thread.join()
+    other = Thread(target=controller.run_pending)
+    other.start()
+    other.join()
+    assert len(controller.pending) == 1
+
+    controller.run_pending()
+    profiled_function()
+    controller.handle(ControlMessage(command=ControlMessage.STOP_PROFILER, profiler=ControlMessage.CPROFILE))
+    controller.run_pending()
+
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].startswith("p.") and files[0].endswith(".prof")
+
+    stats = pstats.Stats(str(tmp_path / files[0]))
+    assert any(func[2] == "profiled_function" for func in stats.stats)
+
+
+def test_stack_profiler_stops_after_duration(tmp_path) -> None:
+    controller = ProfilingController("p", str(tmp_path))
+    controller.start_profiler(ControlMessage.STACK, duration=0.3)
+    controller.start_profiler(ControlMessage.STACK)
+
+    time.sleep(0.6)
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith(".collapsed")
+
+    # the stop by the duration of the previous run doesn't stop the next one
+    controller.start_profiler(ControlMessage.STACK, duration=0.2)
+    controller.stop_profiler(ControlMessage.STACK)
+    controller.start_profiler(ControlMessage.STACK)
+    time.sleep(0.4)
+    assert controller._stack_monitor is not None
+
+    controller.close()
+    assert controller._stack_monitor is None
+
+
+def test_memory_snapshot(tmp_path) -> None:
+    controller = ProfilingController("p", str(tmp_path))
+    controller.take_memory_snapshot(duration=0.1)
+    data = [bytearray(1000) for _ in range(100)]
+
+    time.sleep(0.5)
+    assert not tracemalloc.is_tracing()
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith(".tracemalloc")
+    assert tracemalloc.Snapshot.load(str(tmp_path / files[0])).statistics("lineno")
+    assert len(data) == 100
+
+
+def test_set_log_level(tmp_path) -> None:
+    root = logging.getLogger()
+    level: int = root.level
+    controller = ProfilingController("p", str(tmp_path))
+
+    try:
+        controller.handle(ControlMessage(command=ControlMessage.SET_LOG_LEVEL, level="debug"))
+        assert root.level == logging.DEBUG
+
+        # a bad command doesn't break the process
+        controller.handle(ControlMessage(command=ControlMessage.SET_LOG_LEVEL, level="loud"))
+        controller.handle(ControlMessage(command="reboot"))
+        assert root.level == logging.DEBUG
+    finally:
+        root.setLevel(level)
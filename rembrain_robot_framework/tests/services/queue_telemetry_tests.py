@@ -0,0 +1,48 @@
+import time
+from queue import Queue
+
+import pytest
+
+from rembrain_robot_framework.services.queue_telemetry import QueueTelemetry, percentile
+
+
+def test_percentile() -> None:
+    values = [float(i) for i in range(100, 0, -1)]
+
+    assert percentile(values, 0.5) == 51.0
+    assert percentile(values, 0.99) == 100.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile([], 0.5) is None
+
+
+def test_report_every_interval() -> None:
+    reports = Queue()
+    telemetry = QueueTelemetry("p", reports, interval=0.5)
+    telemetry.start()
+
+    for delay in (0.1, 0.2, 0.3, 0.4):
+        telemetry.on_consumed("messages", time.time() - delay, 100)
+
+    stats: dict = reports.get(timeout=1.0)["consumed"]["messages"]
+    assert stats["messages"] == 4
+    assert stats["bytes"] == 400
+    assert stats["messages_per_second"] == pytest.approx(4 / 0.5, rel=0.2)
+    assert stats["delay_p50"] == pytest.approx(0.3, abs=0.05)
+    assert stats["delay_p99"] == pytest.approx(0.4, abs=0.05)
+
+    # a new window starts after the report
+    stats = reports.get(timeout=1.0)["consumed"]["messages"]
+    assert stats["messages"] == 4
+    assert stats["messages_per_second"] == 0.0
+    assert stats["delay_p50"] is None
+
+
+def test_full_report_queue_is_skipped() -> None:
+    reports = Queue(maxsize=1)
+    telemetry = QueueTelemetry("p", reports)
+    telemetry.on_evicted("messages", 1)
+
+    telemetry.report()
+    telemetry.report()
+
+    assert reports.get_nowait()["evicted"] == {"messages": {1: 1}}
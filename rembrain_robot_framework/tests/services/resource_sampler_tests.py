@@ -0,0 +1,69 @@
+import os
+import time
+from threading import Event, Thread
+
+import pytest
+
+from rembrain_robot_framework.services.resource_sampler import ResourceSampler
+
+pytestmark = pytest.mark.skipif(not ResourceSampler.is_supported(), reason="/proc is required")
+
+
+def write_fake_process(root, pid: int, comm: str, utime: int, threads: int) -> None:
+    process_dir = root / str(pid)
+    # fields after the name: state, ppid ... utime (14), stime (15) ... num_threads (20) ... rss (24)
+    fields = ["S"] + ["0"] * 40
+    fields[11], fields[12], fields[17], fields[21] = str(utime), "0", str(threads), "10"
+
+    (process_dir / "task").mkdir(parents=True)
+    (process_dir / "stat").write_text(f"{pid} ({comm}) {' '.join(fields)}\n")
+
+    for tid in range(threads):
+        task_dir = process_dir / "task" / str(pid + tid)
+        task_dir.mkdir()
+        (task_dir / "status").write_text(
+            f"Name:\t{comm}\nThreads:\t{threads}\nvoluntary_ctxt_switches:\t5\nnonvoluntary_ctxt_switches:\t2\n"
+        )
+        (task_dir / "sched").write_text(f"{comm} ({pid + tid}, #threads: {threads})\nse.nr_migrations : 3\n")
+
+
+def test_read_fake_process(tmp_path) -> None:
+    write_fake_process(tmp_path, 100, "python (worker) x", utime=0, threads=2)
+    sampler = ResourceSampler(str(tmp_path))
+
+    stats: dict = sampler.sample({"p1": 100, "p2": 100, "gone": 200})
+    assert set(stats.keys()) == {"p1", "p2"}
+    assert stats["p1"] == {
+        "pid": 100,
+        "cpu_percent": None,
+        "rss_bytes": 10 * os.sysconf("SC_PAGE_SIZE"),
+        "threads": 2,
+        "voluntary_ctxt_switches": 10,
+        "involuntary_ctxt_switches": 4,
+        "migrations": 6,
+    }
+
+
+def test_sample_current_process() -> None:
+    sampler = ResourceSampler()
+    pids: dict = {"me": os.getpid()}
+    assert sampler.sample(pids)["me"]["cpu_percent"] is None
+
+    stop = Event()
+    thread = Thread(target=stop.wait)
+    thread.start()
+
+    try:
+        finish: float = time.monotonic() + 0.3
+        while time.monotonic() < finish:
+            pass
+
+        stats: dict = sampler.sample(pids)["me"]
+    finally:
+        stop.set()
+        thread.join()
+
+    assert stats["cpu_percent"] > 50.0
+    assert stats["rss_bytes"] > 0
+    assert stats["threads"] >= 2
+    assert stats["voluntary_ctxt_switches"] + stats["involuntary_ctxt_switches"] > 0
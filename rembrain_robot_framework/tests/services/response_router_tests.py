@@ -0,0 +1,99 @@
+import pickle
+import time
+from multiprocessing import Queue
+from threading import Thread
+from uuid import UUID, uuid4
+
+import pytest
+
+from rembrain_robot_framework.models.control_message import ControlMessage
+from rembrain_robot_framework.models.request import Request
+from rembrain_robot_framework.services.response_router import ResponseFuture, ResponseRouter
+
+
+@pytest.fixture()
+def system_queue_fx() -> Queue:
+    return Queue(maxsize=50)
+
+
+def test_routes_responses_out_of_order(system_queue_fx: Queue) -> None:
+    router = ResponseRouter(system_queue_fx)
+    requests = [router.register(uuid4()) for _ in range(20)]
+
+    for i, uid in reversed(list(enumerate(requests))):
+        system_queue_fx.put(Request(uid=uid, client_process="p", data=i))
+
+    assert [r.result(timeout=2.0) for r in requests] == list(range(20))
+
+
+def test_result_timeout(system_queue_fx: Queue) -> None:
+    router = ResponseRouter(system_queue_fx)
+    response = router.register(uuid4())
+
+    with pytest.raises(TimeoutError):
+        response.result(timeout=0.2)
+
+    system_queue_fx.put(Request(uid=response, client_process="p", data="late"))
+    assert response.result(timeout=2.0) == "late"
+
+
+def test_request_expires(system_queue_fx: Queue) -> None:
+    router = ResponseRouter(system_queue_fx)
+    response = router.register(uuid4(), ttl=0.1)
+
+    time.sleep(0.2)
+    with pytest.raises(TimeoutError):
+        response.result(timeout=2.0)
+
+
+def test_exception_of_service(system_queue_fx: Queue) -> None:
+    router = ResponseRouter(system_queue_fx)
+    response = router.register(uuid4())
+    system_queue_fx.put(Request(uid=response, client_process="p", data=ValueError("test")))
+
+    with pytest.raises(ValueError):
+        response.result(timeout=2.0)
+
+
+def test_response_future_is_uuid(system_queue_fx: Queue) -> None:
+    uid = uuid4()
+    response = ResponseRouter(system_queue_fx).register(uid)
+
+    assert isinstance(response, ResponseFuture)
+    assert response == uid
+    assert {uid: 1}[response] == 1
+
+    restored = pickle.loads(pickle.dumps(response))
+    assert type(restored) is UUID
+    assert restored == uid
+
+
+def test_control_messages_go_to_handler(system_queue_fx: Queue) -> None:
+    commands = []
+    router = ResponseRouter(system_queue_fx, lambda message: commands.append(message.command))
+    router.start()
+
+    response = router.register(uuid4())
+    system_queue_fx.put(ControlMessage(command=ControlMessage.SET_LOG_LEVEL, level="debug"))
+    system_queue_fx.put(Request(uid=response, client_process="p", data=1))
+
+    assert response.result(timeout=2.0) == 1
+    assert commands == [ControlMessage.SET_LOG_LEVEL]
+
+
+def test_stopped_router_leaves_responses_to_next_one(system_queue_fx: Queue) -> None:
+    uid = uuid4()
+    router = ResponseRouter(system_queue_fx)
+    router.start()
+
+    stopping = Thread(target=router.stop)
+    stopping.start()
+    while not router._stopped.is_set():
+        time.sleep(0.01)
+
+    # the receiver of the stopped router is still waiting for the queue
+    system_queue_fx.put(Request(uid=uid, client_process="p", data="response"))
+    stopping.join(2.0)
+    assert not stopping.is_alive()
+
+    assert ResponseRouter(system_queue_fx).register(uid).result(timeout=2.0) == "response"
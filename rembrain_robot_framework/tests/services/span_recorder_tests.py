@@ -0,0 +1,61 @@
+import time
+from queue import Queue
+
+import pytest
+
+from rembrain_robot_framework.services.span_recorder import SpanRecorder, spanned
+
+
+def test_span_records_duration() -> None:
+    recorder = SpanRecorder("p", Queue())
+
+    started: float = time.time()
+    with recorder.span("inference", frame=1):
+        time.sleep(0.1)
+
+    (name, start, duration, thread_id, args), = recorder.drain()
+    assert name == "inference"
+    assert start == pytest.approx(started, abs=0.01)
+    assert duration == pytest.approx(0.1, abs=0.05)
+    assert args == {"frame": 1}
+    assert recorder.drain() == []
+
+
+def test_ring_buffer_keeps_latest_spans() -> None:
+    recorder = SpanRecorder("p", Queue(), capacity=3)
+    for i in range(5):
+        recorder.record(f"s{i}", time.time(), 0.0)
+
+    assert [s[0] for s in recorder.drain()] == ["s2", "s3", "s4"]
+
+
+def test_report_every_interval() -> None:
+    reports = Queue()
+    recorder = SpanRecorder("p", reports, interval=0.2)
+    recorder.start()
+
+    recorder.record("s", time.time(), 0.0)
+    report: dict = reports.get(timeout=1.0)
+    assert report["process"] == "p"
+    assert [s[0] for s in report["spans"]] == ["s"]
+
+
+def test_spanned_method() -> None:
+    recorder = SpanRecorder("p", Queue())
+
+    class Processor:
+        span = recorder.span
+
+        @spanned("inference")
+        def infer(self, x: int) -> int:
+            return x * 2
+
+        @spanned()
+        def other(self) -> None:
+            pass
+
+    processor = Processor()
+    assert processor.infer(2) == 4
+    processor.other()
+
+    assert [s[0] for s in recorder.drain()] == ["inference", "test_spanned_method.<locals>.Processor.other"]
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+from rembrain_robot_framework.services.stack_monitor import StackMonitor
+
+
+def busy_leaf(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def busy_root(stop: threading.Event) -> None:
+    busy_leaf(stop)
+
+
+def test_collapsed_stacks(tmp_path) -> None:
+    monitor = StackMonitor("worker", sampling_rate=200, export_interval=0.2, output_dir=str(tmp_path))
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_root, args=(stop,), name="busy;worker")
+
+    worker.start()
+    monitor.start_monitoring()
+    time.sleep(0.5)
+
+    # it's exported periodically
+    assert os.path.exists(monitor.output_path)
+
+    stop.set()
+    worker.join()
+    monitor.stop_monitoring()
+    assert monitor.samples > 20
+
+    with open(monitor.output_path) as f:
+        lines = f.read().splitlines()
+
+    assert monitor.output_path == os.path.join(str(tmp_path), f"worker.{os.getpid()}.collapsed")
+    worker_lines = [line for line in lines if line.startswith("busy:worker;")]
+    assert worker_lines
+
+    stack, count = worker_lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    frames = stack.split(";")
+    assert "StackMonitor" not in stack
+    assert [f.split(" ")[0] for f in frames if f.startswith("busy_")] == ["busy_root", "busy_leaf"]
+    assert "(stack_monitor_tests.py:" in frames[-1] or "(stack_monitor_tests.py:" in frames[-2]
+
+
+def test_stop_without_start() -> None:
+    StackMonitor("idle").stop_monitoring()
+
+
+def test_number_of_stacks_is_limited(tmp_path) -> None:
+    monitor = StackMonitor("worker", sampling_rate=200, output_dir=str(tmp_path), max_stacks=1)
+    stop = threading.Event()
+    workers = [threading.Thread(target=busy_root, args=(stop,), name=f"worker{i}") for i in range(3)]
+
+    for worker in workers:
+        worker.start()
+    monitor.start_monitoring()
+    time.sleep(0.3)
+
+    stop.set()
+    for worker in workers:
+        worker.join()
+    monitor.stop_monitoring()
+
+    # one stack of a thread and the other stacks of every thread
+    stacks = monitor.collapsed().splitlines()
+    assert len([s for s in stacks if StackMonitor.OTHER_STACKS not in s]) == 1
+    assert all(s.split(";")[1].startswith(StackMonitor.OTHER_STACKS) for s in stacks[1:])
+    assert sum(int(s.rsplit(" ", 1)[1]) for s in stacks) >= monitor.samples
@@ -0,0 +1,50 @@
+import pytest
+
+from rembrain_robot_framework.models.trace_context import TraceContext, TraceHop
+from rembrain_robot_framework.services.trace_collector import TraceCollector
+
+
+def make_trace(*times: float) -> TraceContext:
+    names = ("camera", "packer", "ws")
+    return TraceContext(hops=[TraceHop(name=n, stage="publish", time=t) for n, t in zip(names, times)])
+
+
+def test_trace_latencies() -> None:
+    trace = make_trace(10.0, 10.5, 12.0)
+
+    assert trace.latencies() == [
+        ("camera.publish -> packer.publish", 0.5),
+        ("packer.publish -> ws.publish", 1.5),
+    ]
+    assert trace.total == 2.0
+    assert TraceContext().total == 0.0
+
+
+def test_with_hop_keeps_trace() -> None:
+    trace = TraceContext().with_hop("camera", "start")
+    next_trace = trace.with_hop("packer", "consume")
+
+    assert next_trace.trace_id == trace.trace_id
+    assert len(trace.hops) == 1
+    assert [h.stage for h in next_trace.hops] == ["start", "consume"]
+
+
+def test_collector_report() -> None:
+    collector = TraceCollector(max_samples=100)
+    assert collector.report() == {"total": {"count": 0, "p50": None, "p99": None}, "hops": {}}
+
+    for i in range(1, 101):
+        collector.add(make_trace(0.0, i / 100, i / 10))
+
+    report: dict = collector.report()
+    assert report["total"]["count"] == 100
+    assert report["total"]["p50"] == pytest.approx(5.1)
+    assert report["total"]["p99"] == pytest.approx(10.0)
+    assert report["hops"]["camera.publish -> packer.publish"]["p50"] == pytest.approx(0.51)
+
+    # only the latest samples are kept
+    collector.add(make_trace(0.0, 0.0, 100.0))
+    assert collector.report()["total"]["count"] == 100
+
+    collector.clear()
+    assert collector.report()["hops"] == {}
@@ -0,0 +1,79 @@
+import sys
+import time
+from ctypes import c_bool
+from multiprocessing import get_context
+
+import pytest
+
+from rembrain_robot_framework import utils
+
+
+def _sleep(log_queue, ready, stopped) -> None:
+    utils._init_process(log_queue, "INFO")
+    try:
+        ready.set()
+        while True:
+            time.sleep(0.1)
+    finally:
+        stopped.value = True
+
+
+def _ignore_exit(log_queue, ready) -> None:
+    utils._init_process(log_queue, "INFO")
+    while True:
+        try:
+            ready.set()
+            time.sleep(0.1)
+        except SystemExit:
+            pass
+
+
+def test_terminated_process_exits_normally() -> None:
+    ctx = get_context("spawn")
+    log_queue, ready, stopped = ctx.Queue(), ctx.Event(), ctx.Value(c_bool, False)
+    process = ctx.Process(target=_sleep, args=(log_queue, ready, stopped), daemon=True)
+    process.start()
+    assert ready.wait(10.0)
+
+    process.terminate()
+    process.join(3.0)
+
+    assert process.exitcode == 0
+    # finally blocks are run, so processes free their resources
+    assert stopped.value
+
+
+def test_process_that_ignores_exit_is_killed_after_timeout() -> None:
+    ctx = get_context("spawn")
+    log_queue, ready = ctx.Queue(), ctx.Event()
+    process = ctx.Process(target=_ignore_exit, args=(log_queue, ready), daemon=True)
+    process.start()
+    assert ready.wait(10.0)
+
+    started: float = time.monotonic()
+    process.terminate()
+    process.join(utils.EXIT_TIMEOUT + 3.0)
+
+    assert process.exitcode == 0
+    assert time.monotonic() - started >= utils.EXIT_TIMEOUT - 0.5
+
+
+def test_import_path_is_validated_without_import(tmp_path, monkeypatch) -> None:
+    package = tmp_path / "validated_package"
+    (package / "sub").mkdir(parents=True)
+    # importing of the package would fail
+    (package / "__init__.py").write_text("raise RuntimeError('package is imported')\n")
+    (package / "sub" / "__init__.py").write_text("")
+    (package / "sub" / "processes.py").write_text("class Worker:\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    utils.validate_import_path("validated_package.sub.processes:Worker")
+    assert "validated_package" not in sys.modules
+
+    for import_path in (
+        "validated_package.sub.processes:NotExisting",
+        "validated_package.sub.not_existing:Worker",
+        "validated_package.sub.processes.Worker:Worker",
+    ):
+        with pytest.raises(utils.ConfigurationError):
+            utils.validate_import_path(import_path)
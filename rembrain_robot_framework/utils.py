@@ -1,5 +1,13 @@
+import ast
+import asyncio
+import importlib
+import importlib.machinery
+import importlib.util
+import inspect
 import logging
 import os
+import signal
+import sys
 import time
 import typing as T
 
@@ -7,9 +15,18 @@ from ctypes import c_bool, c_int, c_float, c_char_p
 from functools import wraps
 from logging.handlers import QueueHandler
 from multiprocessing import context, Manager
+from threading import Thread, Timer
 
+# time for a terminated process to free its resources
+EXIT_TIMEOUT = 5.0
 
-def generate(name: str, manager: Manager, ctx: context.BaseContext) -> T.Any:
+# shared objects that are served by a Manager process
+MANAGER_OBJECT_TYPES = ("dict", "list")
+
+
+def generate(
+    name: str, manager: T.Optional[Manager], ctx: context.BaseContext
+) -> T.Any:
     # Important: Since we are using a separate context for the RobotProcesses, always instantiate from it
     if name.startswith("Array:"):
         length = int(name.split(":")[1])
@@ -43,37 +60,59 @@ def generate(name: str, manager: Manager, ctx: context.BaseContext) -> T.Any:
 def keep_alive(start_process_func: T.Callable) -> T.Callable:
     @wraps(start_process_func)
     def alive_cycle(process_class, *args, **kwargs) -> None:
-        name: str = kwargs["name"] if "name" in kwargs else "unknown"
+        _init_process(kwargs["logging_queue"], kwargs.get("log_level", "INFO"))
+        _run_alive(start_process_func, process_class, *args, **kwargs)
 
-        # Initialize logging for this process
-        # Create a handler to the log_queue on the root handler
-        # So any logger that is created inside the process will use this handler
-        log_queue = kwargs["logging_queue"]
-        log_level = kwargs.get("log_level", "INFO").upper()
+    return alive_cycle
 
-        root_logger = logging.getLogger()
-        root_logger.setLevel(log_level)
-        root_logger.handlers.clear()
-        root_logger.handlers.append(QueueHandler(log_queue))
 
-        dispatcher_log = logging.getLogger("RobotDispatcher")
+def _init_process(log_queue: T.Any, log_level: str) -> None:
+    # Initialize logging for this process
+    # Create a handler to the log_queue on the root handler
+    # So any logger that is created inside the process will use this handler
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level.upper())
+    root_logger.handlers.clear()
+    root_logger.handlers.append(QueueHandler(log_queue))
 
-        while True:
-            try:
-                start_process_func(process_class, *args, **kwargs)
-            except Exception as e:
-                dispatcher_log.warning(f"Exception happened in process {name}")
-                dispatcher_log.error(e, exc_info=True)
-                time.sleep(1.0)
+    # RobotDispatcher.stop_process() terminates the process:
+    # exit normally, so locks of the shared queues are released and resources are freed
+    signal.signal(signal.SIGTERM, _exit_on_signal)
 
-            if "keep_alive" in kwargs and not kwargs["keep_alive"]:
-                dispatcher_log.info(f"process {name} is closing")
-                break
 
-            dispatcher_log.info(f"Restarting process {name}")
-            time.sleep(5.0)
+def _run_alive(start_process_func: T.Callable, process_class, *args, **kwargs) -> None:
+    name: str = kwargs["name"] if "name" in kwargs else "unknown"
+    dispatcher_log = logging.getLogger("RobotDispatcher")
+    # RobotDispatcher reports restarts of the process
+    restart_counter: T.Any = kwargs.pop("restart_counter", None)
 
-    return alive_cycle
+    while True:
+        try:
+            start_process_func(process_class, *args, **kwargs)
+        except Exception as e:
+            dispatcher_log.warning(f"Exception happened in process {name}")
+            dispatcher_log.error(e, exc_info=True)
+            time.sleep(1.0)
+
+        if "keep_alive" in kwargs and not kwargs["keep_alive"]:
+            dispatcher_log.info(f"process {name} is closing")
+            break
+
+        dispatcher_log.info(f"Restarting process {name}")
+        if restart_counter is not None:
+            with restart_counter.get_lock():
+                restart_counter.value += 1
+
+        time.sleep(5.0)
+
+
+def _exit_on_signal(signum: int, frame: T.Any) -> None:
+    # exit can hang on flushing queues that nobody reads anymore, so the process is killed after the timeout
+    watchdog = Timer(EXIT_TIMEOUT, os._exit, args=(0,))
+    watchdog.daemon = True
+    watchdog.start()
+
+    sys.exit(0)
 
 
 @keep_alive
@@ -81,13 +120,157 @@ def start_process(process_class, *args, **kwargs) -> None:
     process = None
 
     try:
+        # classes from the config are imported only in the process that runs them
+        if isinstance(process_class, str):
+            process_class = import_class(process_class)
+
+        ready_queue: T.Any = kwargs.pop("ready_queue", None)
+        started_at: float = time.time()
         process = process_class(*args, **kwargs)
-        process.run()
+
+        # RobotDispatcher waits for it to know the process can get messages
+        if ready_queue is not None:
+            ready_queue.put((kwargs["name"], time.time(), time.time() - started_at))
+
+        result: T.Any = process.run()
+
+        # run() of AsyncRobotProcess is a coroutine
+        if inspect.iscoroutine(result):
+            asyncio.run(result)
     finally:
         if process:
             process.free_resources()
 
 
+def start_group(members: T.Dict[str, dict], logging_queue: T.Any) -> None:
+    """
+    Runs several processes as threads of one OS process (processes with the same 'group' in config).
+    Every thread restarts its process like a separate process does.
+
+    :param members: Process name => arguments of start_process() for it.
+    :param logging_queue: Queue for the logs of the group.
+    """
+    log_level: str = min(
+        (m.get("log_level", "INFO").upper() for m in members.values()),
+        key=logging.getLevelName,
+    )
+    _init_process(logging_queue, log_level)
+
+    threads: T.List[Thread] = [
+        Thread(
+            target=_run_alive,
+            args=(start_process.__wrapped__,),
+            kwargs=member,
+            name=name,
+            daemon=True,
+        )
+        for name, member in members.items()
+    ]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+
+def import_class(import_path: str) -> T.Type:
+    """
+    Imports a class by its path like 'package.module:ClassName'.
+    """
+    module_name, class_name = _split_import_path(import_path)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def validate_import_path(import_path: str) -> None:
+    """
+    Checks that the class can be imported by its path like 'package.module:ClassName' without importing the module.
+    The module is searched and its source is parsed for the name, so bad paths fail fast at the start.
+
+    :raise: ConfigurationError: if the module or the class doesn't exist
+    """
+    module_name, class_name = _split_import_path(import_path)
+
+    try:
+        spec = _find_spec(module_name)
+    except (ImportError, ValueError):
+        spec = None
+
+    if spec is None:
+        raise ConfigurationError(
+            f"Module '{module_name}' of the process class '{import_path}' is not found."
+        )
+
+    # compiled modules can't be checked without the import
+    if spec.origin is None or not spec.origin.endswith(".py"):
+        return
+
+    with open(spec.origin, "rb") as file:
+        module: ast.Module = ast.parse(file.read(), spec.origin)
+
+    if class_name not in _get_module_names(module):
+        raise ConfigurationError(
+            f"Class '{class_name}' of the process class '{import_path}' is not found."
+        )
+
+
+def _find_spec(module_name: str) -> T.Optional[importlib.machinery.ModuleSpec]:
+    """
+    Finds the module like importlib.util.find_spec(), but doesn't import its parent packages:
+    a submodule is searched in the locations of its parent package.
+    Packages that change their __path__ at import are searched by it only if they are imported already.
+    """
+    parts: T.List[str] = module_name.split(".")
+    spec: T.Optional[importlib.machinery.ModuleSpec] = None
+
+    for i in range(len(parts)):
+        name: str = ".".join(parts[: i + 1])
+        if spec is None or name in sys.modules:
+            # top-level modules and imported modules are found without importing
+            spec = importlib.util.find_spec(name)
+        elif spec.submodule_search_locations is None:
+            # the parent is a module, not a package
+            return None
+        else:
+            spec = importlib.machinery.PathFinder.find_spec(
+                name, spec.submodule_search_locations
+            )
+
+        if spec is None:
+            return None
+
+    return spec
+
+
+def _split_import_path(import_path: str) -> T.Tuple[str, str]:
+    module_name, _, class_name = import_path.partition(":")
+    if not module_name or not class_name:
+        raise ConfigurationError(
+            f"Process class '{import_path}' must be a class or an import path like 'package.module:ClassName'."
+        )
+
+    return module_name, class_name
+
+
+def _get_module_names(module: ast.Module) -> T.Set[str]:
+    """Returns names defined or imported at the top level of the module."""
+    names: T.Set[str] = set()
+
+    for node in module.body:
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update(
+                (alias.asname or alias.name).split(".")[0] for alias in node.names
+            )
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names.update(
+                n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)
+            )
+
+    return names
+
+
 def get_arg_with_env_fallback(
     kwargs: T.Dict[str, T.Any], key: str, fallback_env_var: str
 ) -> T.Any: